@@ -0,0 +1,294 @@
+"""합성 곡 데이터로 주요 동작의 지연 시간과 최대 메모리를 측정합니다.
+
+    python bench.py                       # 1k, 10k, 100k, 1M 패턴
+    python bench.py --sizes 1000 10000 --repeat 200 --json result.json
+
+창 관련 동작(updateDisplay, onSuccess/onFail)은 화면 없이(offscreen) 측정하며,
+PyQt5가 없으면 건너뜁니다. 결과 JSON을 버전별로 저장해 두면 비교할 수 있습니다.
+"""
+import argparse
+import gzip
+import http.server
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import engine
+import history
+import songdb
+from progress import DEFAULT_SETTINGS, ProgressStore
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+PATTERN_TYPES = ('NM', 'HD', 'MX', 'SC')
+
+
+def make_songs(pattern_count, seed=0):
+    """실제 온라인 songs.json과 같은 모양의 곡 목록을 패턴 수에 맞춰 만듭니다."""
+    rng = random.Random(seed)
+    per_song = len(engine.MODES) * len(PATTERN_TYPES)
+    songs = []
+    for i in range((pattern_count + per_song - 1) // per_song):
+        patterns = {}
+        for mode in engine.MODES:
+            patterns[mode] = {
+                diff_type: {
+                    'level': rng.randint(1, 15),
+                    'floor': rng.choice(engine.LEVELS),
+                    'rating': rng.randint(100, 200),
+                }
+                for diff_type in PATTERN_TYPES
+            }
+        songs.append({
+            'title': i,
+            'name': f'곡 {i} ~Synthetic_{i % 97}~',
+            'composer': f'작곡가 {i % 50}',
+            'dlcCode': 'RV',
+            'dlc': 'RESPECT V',
+            'patterns': patterns,
+        })
+    return songs
+
+
+def make_history(songs, shown_ratio, cleared_ratio, seed=0):
+    """shown_songs.json/cleared_songs.json 형식의 진행 기록을 만듭니다."""
+    rng = random.Random(seed)
+    shown = {}
+    cleared = {}
+    for song in songs:
+        for mode, patterns in song['patterns'].items():
+            for diff_type, info in patterns.items():
+                if rng.random() < shown_ratio:
+                    shown.setdefault(engine.level_key(mode, info['floor']), []).append([song['name'], diff_type])
+                if rng.random() < cleared_ratio:
+                    cleared[f"{song['name']}_{mode}_{diff_type}"] = True
+    return shown, cleared
+
+
+def write_dataset(data_dir, pattern_count, shown_ratio, cleared_ratio):
+    """합성 곡 데이터와 (저널 도입 전 형식의) 진행 기록을 data_dir에 씁니다."""
+    raw = make_songs(pattern_count)
+    songs = [songdb.filter_song(song) for song in raw]
+    shown, cleared = make_history(songs, shown_ratio, cleared_ratio)
+    files = {
+        'songs.json': songs,
+        'shown_songs.json': shown,
+        'cleared_songs.json': cleared,
+        'last_settings.json': DEFAULT_SETTINGS,
+    }
+    for name, data in files.items():
+        with open(os.path.join(data_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    return raw
+
+
+def write_plays(path, play_count, pid_count, seed=0):
+    """합성 플레이 기록 파일을 씁니다. (NumPy 필요)"""
+    np = history.load_numpy()
+    rng = np.random.default_rng(seed)
+    plays = np.zeros(play_count, dtype=history.DTYPE)
+    plays['time'] = 1.7e9 + np.cumsum(rng.exponential(90, play_count))
+    plays['pid'] = rng.integers(0, max(1, pid_count), play_count)
+    plays['mode'] = rng.integers(0, len(engine.MODES), play_count)
+    plays['floor'] = rng.choice([songdb.floor_key(level) for level in engine.LEVELS], play_count)
+    plays['result'] = rng.random(play_count) < 0.5
+    with open(path, 'wb') as f:
+        f.write(history.HEADER.pack(history.HISTORY_MAGIC, history.HISTORY_VERSION, history.RECORD.size, len(engine.MODES)))
+        plays.tofile(f)
+
+
+def serve_songs(raw):
+    """raw를 gzip JSON으로 주는 로컬 HTTP 서버를 띄우고 (서버, URL)을 반환합니다. (온라인 곡 데이터 대신)"""
+    body = gzip.compress(json.dumps(raw, ensure_ascii=False).encode('utf-8'))
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/songs.json'
+
+
+def measure(fn, repeat, setup=None, memory_repeat=3):
+    """fn의 지연 시간 백분위수(ms)와 최대 추가 메모리(KB)를 반환합니다."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+
+    # tracemalloc은 느려서 시간 측정과 따로 몇 번만 실행
+    peak = 0
+    for _ in range(min(memory_repeat, repeat)):
+        if setup:
+            setup()
+        tracemalloc.start()
+        fn()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    times.sort()
+
+    def percentile(p):
+        return times[min(len(times) - 1, int(round(p / 100 * (len(times) - 1))))]
+
+    return {
+        'n': repeat,
+        'mean_ms': statistics.fmean(times),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': times[-1],
+        'peak_kb': peak / 1024,
+    }
+
+
+def bench_headless(data_dir, raw, repeat, play_count):
+    results = {}
+    slow_repeat = max(3, repeat // 20)  # 전체 파일을 다루는 동작은 적게 반복
+    songs_path = os.path.join(data_dir, 'songs.json')
+    snapshot_path = os.path.join(data_dir, 'songs.cache')
+
+    def drop_snapshot():
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+
+    # 실제 업데이트처럼 받으면서 파싱/필터링/색인하는 경로 (새 내용, 같은 내용)
+    server, url = serve_songs(raw)
+    download_path = os.path.join(data_dir, 'songs.download.json')
+    download_meta = os.path.join(data_dir, 'songs.download.meta.json')
+
+    def drop_download():
+        for path in (download_path, download_meta):
+            if os.path.exists(path):
+                os.remove(path)
+
+    try:
+        results['download_songs'] = measure(
+            lambda: songdb.download_songs(url, download_path, download_meta), slow_repeat, setup=drop_download)
+        results['download_unchanged'] = measure(
+            lambda: songdb.download_songs(url, download_path, download_meta), slow_repeat)
+    finally:
+        server.shutdown()
+        server.server_close()
+    results['load_songs_json'] = measure(lambda: songdb.load_index(songs_path, snapshot_path), slow_repeat, setup=drop_snapshot)
+    songdb.load_index(songs_path, snapshot_path)
+    results['load_songs_snapshot'] = measure(lambda: songdb.load_index(songs_path, snapshot_path), slow_repeat)
+
+    session = engine.UpDownSession(data_dir, rng=random.Random(0))
+    session.load_songs()
+    session.start(8.1)
+    results['session_pick'] = measure(session.pick, repeat)
+    results['session_success_fail'] = measure(lambda: (session.success(), session.fail()), repeat)
+
+    store = session.progress
+    results['progress_flush'] = measure(
+        store.flush, repeat,
+        setup=lambda: store.add_shown('4B_8.1', store.ids.intern(f'bench {random.random()}', '4B', 'SC')))
+    results['progress_compact'] = measure(store.compact, slow_repeat)
+    session.close()
+    results['progress_load'] = measure(lambda: ProgressStore(data_dir).close(), slow_repeat)
+
+    if history.load_numpy() is None:
+        print("NumPy가 없어 플레이 기록 집계 측정을 건너뜁니다")
+    elif play_count:
+        plays_path = os.path.join(data_dir, 'plays.bench.bin')
+        write_plays(plays_path, play_count, len(raw) * len(engine.MODES) * len(PATTERN_TYPES))
+        results['history_report'] = measure(
+            lambda: history.report(history.load(plays_path), engine.MODES), slow_repeat)
+    return results
+
+
+def bench_gui(data_dir, repeat):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+        import main
+    except ImportError as e:
+        print(f"PyQt5를 불러올 수 없어 창 관련 측정을 건너뜁니다: {e}")
+        return {}
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    window = main.DifficultyWindow(data_dir)
+    # 진행도/곡 데이터는 백그라운드에서 불러오므로 onSessionLoaded가 세션을 붙일 때까지 이벤트 처리
+    while window.session is None:
+        if not window.loader.isRunning():
+            app.processEvents()  # 끝났으면 남은 finished 신호만 처리
+            if window.session is None:
+                print("세션을 불러오지 못해 창 관련 측정을 건너뜁니다")
+                window.close()
+                return {}
+            break
+        app.processEvents()
+        time.sleep(0.001)
+    window.last_update_check = time.time()  # 측정 중 온라인 업데이트 방지
+    window.session.rng = random.Random(0)
+    window.updateDisplay(lambda: window.session.start(8.1))
+
+    results = {
+        'updateDisplay': measure(window.updateDisplay, repeat),
+        'onSuccess': measure(window.onSuccess, repeat, setup=window.onFail),
+        'onFail': measure(window.onFail, repeat, setup=window.onSuccess),
+    }
+    window.close()
+    app.processEvents()
+    return results
+
+
+def print_table(pattern_count, results):
+    print(f"\n== {pattern_count:,} 패턴 ==")
+    print(f"{'동작':<24}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'peak KB':>12}")
+    for name, r in results.items():
+        print(f"{name:<24}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['max_ms']:>10.3f}{r['peak_kb']:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='업다운 순회 벤치마크')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='합성 데이터의 패턴 수')
+    parser.add_argument('--repeat', type=int, default=100, help='클릭 단위 동작의 반복 횟수')
+    parser.add_argument('--shown', type=float, default=0.5, help='이미 표시한 패턴 비율')
+    parser.add_argument('--cleared', type=float, default=0.1, help='클리어한 패턴 비율')
+    parser.add_argument('--plays', type=int, default=300000, help='플레이 기록 집계에 쓸 합성 플레이 수 (0이면 측정 안 함)')
+    parser.add_argument('--no-gui', action='store_true', help='창 관련 동작을 측정하지 않음')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일')
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'repeat': args.repeat, 'sizes': {}}
+    for pattern_count in args.sizes:
+        data_dir = tempfile.mkdtemp(prefix='updown-bench-')
+        try:
+            raw = write_dataset(data_dir, pattern_count, args.shown, args.cleared)
+            results = bench_headless(data_dir, raw, args.repeat, args.plays)
+            del raw
+            if not args.no_gui:
+                results.update(bench_gui(data_dir, args.repeat))
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        print_table(pattern_count, results)
+        report['sizes'][str(pattern_count)] = results
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""현재 난이도의 전체 패턴 목록과 곡 검색 결과를 보여주는 Qt 모델. (PyQt5 필요)
+
+행마다 위젯이나 문자열을 미리 만들지 않고 패턴 색인의 PatternRecord 참조만 들고 있다가
+뷰가 화면에 보이는 행을 그릴 때 data()에서 글자와 상태(제시됨/클리어)를 만듭니다.
+QListView의 uniformItemSizes와 함께 쓰면 수만 행도 보이는 행만 계산합니다.
+"""
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt5.QtGui import QBrush, QColor
+
+import instrument
+import search
+
+SORT_KEYS = ('name', 'rating', 'status')  # 곡 이름순, 레이팅 높은 순, 상태순(새 곡 > 제시됨 > 클리어)
+STATUS_FILTERS = ('all', 'new', 'shown', 'cleared')
+STATUS_TEXT = {'new': '', 'shown': '[제시됨] ', 'cleared': '[클리어] '}
+STATUS_ORDER = {'new': 0, 'shown': 1, 'cleared': 2}
+STATUS_COLOR = {'shown': QColor(128, 128, 128), 'cleared': QColor(40, 140, 60)}
+
+
+class PatternListModel(QAbstractListModel):
+    """PatternRecord 목록을 보여주는 모델. 글자와 상태는 그릴 때 만듭니다."""
+
+    RecordRole = Qt.UserRole  # 행의 PatternRecord
+
+    def __init__(self, session, parent=None):
+        super().__init__(parent)
+        self.session = session
+        self.rows = []  # 화면 순서대로의 PatternRecord (색인의 목록을 복사하지 않고 참조만 모음)
+        self.row_index = {}  # (패턴 ID, floor_key, 레이팅) -> 처음 나오는 행 번호 (row_of용)
+
+    # ---- Qt 모델 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        record = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            star = '⭐ ' if record == self.session.current else ''
+            return f"{star}{STATUS_TEXT[self.status(record)]}{self.text(record)}"
+        if role == Qt.ForegroundRole:
+            color = STATUS_COLOR.get(self.status(record))
+            return QBrush(color) if color is not None else None
+        if role == Qt.ToolTipRole:
+            rating = f", 레이팅 {record.rating}" if record.rating else ''
+            return f"{record.name} ({record.mode} {record.pattern}, 난이도 {record.floor:.1f}{rating})"
+        if role == self.RecordRole:
+            return record
+        return None
+
+    def text(self, record):
+        return f"{record.name} - {record.label}"
+
+    def status(self, record):
+        """'cleared', 'shown', 'new' 중 하나. 진행도 비트셋을 그때그때 읽으므로 따로 갱신할 필요가 없습니다."""
+        return self.session.pattern_status(record)
+
+    def repaint(self):
+        """행은 그대로 두고 상태/현재 곡 표시만 다시 그리게 합니다."""
+        if self.rows:
+            self.dataChanged.emit(self.index(0), self.index(len(self.rows) - 1))
+
+    def set_rows(self, rows):
+        """행 목록을 바꾸고 행 번호 찾기용 사전을 다시 만듭니다."""
+        row_index = {}
+        for row, record in enumerate(rows):
+            # PatternRecord의 == 와 같은 기준. 같은 패턴이 여러 행이면 처음 행
+            row_index.setdefault((record.pid, record.floor_key, record.rating), row)
+        self.beginResetModel()
+        self.rows = rows
+        self.row_index = row_index
+        self.endResetModel()
+
+    def row_of(self, record):
+        """record의 행 번호. 없으면 -1."""
+        return self.row_index.get((record.pid, record.floor_key, record.rating), -1)
+
+
+class CandidateListModel(PatternListModel):
+    """세션의 (모드, 난이도) 패턴 목록. 정렬/필터는 행 순서(records 참조 목록)만 바꿉니다."""
+
+    def __init__(self, session, parent=None):
+        super().__init__(session, parent)
+        self.key = None  # 지금 보여주는 (색인, 모드, 난이도)
+        self.sort_key = 'name'
+        self.status_filter = 'all'
+        self.text_filter = ''
+
+    def refresh(self):
+        """세션의 현재 모드/난이도에 맞춥니다.
+
+        같은 목록이고 상태로 거르거나 정렬하지 않으면 행은 그대로 두고 다시 그리게만 합니다.
+        """
+        session = self.session
+        key = (session.song_index, session.mode, session.level)
+        if key != self.key or self.status_filter != 'all' or self.sort_key == 'status':
+            self.key = key
+            self.rebuild()
+        else:
+            self.repaint()
+
+    def rebuild(self):
+        """행 순서를 다시 만듭니다. (난이도 변경, 정렬/필터 변경 시)"""
+        with instrument.stage('candidates.rebuild'):
+            index, mode, level = self.key if self.key is not None else (None, None, None)
+            records = index.patterns(mode, level) if index is not None else []
+            if self.text_filter:
+                text = search.normalize(self.text_filter)
+                records = [record for record in records if text in search.normalize(record.name)]
+            if self.status_filter != 'all':
+                records = [record for record in records if self.status(record) == self.status_filter]
+
+            if self.sort_key == 'rating':
+                rows = sorted(records, key=lambda record: (-(record.rating or 0), record.name))
+            elif self.sort_key == 'status':
+                rows = sorted(records, key=lambda record: (STATUS_ORDER[self.status(record)], record.name))
+            else:
+                rows = sorted(records, key=lambda record: record.name)
+
+            self.set_rows(rows)
+
+    def set_sort(self, sort_key):
+        self.sort_key = sort_key
+        self.rebuild()
+
+    def set_status_filter(self, status_filter):
+        self.status_filter = status_filter
+        self.rebuild()
+
+    def set_text_filter(self, text):
+        self.text_filter = text.strip()
+        self.rebuild()
+
+
+class SearchResultModel(PatternListModel):
+    """곡 검색 결과. 찾은 곡마다 모든 모드/패턴을 한 행씩 보여줍니다."""
+
+    def text(self, record):
+        return f"{record.name} - {record.mode} {record.label}"
+
+    def set_results(self, results):
+        """session.search()의 [(곡 이름, [PatternRecord])]를 표시합니다. 곡 안에서는 모드, 난이도 순."""
+        rows = []
+        for _, records in results:
+            rows.extend(sorted(records, key=lambda record: (record.mode, record.floor_key, record.pattern)))
+        self.set_rows(rows)
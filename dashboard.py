@@ -0,0 +1,81 @@
+"""모든 모드/난이도의 진행도 집계표(levelgrid.LevelGrid)를 보여주는 Qt 모델. (PyQt5 필요)
+
+행은 난이도, 열은 모드이고 칸마다 (클리어 + 제시됨)/패턴 수를 보여줍니다.
+숫자는 세션이 성공/실패/클리어 때 고쳐 둔 배열을 그릴 때 읽기만 하므로,
+표 전체를 다시 그려도 다시 세지 않습니다.
+"""
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QBrush, QColor, QFont
+
+import engine
+
+EMPTY_COLOR = QColor(235, 235, 235)  # 패턴이 없는 칸
+
+
+class LevelGridModel(QAbstractTableModel):
+    """세션의 진행도 집계표를 난이도 x 모드 표로 보여줍니다."""
+
+    def __init__(self, session, parent=None):
+        super().__init__(parent)
+        self.session = session
+        self.version = None  # 마지막으로 그린 집계표 버전
+        self.current = None  # 마지막으로 그린 현재 (모드, 난이도)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(engine.LEVELS)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(engine.MODES)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return engine.MODES[section]
+        return f"{engine.LEVELS[section]:.1f}"
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        grid = self.session.grid
+        cell = index.column() * len(engine.LEVELS) + index.row()
+        total = grid.total[cell]
+        if role == Qt.DisplayRole:
+            if not total:
+                return ''
+            return f"{grid.cleared[cell] + grid.shown[cell]}/{total}"
+        if role == Qt.BackgroundRole:
+            if not total:
+                return QBrush(EMPTY_COLOR)
+            # 많이 진행할수록 진한 초록
+            done = (grid.cleared[cell] + grid.shown[cell]) / total
+            return QBrush(QColor(255 - int(120 * done), 255 - int(40 * done), 255 - int(120 * done)))
+        if role == Qt.ToolTipRole:
+            c = grid.cell_counts(cell)
+            return (f"{engine.MODES[index.column()]} {engine.LEVELS[index.row()]:.1f}: "
+                    f"패턴 {c['total']}, 클리어 {c['cleared']}, 제시됨 {c['shown']}, 남음 {c['remaining']}")
+        if role == Qt.FontRole and self._is_current(index):
+            font = QFont()
+            font.setBold(True)
+            return font
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def _is_current(self, index):
+        session = self.session
+        return (engine.MODES[index.column()] == session.mode
+                and engine.LEVELS[index.row()] == session.level)
+
+    def refresh(self):
+        """집계표나 현재 난이도가 바뀌었으면 다시 그리게 합니다."""
+        current = (self.session.mode, self.session.level)
+        if self.session.grid.version == self.version and current == self.current:
+            return
+        self.version = self.session.grid.version
+        self.current = current
+        self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+    def position(self, index):
+        """표의 칸에 해당하는 (모드, 난이도)."""
+        return engine.MODES[index.column()], engine.LEVELS[index.row()]
@@ -0,0 +1,485 @@
+"""업다운 순회의 곡 선택/난이도 이동/진행도 로직. (PyQt5 없이 사용 가능)
+
+창(main.py)은 이 세션을 화면에 보여주기만 하므로, 같은 로직을 CLI나 배치 작업,
+벤치마크에서 QApplication 없이 그대로 쓸 수 있습니다.
+"""
+import os
+import random
+from collections import namedtuple
+
+import instrument
+import search
+import songdb
+from history import PlayHistory, failure_counts
+from levelgrid import LevelGrid
+from progress import ProgressStore, read_last_settings
+from sampler import UniformPool, WeightedPool
+
+MODES = ('4B', '5B', '6B', '8B')
+LEVELS = (
+    1.1, 1.2, 1.3, 2.1, 2.2, 2.3, 3.1, 3.2, 3.3,
+    4.1, 4.2, 4.3, 5.1, 5.2, 5.3, 6.1, 6.2, 6.3,
+    7.1, 7.2, 7.3, 8.1, 8.2, 8.3, 9.1, 9.2, 9.3,
+    10.1, 10.2, 10.3, 11.1, 11.2, 11.3, 12.1, 12.2, 12.3,
+    13.1, 13.2, 13.3, 14.1, 14.2, 14.3, 15.1, 15.2, 15.3,
+    16.1, 16.2,
+)
+DEFAULT_LEVEL = 8.1
+WEIGHTINGS = ('uniform', 'rating', 'failures')  # set_weighting()에 쓸 수 있는 기본 가중치
+
+# 곡 선택 결과. status는 'ok', 'no_data'(곡 데이터 없음), 'empty'(난이도에 곡 없음),
+# 'all_cleared'(모두 클리어), 'all_played'(모두 플레이) 중 하나
+Pick = namedtuple('Pick', ['status', 'record', 'played', 'remaining'])
+
+
+def level_key(mode, level):
+    """진행도 저장에 쓰는 난이도 키 ("4B_8.1")."""
+    return f"{mode}_{level:.1f}"
+
+
+def last_position(data_dir):
+    """저장된 마지막 (모드, 난이도). 진행도 전체를 불러오기 전에 창을 그릴 때 씁니다."""
+    return _position(read_last_settings(data_dir))
+
+
+def _position(settings):
+    mode = settings.get('last_mode', MODES[0])
+    return mode, settings.get(mode, DEFAULT_LEVEL)
+
+
+def step_level(level, direction):
+    """LEVELS에서 한 칸 위(direction > 0) 또는 아래의 난이도를 반환합니다. 끝이면 그대로."""
+    key = songdb.floor_key(level)
+    candidates = LEVELS if direction > 0 else reversed(LEVELS)
+    for candidate in candidates:
+        candidate_key = songdb.floor_key(candidate)
+        if (candidate_key > key) if direction > 0 else (candidate_key < key):
+            return candidate
+    return level
+
+
+class UpDownSession:
+    """곡 데이터, 패턴 색인, 진행도, 난이도 사다리, 곡 선택을 묶은 세션."""
+
+    def __init__(self, data_dir, songs_url=songdb.SONGS_URL, rng=random, weighting='uniform', progress=None, history=None):
+        self.data_dir = data_dir
+        self.songs_url = songs_url  # 온라인 곡 데이터 URL
+        self.songs_path = os.path.join(data_dir, 'songs.json')
+        self.meta_path = os.path.join(data_dir, 'songs_meta.json')
+        self.snapshot_path = os.path.join(data_dir, 'songs.cache')
+        self.rng = rng  # choice()를 가진 난수 생성기 (재현이 필요하면 random.Random(seed))
+
+        # 진행도 저널을 재생해서 상태를 불러옴 (첫 실행 시 기존 JSON 파일에서 옮김)
+        # 서버처럼 진행도를 따로 두는 경우 이미 연 ProgressStore를 넘김
+        self.progress = progress if progress is not None else ProgressStore(data_dir)
+        # 성공/실패할 때마다 덧붙이는 플레이 기록 (집계는 history.py)
+        self.history = history if history is not None else PlayHistory(os.path.join(data_dir, 'history.bin'), MODES)
+
+        self.song_index = None  # (모드, 난이도)별 패턴 색인 (곡 데이터 캐시, 여러 세션이 공유할 수 있음)
+        self.grid = LevelGrid(MODES, LEVELS, level_key)  # 모드/난이도별 패턴/클리어/제시 수 (색인과 진행도에서 집계)
+        self.songs_stamp = None  # 색인을 만든 songs.json의 (mtime_ns, size)
+
+        self.mode, self.level = _position(self.progress.last_settings)
+        self.current = None  # 현재 제시한 PatternRecord
+
+        self.weighting = None  # WEIGHTINGS 중 하나 또는 record -> 가중치 함수 (set_weighting)
+        self.strict_step = False  # True면 후보가 없는 난이도도 건너뛰지 않고 한 칸씩 이동
+        self.failures = {}  # 패턴 ID -> 실패 횟수 ('failures' 가중치용, 플레이 기록에서 불러온 뒤 실패할 때마다 더함)
+        self.samplers = {}  # (mode, floor_key) -> 아직 안 보고 클리어하지 않은 패턴 풀
+        self.prefetched = {}  # 방향(1/-1) -> (난이도, Pick): 성공/실패 후 보여줄 곡을 미리 고른 것
+        self.set_weighting(weighting)
+
+    # ---- 곡 데이터 ----
+
+    @instrument.timed('load_songs')
+    def load_songs(self):
+        """패턴 색인을 반환합니다. 아직 없으면 스냅샷/파일에서 로드합니다.
+
+        원본이 바뀌었는지는 여기서 확인하지 않습니다. (창은 파일 감시로 reload_songs()를 부름)
+        """
+        if self.song_index is not None:
+            instrument.count('songs_cache.hit')
+            return self.song_index
+        try:
+            if songdb.source_stamp(self.songs_path) is None:
+                print("로컬 곡 데이터가 없습니다. 시작 버튼을 눌러주세요.")
+                return None
+            instrument.count('songs_cache.miss')
+            self.set_index(songdb.load_index(self.songs_path, self.snapshot_path, self.progress.ids))
+            print("곡 데이터를 새로 로드했습니다.")
+            return self.song_index
+        except Exception as e:
+            print(f"곡 데이터 로드 중 오류 발생: {e}")
+            return None
+
+    def reload_songs(self):
+        """songs.json이 색인을 만든 뒤 바뀌었으면 다시 불러와 바뀐 패턴만 반영합니다.
+
+        다시 불러왔으면 새 색인을, 그대로거나 파일이 없으면 None을 반환합니다.
+        """
+        stamp = songdb.source_stamp(self.songs_path)
+        if stamp is None or (self.song_index is not None and stamp == self.songs_stamp):
+            return None
+        instrument.count('songs_cache.miss')
+        index = songdb.load_index(self.songs_path, self.snapshot_path, self.progress.ids)
+        self.set_index(index)
+        return index
+
+    def reload_progress(self):
+        """진행도 파일이 밖에서 바뀌었으면 다시 불러와 집계표와 후보 풀을 새로 만듭니다. 불러왔으면 True."""
+        if not self.progress.changed_externally() or not self.progress.reload():
+            return False
+        self.grid.rebuild(self.song_index, self.progress)
+        self.samplers = {}
+        self.prefetched = {}
+        return True
+
+    def set_index(self, index, delta=None):
+        """새로 불러온 패턴 색인을 적용하고 이전 색인과의 차이(IndexDelta)를 반환합니다.
+
+        이전 색인이 있으면 추가/삭제/난이도 변경된 패턴만 후보 풀, 진행도 집계표, 진행도에 반영합니다.
+        delta는 미리 구해 둔 차이로, 지금 색인과 비교한 것이 아니면 다시 구합니다.
+        색인은 바꾸지 않으므로 다른 세션과 공유해도 됩니다.
+        """
+        old = self.song_index
+        if old is None or old.ids_token != index.ids_token:
+            delta = None
+        elif delta is None or delta.base is not old:
+            delta = songdb.diff_index(old, index)
+
+        if delta is not None and delta.size() * 2 <= index.pid_count:
+            with instrument.stage('songs.apply_delta'):
+                # 바뀐 패턴을 진행도를 옮기기 전 상태로 빼고, 옮긴 뒤 상태로 다시 셈
+                for records in delta.removed_groups():
+                    self.grid.remove(records, self.progress)
+                self._reconcile_progress(delta, index)
+                for records in delta.added_groups():
+                    self.grid.add(records, self.progress)
+                # 참조 교체로 새 데이터 적용 (읽는 쪽은 항상 온전한 색인을 봄)
+                self.song_index = index
+                self._apply_delta(delta)
+        else:
+            # 처음 불러오거나 대부분 바뀐 경우는 전체를 다시 셈
+            if delta is not None:
+                self._reconcile_progress(delta, index)
+            self.grid.rebuild(index, self.progress)
+            self.song_index = index
+            self.samplers = {}
+        self.prefetched = {}
+        self.songs_stamp = songdb.source_stamp(self.songs_path)
+        return delta
+
+    def _reconcile_progress(self, delta, index):
+        """삭제되거나 난이도가 바뀐 패턴의 표시 기록을 새 난이도로 옮깁니다.
+
+        클리어 기록은 난이도와 상관없는 패턴 ID 기준이라 그대로 둡니다. (다시 추가되면 그대로 적용)
+        """
+        for old_records, new_records in [([record], []) for record in delta.removed] + delta.changed:
+            pid = old_records[0].pid
+            new_levels = {level_key(record.mode, record.floor) for record in new_records}
+            was_shown = False
+            for record in old_records:
+                key = level_key(record.mode, record.floor)
+                if key not in new_levels and pid in self.progress.shown.get(key, ()):
+                    self.progress.remove_shown(key, pid)
+                    was_shown = True
+            if was_shown:
+                # 이미 제시된 곡은 바뀐 난이도에서도 다시 제시하지 않음
+                for key in new_levels:
+                    self.progress.add_shown(key, pid)
+
+    def _apply_delta(self, delta):
+        """바뀐 패턴만 만들어 둔 후보 풀에 반영합니다."""
+        for record in delta.removed:
+            self._remove_record(record)
+        for old_records, new_records in delta.changed:
+            for record in old_records:
+                self._remove_record(record)
+            for record in new_records:
+                self._add_record(record)
+        for record in delta.added:
+            self._add_record(record)
+
+    def _remove_record(self, record):
+        sampler = self.samplers.get((record.mode, record.floor_key))
+        if sampler is not None:
+            sampler.remove(record)
+
+    def _add_record(self, record):
+        if record.pid in self.progress.cleared:
+            return
+        sampler = self.samplers.get((record.mode, record.floor_key))
+        if sampler is not None and record.pid not in self.progress.shown.get(level_key(record.mode, record.floor), ()):
+            sampler.add(record, self._weight(record))
+
+    def update_songs(self):
+        """온라인 곡 데이터를 받아 바로 적용합니다. (블로킹, 바뀌지 않았으면 None)"""
+        index = songdb.update_index(self.songs_url, self.songs_path, self.meta_path, self.snapshot_path, self.progress.ids)
+        if index is not None:
+            delta = self.set_index(index)
+            if delta is not None:
+                for name, n in delta.summary().items():
+                    instrument.count(f'songs_delta.{name}', n)
+        return index
+
+    # ---- 업다운 진행 ----
+
+    def set_mode(self, mode):
+        """모드를 바꾸고 그 모드에서 마지막으로 사용한 난이도를 반환합니다."""
+        self.mode = mode
+        self.level = self.progress.last_settings.get(mode, DEFAULT_LEVEL)
+        self.prefetched = {}
+        self._save_level()
+        return self.level
+
+    def start(self, level=None):
+        """지정한 난이도(없으면 현재 난이도)에서 곡을 하나 고릅니다."""
+        if level is not None:
+            self.level = level
+        self.prefetched = {}
+        pick = self.pick()
+        self._save_level()
+        return pick
+
+    def set_strict_step(self, strict):
+        """성공/실패 때 한 칸씩만 이동할지(True), 후보가 남은 가장 가까운 난이도로 건너뛸지(False) 정합니다."""
+        self.strict_step = strict
+        self.prefetched = {}
+
+    def next_level(self, direction):
+        """성공(direction > 0)/실패 후 이동할 난이도.
+
+        그 방향에서 아직 제시하지 않은 후보가 남은 가장 가까운 난이도로 바로 건너뜁니다.
+        strict_step이거나 그런 난이도가 없으면 한 칸 이동합니다.
+        """
+        if not self.strict_step and self.song_index is not None:
+            level = self.grid.nearest(self.mode, self.level, direction)
+            if level is not None:
+                return level
+        return step_level(self.level, direction)
+
+    @instrument.timed('session.success')
+    def success(self):
+        """현재 곡을 진행도에 기록하고 위 난이도에서 곡을 고릅니다. (next_level)"""
+        self._record_play(True)
+        return self._advance(1)
+
+    @instrument.timed('session.fail')
+    def fail(self):
+        """현재 곡을 진행도에 기록하고 아래 난이도에서 곡을 고릅니다. (next_level)"""
+        if self.current is not None:
+            self.failures[self.current.pid] = self.failures.get(self.current.pid, 0) + 1
+        self._record_play(False)
+        return self._advance(-1)
+
+    def _record_play(self, passed):
+        if self.current is not None:
+            self.history.record(self.current.pid, self.mode, self.level, passed)
+
+    def _advance(self, direction):
+        # 현재 곡이 있으면 항상 진행도에 추가하고 후보 풀에서 뺌
+        if self.current is not None:
+            records = self._same_key(self.current)
+            self.grid.remove(records, self.progress)
+            self.progress.add_shown(level_key(self.mode, self.level), self.current.pid)
+            self.grid.add(records, self.progress)
+            sampler = self.samplers.get((self.mode, songdb.floor_key(self.level)))
+            if sampler is not None:
+                # 같은 이름의 곡은 진행도 키를 공유하므로 함께 뺌
+                for record in records:
+                    sampler.remove(record)
+        self.level = self.next_level(direction)
+        self._save_level()
+
+        # 미리 골라 둔 곡이 있으면 그대로 사용 (곡 데이터를 다시 불러오면 set_index에서 버려짐)
+        prefetched = self.prefetched.get(direction) if self.load_songs() is not None else None
+        self.prefetched = {}
+        if prefetched is not None and prefetched[0] == self.level:
+            instrument.count('prefetch.hit')
+            pick = prefetched[1]
+            self.current = pick.record
+            return pick
+        instrument.count('prefetch.miss')
+        return self.pick()
+
+    def prefetch(self):
+        """현재 곡 다음에 성공/실패했을 때 보여줄 곡을 위/아래 난이도에서 미리 골라 둡니다.
+
+        모드 변경, 클리어 체크 변경, 진행도/클리어 초기화, 곡 데이터 교체 시 버려집니다.
+        """
+        self.prefetched = {}
+        if self.current is None or self.song_index is None:
+            return
+        with instrument.stage('prefetch'):
+            for direction in (1, -1):
+                level = self.next_level(direction)
+                if songdb.floor_key(level) == songdb.floor_key(self.level):
+                    # 사다리 끝이면 현재 곡이 진행도에 들어간 뒤에 골라야 함
+                    continue
+                self.prefetched[direction] = (level, self._draw(self.mode, level))
+
+    def mark_cleared(self, cleared=True):
+        """현재 곡의 클리어 여부를 기록합니다. 클리어한 곡은 진행도를 초기화해도 제시되지 않습니다."""
+        if self.current is None or self.is_cleared(self.current) == cleared:
+            return
+        self.prefetched = {}
+        records = self._same_key(self.current)
+        self.grid.remove(records, self.progress)
+        self.progress.set_cleared(self.current.pid, cleared)
+        self.grid.add(records, self.progress)
+
+        for record in records:
+            sampler = self.samplers.get((record.mode, record.floor_key))
+            if sampler is None:
+                continue
+            if cleared:
+                sampler.remove(record)
+            elif record.pid not in self.progress.shown.get(level_key(record.mode, record.floor), ()):
+                sampler.add(record, self._weight(record))
+
+    def _same_key(self, record):
+        """record와 패턴 ID(곡 이름, 모드, 패턴)가 같은 모든 패턴을 반환합니다."""
+        if self.song_index is None:
+            return [record]
+        return self.song_index.records_of(record.pid) or [record]
+
+    def is_cleared(self, record):
+        return record.pid in self.progress.cleared
+
+    def pattern_status(self, record):
+        """'cleared'(클리어), 'shown'(그 난이도에서 이미 제시됨), 'new' 중 하나."""
+        if record.pid in self.progress.cleared:
+            return 'cleared'
+        if record.pid in self.progress.shown.get(level_key(record.mode, record.floor), ()):
+            return 'shown'
+        return 'new'
+
+    def reset_progress(self):
+        """모든 난이도의 진행도를 초기화하고 곡을 다시 고릅니다."""
+        self.progress.reset_shown()
+        self.grid.rebuild(self.song_index, self.progress)
+        self.samplers = {}  # 필요한 난이도만 다음 추출 때 다시 만듦
+        self.prefetched = {}
+        return self.pick()
+
+    def reset_clears(self):
+        """모든 클리어 기록을 초기화합니다."""
+        self.progress.reset_cleared()
+        self.grid.rebuild(self.song_index, self.progress)
+        self.samplers = {}
+        self.prefetched = {}
+
+    def set_weighting(self, weighting):
+        """추출 가중치를 바꿉니다. 'uniform', 'rating', 'failures' 또는 record -> 가중치 함수.
+
+        'failures'는 플레이 기록(history.bin)에 쌓인 실패 횟수를 불러와 많이 실패한 패턴을 자주 고릅니다.
+        (실패한 패턴은 그 난이도에서 제시됨이 되므로, 진행도를 초기화했거나 다른 난이도에서 다시 후보가 될 때 적용)
+        """
+        if not callable(weighting) and weighting not in WEIGHTINGS:
+            raise ValueError(f"알 수 없는 가중치입니다: {weighting}")
+        if weighting == 'failures' and self.weighting != 'failures':
+            self.failures = failure_counts(self.history.path)
+        self.weighting = weighting
+        self.samplers = {}
+        self.prefetched = {}
+
+    def _weight(self, record):
+        if self.weighting == 'rating':
+            return record.rating or 1
+        if self.weighting == 'failures':
+            return 1 + self.failures.get(record.pid, 0)
+        if callable(self.weighting):
+            return self.weighting(record)
+        return 1
+
+    def _sampler(self, mode, level):
+        """(모드, 난이도)의 후보 풀을 반환합니다. 처음 쓸 때 한 번만 만들고 이후에는 갱신만 합니다."""
+        key = (mode, songdb.floor_key(level))
+        sampler = self.samplers.get(key)
+        if sampler is None:
+            with instrument.stage('pick.build_sampler'):
+                cleared = self.progress.cleared
+                shown = self.progress.shown.get(level_key(mode, level), ())
+                candidates = [
+                    record for record in self.song_index.patterns(mode, level)
+                    if record.pid not in cleared and record.pid not in shown
+                ]
+                if self.weighting == 'uniform':
+                    sampler = UniformPool(candidates)
+                else:
+                    sampler = WeightedPool(candidates, self._weight)
+            self.samplers[key] = sampler
+        return sampler
+
+    def stats(self):
+        """현재 모드/난이도의 곡 수 통계를 반환합니다."""
+        total = cleared = played = 0
+        if self.load_songs() is not None:
+            counts = self.grid.counts(self.mode, self.level)
+            total, cleared, played = counts['total'], counts['cleared'], counts['shown']
+        remaining = total - cleared
+        return {
+            'mode': self.mode,
+            'level': self.level,
+            'total': total,
+            'cleared': cleared,
+            'remaining': remaining,
+            'played': played,
+        }
+
+    def pick(self):
+        """현재 모드/난이도에서 클리어하지도, 이미 보지도 않은 곡을 무작위로 고릅니다."""
+        if self.load_songs() is None:
+            return Pick('no_data', None, 0, 0)
+        pick = self._draw(self.mode, self.level)
+        # 선택된 곡 정보 저장 (아직 진행도에는 추가하지 않음)
+        self.current = pick.record
+        return pick
+
+    def search(self, text, limit=search.MAX_RESULTS):
+        """곡 이름으로 찾은 [(곡 이름, [PatternRecord])]. 곡 데이터가 없으면 빈 목록."""
+        if self.load_songs() is None:
+            return []
+        return self.song_index.search_index().search(text, limit)
+
+    def select(self, record):
+        """검색 등에서 고른 패턴을 현재 곡으로 정합니다. 모드/난이도도 그 패턴에 맞춥니다.
+
+        이미 제시했거나 클리어한 패턴도 고를 수 있습니다.
+        """
+        self.mode = record.mode
+        self.level = record.floor
+        self.current = record
+        self.prefetched = {}
+        self._save_level()
+        counts = self.grid.counts(self.mode, self.level)
+        return Pick('ok', record, counts['shown'], counts['total'] - counts['cleared'])
+
+    def _draw(self, mode, level):
+        """(모드, 난이도)에서 곡을 하나 고른 Pick을 반환합니다. 현재 곡은 바꾸지 않습니다."""
+        counts = self.grid.counts(mode, level)
+        total = counts['total']
+        remaining = total - counts['cleared']
+        # played는 클리어하지 않은 패턴 중 제시된 수라서 remaining을 넘지 않음
+        played = counts['shown']
+
+        if remaining == 0:
+            # 클리어하지 않은 곡이 없음
+            return Pick('all_cleared' if total else 'empty', None, played, remaining)
+
+        sampler = self._sampler(mode, level)
+        if not sampler:
+            return Pick('all_played', None, played, remaining)
+
+        with instrument.stage('pick.random'):
+            record = sampler.draw(self.rng)
+        return Pick('ok', record, played, remaining)
+
+    def _save_level(self):
+        self.progress.set_level(self.mode, self.level)
+
+    def close(self):
+        """남은 진행도 기록을 모두 저장합니다."""
+        self._save_level()
+        self.progress.close()
+        self.history.close()
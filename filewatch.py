@@ -0,0 +1,83 @@
+"""파일이 실제로 바뀌었을 때만 알려 주는 감시기. (PyQt5 필요)
+
+QFileSystemWatcher(리눅스는 inotify)로 파일과 그 폴더를 감시하다가 알림이 오면 잠시 기다리고,
+그동안 더 쓰이지 않았고 (mtime_ns, 크기)가 마지막으로 알린 때와 다를 때만 changed를 보냅니다.
+쓰는 도중에 오는 여러 알림은 하나로 모이고, 임시 파일을 쓰고 바꿔치기하는 저장(os.replace)도
+폴더 알림으로 잡아 감시를 다시 겁니다. 감시를 걸 수 없으면 같은 비교를 주기적으로 합니다.
+"""
+import os
+
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+from progress import file_stamp
+
+DEBOUNCE_MS = 300  # 마지막 알림 뒤 이만큼 조용하면 쓰기가 끝난 것으로 봄
+POLL_MS = 5000  # 감시를 걸 수 없을 때 (mtime_ns, 크기)를 비교하는 간격
+
+
+class FileWatcher(QObject):
+    """paths의 파일들을 감시합니다. 없는 파일도 나중에 생기면 알립니다."""
+
+    changed = pyqtSignal(str)  # 바뀐 파일 경로 (쓰기가 끝난 뒤 한 번)
+
+    def __init__(self, paths, parent=None, debounce_ms=DEBOUNCE_MS, poll_ms=POLL_MS):
+        super().__init__(parent)
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.stamps = {path: file_stamp(path) for path in self.paths}  # 마지막으로 알린 상태
+        self.pending = {}  # 알림이 온 파일 -> 알림을 받았을 때의 상태
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_notify)
+        self.watcher.directoryChanged.connect(self.on_directory)
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(debounce_ms)
+        self.settle_timer.timeout.connect(self.settle)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(poll_ms)
+        self.poll_timer.timeout.connect(self.poll)
+        self.watch()
+
+    def watch(self):
+        """감시가 풀린 파일(지웠다가 다시 만든 파일 등)에 감시를 다시 겁니다. 못 걸면 주기 비교를 켭니다."""
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        ok = True
+        for path in self.paths + sorted({os.path.dirname(path) for path in self.paths}):
+            if path not in watched and os.path.exists(path) and not self.watcher.addPath(path):
+                ok = False
+        if not ok and not self.poll_timer.isActive():
+            print("파일 감시를 사용할 수 없어 주기적으로 변경을 확인합니다.")
+            self.poll_timer.start()
+
+    def on_notify(self, path):
+        path = os.path.abspath(path)
+        if path in self.stamps:
+            self.pending[path] = file_stamp(path)
+            self.settle_timer.start()  # 알림이 올 때마다 다시 기다림
+
+    def on_directory(self, directory):
+        # 폴더 안의 파일이 생기거나 지워지거나 바꿔치기된 경우
+        directory = os.path.abspath(directory)
+        for path in self.paths:
+            if os.path.dirname(path) == directory:
+                self.on_notify(path)
+
+    def poll(self):
+        for path in self.paths:
+            if file_stamp(path) != self.stamps[path]:
+                self.on_notify(path)
+
+    def settle(self):
+        """조용해진 파일 중 실제로 바뀐 것만 알립니다. 아직 쓰는 중이면 더 기다립니다."""
+        pending, self.pending = self.pending, {}
+        for path, stamp in pending.items():
+            current = file_stamp(path)
+            if current != stamp:
+                # 알림 뒤에도 계속 쓰이고 있음 (알림이 빠졌을 수도 있으므로 직접 확인)
+                self.pending[path] = current
+            elif current != self.stamps[path]:
+                self.stamps[path] = current
+                self.changed.emit(path)
+        if self.pending:
+            self.settle_timer.start()
+        self.watch()
@@ -0,0 +1,313 @@
+"""플레이 기록(성공/실패)을 고정 크기 바이너리 레코드로 쌓고 NumPy로 집계합니다.
+
+    python history.py                          # 난이도별 성공률, 연속 기록, 난이도별 시간, 많이 실패한 패턴
+    python history.py --mode 4B --top 20 --json history.json
+    python history.py --profile 철수             # 추천 서버(server.py) 프로필의 기록
+
+성공/실패를 누를 때마다 history.bin 끝에 (시각, 패턴 ID, 모드, 난이도, 결과) 16바이트를 덧붙이기만 합니다.
+집계는 파일을 NumPy memmap으로 열어 열 단위로 계산하므로 플레이 수십만 개도 Python 객체를 만들지 않습니다.
+기록은 NumPy 없이 쓸 수 있고, 집계(load 이후)에만 NumPy가 필요합니다.
+NumPy는 불러오는 데 시간이 걸려서 처음 집계할 때 불러옵니다. (창 시작을 늦추지 않도록)
+"""
+import argparse
+import json
+import os
+import struct
+import threading
+import time
+
+import songdb
+
+np = None  # 처음 집계할 때 load_numpy()가 불러옴
+DTYPE = None  # RECORD와 같은 배치의 NumPy dtype (load_numpy() 이후)
+
+HISTORY_MAGIC = b'UDHIST'
+HISTORY_VERSION = 1
+HEADER = struct.Struct('<6sHHH4x')  # 매직, 버전, 레코드 크기, 모드 수 (16바이트)
+RECORD = struct.Struct('<dIBHB')  # 시각(유닉스 초), 패턴 ID, 모드 번호, 난이도(floor_key), 결과(1 성공/0 실패)
+SESSION_GAP = 15 * 60  # 이 시간보다 오래 쉬었으면 다음 플레이까지의 시간을 난이도별 시간에 넣지 않음 (초)
+FLOOR_SPAN = 256  # 모드 x 난이도 칸 번호를 만들 때의 난이도 폭 (floor_key < 256)
+
+
+class PlayHistory:
+    """플레이 기록 파일에 레코드를 덧붙입니다. 여러 스레드에서 불러도 됩니다.
+
+    modes는 모드 이름 -> 번호 변환에 쓰는 순서로, 파일마다 같은 순서를 써야 합니다. (engine.MODES)
+    """
+
+    def __init__(self, path, modes):
+        self.path = path
+        self.modes = tuple(modes)
+        self._file = None
+        self._lock = threading.Lock()
+
+    def record(self, pid, mode, level, passed, when=None):
+        """플레이 하나를 기록합니다. 저장에 실패해도 진행은 막지 않습니다."""
+        data = RECORD.pack(time.time() if when is None else when, pid, self.modes.index(mode),
+                           songdb.floor_key(level), 1 if passed else 0)
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = self._open()
+                self._file.write(data)
+                self._file.flush()
+            except OSError as e:
+                print(f"플레이 기록 저장 중 오류 발생: {e}")
+
+    def _open(self):
+        """파일을 덧붙이기 모드로 엽니다. 없으면 헤더를 쓰고, 끝에 잘린 레코드가 있으면 잘라 냅니다."""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size and read_header(self.path) is None:
+            # 형식이 다른 파일은 지우지 않고 옆으로 옮겨 둠
+            os.replace(self.path, self.path + '.bad')
+            print(f"플레이 기록 파일 형식이 달라 새로 만듭니다: {self.path}.bad")
+            size = 0
+        f = open(self.path, 'ab')
+        if size == 0:
+            f.write(HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION, RECORD.size, len(self.modes)))
+        elif (size - HEADER.size) % RECORD.size:
+            # 쓰는 도중 종료된 경우 마지막 레코드 조각을 버림
+            f.truncate(size - (size - HEADER.size) % RECORD.size)
+        return f
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_header(path):
+    """헤더의 (버전, 레코드 크기, 모드 수). 이 형식의 파일이 아니면 None."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, version, record_size, mode_count = HEADER.unpack(data)
+    if magic != HISTORY_MAGIC or version != HISTORY_VERSION or record_size != RECORD.size:
+        return None
+    return version, record_size, mode_count
+
+
+def load_numpy():
+    """NumPy를 불러와 반환합니다. 없으면 None. (기록은 NumPy 없이도 동작)"""
+    global np, DTYPE
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        # RECORD와 같은 배치 (정렬 없이 16바이트)
+        DTYPE = numpy.dtype([('time', '<f8'), ('pid', '<u4'), ('mode', 'u1'), ('floor', '<u2'), ('result', 'u1')])
+        np = numpy
+    return np
+
+
+def _require_numpy():
+    if load_numpy() is None:
+        raise RuntimeError("플레이 기록 집계에는 NumPy가 필요합니다 (pip install numpy)")
+
+
+def load(path):
+    """기록 파일을 읽기 전용 구조화 배열(memmap)로 엽니다. 파일이 없거나 비었으면 빈 배열."""
+    _require_numpy()
+    if read_header(path) is None:
+        return np.zeros(0, dtype=DTYPE)
+    count = (os.path.getsize(path) - HEADER.size) // RECORD.size  # 쓰는 중인 마지막 조각은 제외
+    if count <= 0:
+        return np.zeros(0, dtype=DTYPE)
+    return np.memmap(path, dtype=DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+
+
+def failure_counts(path):
+    """기록 파일의 패턴 ID -> 실패 횟수. ('failures' 추출 가중치용, NumPy가 없어도 동작)"""
+    if read_header(path) is None:
+        return {}
+    if load_numpy() is not None:
+        plays = load(path)
+        pids, counts = np.unique(plays['pid'][plays['result'] == 0], return_counts=True)
+        return dict(zip(pids.tolist(), counts.tolist()))
+    with open(path, 'rb') as f:
+        f.seek(HEADER.size)
+        data = f.read()
+    counts = {}
+    for _, pid, _, _, result in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+        if not result:
+            counts[pid] = counts.get(pid, 0) + 1
+    return counts
+
+
+def select(plays, mode_index=None, since=None):
+    """모드 번호/시작 시각으로 거른 기록. 조건이 없으면 그대로 반환합니다."""
+    mask = None
+    if mode_index is not None:
+        mask = plays['mode'] == mode_index
+    if since is not None:
+        after = plays['time'] >= since
+        mask = after if mask is None else mask & after
+    return plays if mask is None else plays[mask]
+
+
+def _cells(plays):
+    return plays['mode'].astype(np.int64) * FLOOR_SPAN + plays['floor']
+
+
+def pass_rates(plays, modes):
+    """(모드, 난이도)별 플레이 수/성공 수/성공률. 플레이한 칸만 모드, 난이도 순으로."""
+    _require_numpy()
+    size = len(modes) * FLOOR_SPAN
+    cells = _cells(plays)
+    total = np.bincount(cells, minlength=size)
+    passed = np.bincount(cells, weights=plays['result'], minlength=size)
+    return [
+        {
+            'mode': modes[cell // FLOOR_SPAN],
+            'level': cell % FLOOR_SPAN / 10,
+            'plays': int(total[cell]),
+            'passes': int(passed[cell]),
+            'rate': float(passed[cell] / total[cell]),
+        }
+        for cell in np.flatnonzero(total)
+    ]
+
+
+def time_per_level(plays, modes, gap=SESSION_GAP):
+    """(모드, 난이도)별로 머문 시간(초). 플레이마다 앞 플레이부터 걸린 시간을 그 플레이의 칸에 더합니다.
+
+    gap보다 오래 쉬었으면 새로 시작한 것으로 보고 더하지 않습니다.
+    """
+    _require_numpy()
+    size = len(modes) * FLOOR_SPAN
+    if len(plays) < 2:
+        return []
+    spent = np.diff(plays['time'])
+    spent[(spent < 0) | (spent > gap)] = 0
+    seconds = np.bincount(_cells(plays)[1:], weights=spent, minlength=size)
+    return [
+        {'mode': modes[cell // FLOOR_SPAN], 'level': cell % FLOOR_SPAN / 10, 'seconds': float(seconds[cell])}
+        for cell in np.flatnonzero(seconds)
+    ]
+
+
+def streaks(plays):
+    """가장 긴 연속 성공/실패와 지금 이어지는 연속 기록."""
+    _require_numpy()
+    result = np.asarray(plays['result'])
+    if not len(result):
+        return {'longest_pass': 0, 'longest_fail': 0, 'current': None, 'current_length': 0}
+    # 결과가 바뀌는 위치로 같은 결과가 이어지는 구간을 나눔
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(result)) + 1))
+    lengths = np.diff(np.concatenate((starts, [len(result)])))
+    values = result[starts]
+    passes, fails = lengths[values == 1], lengths[values == 0]
+    return {
+        'longest_pass': int(passes.max()) if len(passes) else 0,
+        'longest_fail': int(fails.max()) if len(fails) else 0,
+        'current': 'pass' if values[-1] else 'fail',
+        'current_length': int(lengths[-1]),
+    }
+
+
+def most_failed(plays, top=10):
+    """실패가 많은 패턴 ID 순으로 [(패턴 ID, 실패 수, 플레이 수)]."""
+    _require_numpy()
+    if not len(plays) or top <= 0:
+        return []
+    pids = plays['pid']
+    plays_per_pid = np.bincount(pids)
+    fails = np.bincount(pids[plays['result'] == 0], minlength=len(plays_per_pid))
+    candidates = np.flatnonzero(fails)
+    if len(candidates) > top:
+        candidates = candidates[np.argpartition(-fails[candidates], top - 1)[:top]]
+    order = candidates[np.lexsort((candidates, -fails[candidates]))]
+    return [(int(pid), int(fails[pid]), int(plays_per_pid[pid])) for pid in order]
+
+
+def report(plays, modes, top=10):
+    """CLI/JSON용 전체 집계."""
+    _require_numpy()
+    summary = {'plays': int(len(plays)), 'passes': int(plays['result'].sum()) if len(plays) else 0}
+    if len(plays):
+        summary['first'] = float(plays['time'][0])
+        summary['last'] = float(plays['time'][-1])
+    return {
+        'summary': summary,
+        'pass_rates': pass_rates(plays, modes),
+        'time_per_level': time_per_level(plays, modes),
+        'streaks': streaks(plays),
+        'most_failed': most_failed(plays, top),
+    }
+
+
+def print_report(result, keys=None):
+    """report() 결과를 표로 출력합니다. keys는 패턴 ID -> (곡 이름, 모드, 패턴)."""
+    summary = result['summary']
+    if not summary['plays']:
+        print("플레이 기록이 없습니다.")
+        return
+    first = time.strftime('%Y-%m-%d %H:%M', time.localtime(summary['first']))
+    last = time.strftime('%Y-%m-%d %H:%M', time.localtime(summary['last']))
+    print(f"플레이 {summary['plays']:,}회, 성공 {summary['passes']:,}회 ({summary['passes'] / summary['plays']:.1%}), {first} ~ {last}")
+
+    s = result['streaks']
+    current = {'pass': '성공', 'fail': '실패'}.get(s['current'], '-')
+    print(f"최장 연속 성공 {s['longest_pass']}회, 최장 연속 실패 {s['longest_fail']}회, 지금 {current} {s['current_length']}회째")
+
+    seconds = {(row['mode'], row['level']): row['seconds'] for row in result['time_per_level']}
+    print(f"\n{'모드':>4}{'난이도':>7}{'플레이':>7}{'성공률':>8}{'시간(분)':>9}")
+    for row in result['pass_rates']:
+        minutes = seconds.get((row['mode'], row['level']), 0) / 60
+        print(f"{row['mode']:>6}{row['level']:>10.1f}{row['plays']:>10}{row['rate']:>10.1%}{minutes:>11.1f}")
+
+    if result['most_failed']:
+        print("\n많이 실패한 패턴")
+        for pid, fails, plays in result['most_failed']:
+            name = ' '.join(keys[pid]) if keys is not None and pid < len(keys) else f'#{pid}'
+            print(f"  {fails:>5}/{plays:<5} {name}")
+
+
+def main():
+    import engine
+    from progress import read_ids
+
+    parser = argparse.ArgumentParser(description='플레이 기록 집계')
+    parser.add_argument('--data-dir', default=os.path.dirname(os.path.abspath(__file__)), help='history.bin과 진행도 파일이 있는 폴더')
+    parser.add_argument('--profile', help='추천 서버 프로필 이름 (data-dir/profiles/<이름>/history.bin)')
+    parser.add_argument('--mode', choices=engine.MODES, help='이 모드만 집계')
+    parser.add_argument('--days', type=float, help='최근 며칠만 집계')
+    parser.add_argument('--top', type=int, default=10, help='많이 실패한 패턴을 몇 개 보여줄지')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일')
+    args = parser.parse_args()
+
+    # 패턴 ID -> 이름은 기록을 쓴 진행도 저장소의 ID 표에서 찾음
+    if args.profile:
+        ids_dir = os.path.join(args.data_dir, 'profiles')
+        history_path = os.path.join(ids_dir, args.profile, 'history.bin')
+    else:
+        ids_dir = args.data_dir
+        history_path = os.path.join(args.data_dir, 'history.bin')
+
+    plays = load(history_path)
+    mode_index = engine.MODES.index(args.mode) if args.mode else None
+    since = time.time() - args.days * 86400 if args.days else None
+    result = report(select(plays, mode_index, since), engine.MODES, args.top)
+
+    # 진행도 파일은 읽기만 함 (실행 중인 창/서버와 같은 폴더여도 압축/이전하지 않음)
+    keys = read_ids(ids_dir)
+    print_report(result, keys)
+    for i, (pid, fails, count) in enumerate(result['most_failed']):
+        name, mode, pattern = keys[pid] if pid < len(keys) else (None, None, None)
+        result['most_failed'][i] = {'pid': pid, 'name': name, 'mode': mode, 'pattern': pattern,
+                                    'fails': fails, 'plays': count}
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""단계별 시간 측정, 카운터, 선택적 프로파일링. (PyQt5 없이 사용 가능)
+
+    with instrument.stage('load_songs.json_parse'):
+        ...
+    instrument.count('bytes_downloaded', len(body))
+
+환경 변수로 켭니다.
+    UPDOWN_STATS=stats.json (또는 .csv)  종료할 때 단계별 시간/카운터를 저장
+    UPDOWN_PROFILE=prefix                cProfile(prefix.prof)과 tracemalloc(prefix_memory.txt) 결과 저장
+"""
+import contextlib
+import csv
+import functools
+import json
+import os
+import threading
+import time
+
+MAX_SAMPLES = 1000  # 단계별로 백분위수 계산에 남겨 두는 최근 측정값 수
+
+
+class Stats:
+    """단계별 소요 시간과 카운터를 모읍니다. 여러 스레드에서 함께 써도 됩니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}  # 단계 이름 -> {'count', 'total', 'min', 'max', 'samples'}
+        self.counters = {}  # 카운터 이름 -> 값
+
+    def record(self, name, elapsed):
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                timing = self.timings[name] = {'count': 0, 'total': 0.0, 'min': elapsed, 'max': elapsed, 'samples': []}
+            timing['count'] += 1
+            timing['total'] += elapsed
+            timing['min'] = min(timing['min'], elapsed)
+            timing['max'] = max(timing['max'], elapsed)
+            samples = timing['samples']
+            if len(samples) >= MAX_SAMPLES:
+                samples.pop(0)
+            samples.append(elapsed)
+
+    def add(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self.timings = {}
+            self.counters = {}
+
+    def summary(self):
+        """단계별 통계(ms)와 카운터를 dict로 반환합니다."""
+        with self._lock:
+            stages = {}
+            for name, timing in self.timings.items():
+                samples = sorted(timing['samples'])
+                stages[name] = {
+                    'count': timing['count'],
+                    'total_ms': timing['total'] * 1000,
+                    'mean_ms': timing['total'] / timing['count'] * 1000,
+                    'min_ms': timing['min'] * 1000,
+                    'p50_ms': samples[len(samples) // 2] * 1000,
+                    'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+                    'max_ms': timing['max'] * 1000,
+                }
+            return {'stages': stages, 'counters': dict(self.counters)}
+
+
+STATS = Stats()
+_profiler = None
+_profile_prefix = None
+
+
+@contextlib.contextmanager
+def stage(name):
+    """with 블록의 소요 시간을 name 단계로 기록합니다."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STATS.record(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """함수 전체를 name 단계로 기록하는 데코레이터."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name, elapsed):
+    """직접 잰 시간(초)을 name 단계로 기록합니다. (with로 감쌀 수 없는 구간, 예: 창 시작 시간)"""
+    STATS.record(name, elapsed)
+
+
+def count(name, n=1):
+    """카운터를 n만큼 올립니다. (캐시 적중/실패, 내려받거나 쓴 바이트 수 등)"""
+    STATS.add(name, n)
+
+
+def start_profiling(prefix):
+    """cProfile과 tracemalloc 수집을 시작합니다. stop_profiling()에서 prefix로 저장합니다."""
+    global _profiler, _profile_prefix
+    import cProfile
+    import tracemalloc
+
+    _profile_prefix = prefix
+    tracemalloc.start()
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+
+
+def stop_profiling():
+    """수집한 프로파일을 prefix.prof, 메모리 상위 할당을 prefix_memory.txt로 저장합니다."""
+    global _profiler
+    if _profiler is None:
+        return
+    import tracemalloc
+
+    _profiler.disable()
+    _profiler.dump_stats(_profile_prefix + '.prof')
+    _profiler = None
+
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics('lineno')[:30]
+    tracemalloc.stop()
+    with open(_profile_prefix + '_memory.txt', 'w', encoding='utf-8') as f:
+        f.write(f"current: {current / 1024:.1f} KB, peak: {peak / 1024:.1f} KB\n\n")
+        for stat in top:
+            f.write(f"{stat}\n")
+    print(f"프로파일 저장: {_profile_prefix}.prof, {_profile_prefix}_memory.txt")
+
+
+def export(path):
+    """단계별 통계와 카운터를 JSON 또는 CSV(확장자로 구분) 파일로 저장합니다."""
+    summary = STATS.summary()
+    if path.lower().endswith('.csv'):
+        fields = ['count', 'total_ms', 'mean_ms', 'min_ms', 'p50_ms', 'p95_ms', 'max_ms']
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['kind', 'name'] + fields)
+            for name, row in sorted(summary['stages'].items()):
+                writer.writerow(['stage', name] + [row[field] for field in fields])
+            for name, value in sorted(summary['counters'].items()):
+                writer.writerow(['counter', name, value])
+    else:
+        summary['exported_at'] = time.time()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"측정 결과 저장: {path}")
+
+
+def configure_from_env():
+    """UPDOWN_PROFILE이 있으면 프로파일링을 시작합니다."""
+    prefix = os.environ.get('UPDOWN_PROFILE')
+    if prefix:
+        start_profiling(prefix)
+
+
+def finish_from_env():
+    """UPDOWN_PROFILE/UPDOWN_STATS가 있으면 결과를 저장합니다."""
+    stop_profiling()
+    path = os.environ.get('UPDOWN_STATS')
+    if path:
+        export(path)
@@ -0,0 +1,198 @@
+"""(모드, 난이도)별 패턴 수/클리어 수/제시 수를 배열로 모아 두는 진행도 집계표. (PyQt5 없이 사용 가능)
+
+    python levelgrid.py                  # 모든 모드/난이도의 진행도 표 출력
+    python levelgrid.py --mode 4B --json grid.json
+
+곡 색인과 진행도를 한 번만 훑어 칸마다 숫자를 세고, 이후에는 성공/실패/클리어 때
+바뀐 패턴의 칸만 고칩니다. 전체 표를 다시 그릴 때도 배열을 읽기만 하면 됩니다.
+"""
+import argparse
+import bisect
+import json
+import os
+from array import array
+
+import instrument
+import songdb
+
+
+class LevelGrid:
+    """모드 x 난이도 칸마다 total(패턴 수), cleared(클리어), shown(클리어하지 않고 제시됨)을 세는 표.
+
+    칸 번호는 모드 순서 * 난이도 수 + 난이도 순서이고, 값은 array('i')에 칸 번호 순으로 들어 있습니다.
+    remaining(아직 제시되지 않은 후보 수)은 total - cleared - shown입니다.
+    levels에 없는 난이도의 패턴은 세지 않습니다.
+    levels는 낮은 난이도부터의 순서이고, 모드마다 remaining이 남은 난이도 순서를 정렬해 두어
+    nearest()가 이분 탐색으로 찾습니다. (성공/실패 후 후보가 남은 가장 가까운 난이도로 이동)
+    """
+
+    def __init__(self, modes, levels, level_key):
+        self.modes = tuple(modes)
+        self.levels = tuple(levels)  # 낮은 난이도부터
+        self.floors = [songdb.floor_key(level) for level in self.levels]  # 난이도 순서 -> floor_key (오름차순)
+        self.cells = {}  # (모드, floor_key) -> 칸 번호
+        self.keys = []  # 칸 번호 -> 진행도 난이도 키 ("4B_8.1")
+        for mode in self.modes:
+            for level in self.levels:
+                self.cells[(mode, songdb.floor_key(level))] = len(self.keys)
+                self.keys.append(level_key(mode, level))
+        size = len(self.keys)
+        self.total = array('i', bytes(4 * size))
+        self.cleared = array('i', bytes(4 * size))
+        self.shown = array('i', bytes(4 * size))
+        self.playable = [[] for _ in self.modes]  # 모드 순서 -> remaining이 남은 난이도 순서 (오름차순)
+        self.version = 0  # 숫자가 바뀔 때마다 올라감 (화면이 다시 그릴지 판단하는 데 사용)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def cell(self, mode, level):
+        """(모드, 난이도)의 칸 번호. 표에 없는 난이도면 None."""
+        return self.cells.get((mode, songdb.floor_key(level)))
+
+    def rebuild(self, index, progress):
+        """색인과 진행도를 한 번 훑어 모든 칸을 다시 셉니다. (색인 교체, 진행도/클리어 초기화 시)"""
+        size = len(self.keys)
+        self.total = array('i', bytes(4 * size))
+        self.cleared = array('i', bytes(4 * size))
+        self.shown = array('i', bytes(4 * size))
+        if index is not None:
+            with instrument.stage('grid.rebuild'):
+                self._count_cells(index.cells(), progress, 1)
+        self.playable = [[] for _ in self.modes]
+        self._update_playable(range(size))
+        self.version += 1
+
+    def add(self, records, progress):
+        """records(같은 패턴 ID의 패턴들)를 지금 진행도 상태로 셉니다."""
+        self._count(records, progress, 1)
+        self.version += 1
+
+    def remove(self, records, progress):
+        """add()로 센 records를 지금 진행도 상태로 뺍니다.
+
+        진행도를 바꿀 때는 바꾸기 전에 remove(), 바꾼 뒤에 add()를 부르면 바뀐 칸만 고쳐집니다.
+        """
+        self._count(records, progress, -1)
+        self.version += 1
+
+    def _count(self, records, progress, sign):
+        rows = [(record.pid, record.mode, record.floor_key) for record in records]
+        self._count_cells(rows, progress, sign)
+        self._update_playable({self.cells.get((mode, floor)) for _, mode, floor in rows} - {None})
+
+    def _update_playable(self, cells):
+        """cells의 remaining이 남았는지에 맞춰 모드별 난이도 목록을 고칩니다."""
+        for cell in cells:
+            mode_index, level_index = divmod(cell, len(self.levels))
+            playable = self.playable[mode_index]
+            i = bisect.bisect_left(playable, level_index)
+            listed = i < len(playable) and playable[i] == level_index
+            if self.total[cell] - self.cleared[cell] - self.shown[cell] > 0:
+                if not listed:
+                    playable.insert(i, level_index)
+            elif listed:
+                del playable[i]
+
+    def _count_cells(self, rows, progress, sign):
+        """(패턴 ID, 모드, floor_key) 행들을 셉니다."""
+        cells, keys, total, cleared, shown = self.cells, self.keys, self.total, self.cleared, self.shown
+        progress_cleared, progress_shown = progress.cleared, progress.shown
+        for pid, mode, floor in rows:
+            cell = cells.get((mode, floor))
+            if cell is None:
+                continue
+            total[cell] += sign
+            if pid in progress_cleared:
+                cleared[cell] += sign
+            elif pid in progress_shown.get(keys[cell], ()):
+                shown[cell] += sign
+
+    def counts(self, mode, level):
+        """(모드, 난이도)의 {'total', 'cleared', 'shown', 'remaining'}. 표에 없는 난이도면 모두 0."""
+        cell = self.cell(mode, level)
+        if cell is None:
+            return {'total': 0, 'cleared': 0, 'shown': 0, 'remaining': 0}
+        return self.cell_counts(cell)
+
+    def cell_counts(self, cell):
+        """칸 번호의 {'total', 'cleared', 'shown', 'remaining'}."""
+        total, cleared, shown = self.total[cell], self.cleared[cell], self.shown[cell]
+        return {'total': total, 'cleared': cleared, 'shown': shown, 'remaining': total - cleared - shown}
+
+    def nearest(self, mode, level, direction):
+        """level보다 위(direction > 0) 또는 아래에서 remaining이 남은 가장 가까운 난이도. 없으면 None."""
+        if mode not in self.modes:
+            return None
+        playable = self.playable[self.modes.index(mode)]
+        key = songdb.floor_key(level)
+        if direction > 0:
+            # key보다 높은 첫 난이도 순서 이상에서 가장 작은 것
+            i = bisect.bisect_left(playable, bisect.bisect_right(self.floors, key))
+            return self.levels[playable[i]] if i < len(playable) else None
+        # key보다 낮은 난이도 순서 중 가장 큰 것
+        i = bisect.bisect_left(playable, bisect.bisect_left(self.floors, key)) - 1
+        return self.levels[playable[i]] if i >= 0 else None
+
+    def rows(self, mode=None):
+        """(모드, 난이도, counts) 목록. mode를 주면 그 모드만."""
+        result = []
+        for mode_index, m in enumerate(self.modes):
+            if mode is not None and m != mode:
+                continue
+            for level_index, level in enumerate(self.levels):
+                result.append((m, level, self.cell_counts(mode_index * len(self.levels) + level_index)))
+        return result
+
+
+def print_grid(grid, mode=None):
+    """패턴이 있는 칸만 모드별 표로 출력합니다."""
+    for m in grid.modes:
+        if mode is not None and m != mode:
+            continue
+        rows = [(level, c) for _, level, c in grid.rows(m) if c['total']]
+        total = sum(c['total'] for _, c in rows)
+        cleared = sum(c['cleared'] for _, c in rows)
+        shown = sum(c['shown'] for _, c in rows)
+        print(f"\n== {m} (패턴 {total}, 클리어 {cleared}, 제시됨 {shown}, 남음 {total - cleared - shown}) ==")
+        print(f"{'난이도':>6}{'패턴':>7}{'클리어':>7}{'제시됨':>7}{'남음':>7}  진행")
+        for level, c in rows:
+            done = (c['cleared'] + c['shown']) / c['total']
+            bar = '#' * int(round(done * 20))
+            print(f"{level:>8.1f}{c['total']:>8}{c['cleared']:>8}{c['shown']:>8}{c['remaining']:>8}  {bar:<20} {done:.0%}")
+
+
+def main():
+    import engine  # engine이 이 모듈을 쓰므로 실행할 때만 불러옴
+    from progress import ProgressStore
+
+    parser = argparse.ArgumentParser(description='모든 모드/난이도의 진행도 표')
+    parser.add_argument('--data-dir', default=os.path.dirname(os.path.abspath(__file__)), help='songs.json과 진행도 파일이 있는 폴더')
+    parser.add_argument('--mode', choices=engine.MODES, help='이 모드만 출력')
+    parser.add_argument('--json', help='표를 저장할 JSON 파일')
+    args = parser.parse_args()
+
+    # 실행 중인 창/서버와 같은 폴더를 쓰므로 진행도/곡 데이터 캐시는 읽기만 함
+    progress = ProgressStore(args.data_dir, read_only=True)
+    songs_path = os.path.join(args.data_dir, 'songs.json')
+    index = songdb.read_snapshot(os.path.join(args.data_dir, 'songs.cache'), songs_path, progress.ids)
+    if index is None:
+        try:
+            with open(songs_path, 'r', encoding='utf-8') as f:
+                index = songdb.PatternIndex(json.load(f), progress.ids)
+        except Exception as e:
+            print(f"곡 데이터를 로드할 수 없습니다: {e}")
+            return
+
+    grid = LevelGrid(engine.MODES, engine.LEVELS, engine.level_key)
+    grid.rebuild(index, progress)
+    print_grid(grid, args.mode)
+    if args.json:
+        rows = [dict(mode=m, level=level, **c) for m, level, c in grid.rows(args.mode)]
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
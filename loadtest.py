@@ -0,0 +1,176 @@
+"""추천 서버(server.py)에 여러 프로필이 동시에 요청할 때의 처리량과 지연 시간을 측정합니다.
+
+    python loadtest.py                                   # 합성 데이터로 서버를 띄워 1, 8, 32, 128 세션 측정
+    python loadtest.py --patterns 100000 --sessions 16 64 --duration 10
+    python loadtest.py --url http://127.0.0.1:8765       # 이미 떠 있는 서버 측정
+
+세션(스레드)마다 프로필 하나로 start 후 success/fail(가끔 clear)을 반복합니다.
+프로필을 처음 여는 start는 측정 시간에 넣지 않습니다.
+서버는 따로 띄운 프로세스에서 돌리므로 측정하는 쪽의 GIL과 섞이지 않습니다.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+import bench
+
+DEFAULT_SESSIONS = (1, 8, 32, 128)
+
+
+def request(host, port, method, path, body=None):
+    """JSON 요청을 보내고 (상태 코드, 응답 JSON)을 반환합니다."""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if data else {}
+        conn.request(method, path, body=data, headers=headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read().decode('utf-8'))
+    finally:
+        conn.close()
+
+
+def run_session(host, port, name, ready, window, latencies, errors, seed):
+    """프로필 하나로 start를 보낸 뒤, 모든 세션이 준비되면 측정 시간 동안 요청을 반복합니다."""
+    rng = random.Random(seed)
+    path = f'/profiles/{name}'
+    # 프로필을 처음 여는 비용(진행도 불러오기)은 측정에서 뺌
+    try:
+        request(host, port, 'POST', f'{path}/start', {'level': 8.1})
+    except (OSError, http.client.HTTPException, ValueError):
+        errors.append(None)
+    ready.wait()
+    while time.perf_counter() < window['deadline']:
+        if rng.random() < 0.1:
+            action, body = 'clear', {'cleared': True}
+        else:
+            action, body = ('success' if rng.random() < 0.5 else 'fail'), None
+        start = time.perf_counter()
+        try:
+            status, _ = request(host, port, 'POST', f'{path}/{action}', body)
+        except (OSError, http.client.HTTPException, ValueError):
+            status = None
+        latencies.append((time.perf_counter() - start) * 1000)
+        if status != 200:
+            errors.append(status)
+
+
+def measure(host, port, sessions, duration, prefix):
+    latencies = []  # list.append는 스레드 사이에서 안전
+    errors = []
+    window = {}
+
+    def begin():
+        window['started'] = time.perf_counter()
+        window['deadline'] = window['started'] + duration
+
+    ready = threading.Barrier(sessions, action=begin)
+    threads = [
+        threading.Thread(target=run_session, args=(host, port, f'{prefix}{i}', ready, window, latencies, errors, i))
+        for i in range(sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - window['started']
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))] if latencies else 0.0
+
+    return {
+        'sessions': sessions,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'mean_ms': statistics.fmean(latencies) if latencies else 0.0,
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': latencies[-1] if latencies else 0.0,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(data_dir, workers):
+    """합성 데이터 폴더로 서버 프로세스를 띄우고 응답할 때까지 기다립니다."""
+    port = free_port()
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+    process = subprocess.Popen(
+        [sys.executable, script, '--port', str(port), '--data-dir', data_dir, '--workers', str(workers)],
+        stdout=subprocess.DEVNULL)
+    for _ in range(600):
+        if process.poll() is not None:
+            raise RuntimeError("서버가 시작하지 못했습니다")
+        try:
+            request('127.0.0.1', port, 'GET', '/status')
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("서버가 응답하지 않습니다")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='추천 서버 부하 테스트')
+    parser.add_argument('--url', help='측정할 서버 주소 (없으면 합성 데이터로 직접 띄움)')
+    parser.add_argument('--sessions', type=int, nargs='+', default=list(DEFAULT_SESSIONS), help='동시에 요청하는 프로필 수')
+    parser.add_argument('--duration', type=float, default=5.0, help='세션 수마다 측정할 시간 (초)')
+    parser.add_argument('--patterns', type=int, default=10000, help='합성 데이터의 패턴 수')
+    parser.add_argument('--workers', type=int, default=32, help='직접 띄운 서버의 작업 스레드 수')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일')
+    args = parser.parse_args()
+
+    process = data_dir = None
+    if args.url:
+        url = urllib.parse.urlparse(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        data_dir = tempfile.mkdtemp(prefix='updown-load-')
+        bench.write_dataset(data_dir, args.patterns, 0.0, 0.0)
+        process, port = start_server(data_dir, args.workers)
+        host = '127.0.0.1'
+
+    report = {'python': sys.version.split()[0], 'duration': args.duration, 'results': []}
+    try:
+        print(f"{'세션':>6}{'요청':>10}{'오류':>8}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        for sessions in args.sessions:
+            # 세션 수마다 다른 프로필을 써서 이전 측정의 진행도가 섞이지 않도록
+            r = measure(host, port, sessions, args.duration, prefix=f'load{sessions}_')
+            report['results'].append(r)
+            print(f"{sessions:>6}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.0f}"
+                  f"{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}")
+        report['status'] = request(host, port, 'GET', '/status')[1]
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        if data_dir is not None:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
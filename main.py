@@ -1,35 +1,139 @@
 try:
+    import time
+    STARTED = time.perf_counter()  # 시작 시간 측정 기준 (모듈을 불러오기 전)
     import sys
     import os
-    from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox, QRadioButton, QComboBox, QScrollArea, QApplication, QMessageBox
-    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox, QRadioButton, QComboBox, QScrollArea, QApplication, QMessageBox, QLineEdit, QListView, QTableView, QTabWidget, QHeaderView
+    from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
+    import threading
     import json
-    import random
-    import time
-    import urllib.request
-    import urllib.error
+    # engine이 곡 데이터/진행도 모듈(songdb, search, history)을 함께 불러오므로 여기서도 바로 불러옴
+    # 무거운 urllib.request(http/email/ssl)와 NumPy만 처음 쓸 때 불러옴 (songdb.download_songs, history.load_numpy)
+    import engine
+    import songdb
+    import candidates
+    import dashboard
+    import filewatch
+    import instrument
 except ImportError as e:
     print(f"필요한 모듈을 찾을 수 없습니다: {e}")
     sys.exit(1)
 
+
+class SessionLoader(QObject):
+    """진행도와 곡 데이터를 GUI 스레드 밖에서 불러와 세션을 만듭니다. (창을 먼저 그린 뒤 시작)"""
+    finished = pyqtSignal(object, str)  # (세션 또는 실패하면 None, 오류 메시지)
+
+    def __init__(self, data_dir, parent=None):
+        super().__init__(parent)
+        self.data_dir = data_dir
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def isRunning(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        try:
+            with instrument.stage('startup.load'):
+                session = engine.UpDownSession(self.data_dir)
+                # 로컬 곡 데이터가 없으면 None (시작 버튼을 누를 때 다운로드)
+                session.load_songs()
+            self.finished.emit(session, '')
+        except Exception as e:
+            print(f"진행도/곡 데이터 로드 중 오류 발생: {e}")
+            self.finished.emit(None, str(e))
+
+
+class SongsUpdateWorker(QObject):
+    """곡 데이터 다운로드/필터링/저장을 GUI 스레드 밖에서 수행합니다."""
+    status = pyqtSignal(str)  # 진행 상태 메시지
+    finished = pyqtSignal(bool, object, object)  # (성공 여부, 새 패턴 색인 또는 변경 없음이면 None, 이전 색인과의 차이)
+
+    def __init__(self, session, parent=None):
+        super().__init__(parent)
+        self.url = session.songs_url
+        self.songs_path = session.songs_path
+        self.meta_path = session.meta_path
+        self.snapshot_path = session.snapshot_path
+        self.ids = session.progress.ids  # 새 곡에도 진행도와 같은 패턴 ID를 붙임
+        self.session = session  # 이전 색인과의 차이 계산용 (색인은 바뀌지 않으므로 참조만 읽음)
+        self._thread = None
+
+    def start(self):
+        # 데몬 스레드라서 다운로드 중에 창을 닫아도 종료가 막히지 않음
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def isRunning(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        import urllib.error  # 업데이트할 때만 필요 (urllib.request와 함께 songdb에서 처음 불러옴)
+
+        try:
+            print("온라인에서 곡 데이터를 다운로드하는 중...")
+            self.status.emit('곡 데이터 다운로드 중...')
+            # 색인과 스냅샷도 여기서 만들어 두어 다음 실행은 JSON 파싱 없이 시작
+            with instrument.stage('updateSongsData'):
+                index = songdb.update_index(self.url, self.songs_path, self.meta_path, self.snapshot_path, self.ids)
+            if index is None:
+                print("곡 데이터가 변경되지 않았습니다.")
+                self.status.emit('곡 데이터가 최신 상태입니다')
+                self.finished.emit(True, None, None)
+                return
+            # 무엇이 바뀌었는지도 여기서 구해 GUI 스레드에서는 바뀐 패턴만 반영
+            old = self.session.song_index
+            delta = songdb.diff_index(old, index) if old is not None and old.ids_token == index.ids_token else None
+            message = f'곡 데이터 업데이트 완료: {index.song_count}곡'
+            if delta is not None:
+                message += f' ({delta.describe()})'
+            print(message)
+            self.status.emit(message)
+            self.finished.emit(True, index, delta)
+        except urllib.error.URLError as e:
+            print(f"네트워크 오류: {e}")
+            self.status.emit('네트워크 오류로 기존 곡 데이터를 사용합니다')
+            self.finished.emit(False, None, None)
+        except json.JSONDecodeError as e:
+            print(f"JSON 파싱 오류: {e}")
+            self.status.emit('곡 데이터 파싱 오류로 기존 곡 데이터를 사용합니다')
+            self.finished.emit(False, None, None)
+        except Exception as e:
+            print(f"업데이트 중 오류 발생: {e}")
+            self.status.emit('업데이트 오류로 기존 곡 데이터를 사용합니다')
+            self.finished.emit(False, None, None)
+
+
 class DifficultyWindow(QMainWindow):
-    def __init__(self):
+    """업다운 세션(engine.UpDownSession)을 보여주는 창."""
+
+    def __init__(self, data_dir=None):
         super().__init__()
-        self.cleared_songs = self.loadClearedSongs()  # 클리어한 곡들을 불러옴
-        self.shown_songs = self.loadShownSongs()  # 각 난이도별로 이미 표시한 곡들을 저장
-        self.songs_cache = None  # 곡 데이터 캐시
-        self.songs_cache_time = 0  # 캐시 생성 시간
-        self.cache_timeout = 300  # 캐시 유효 시간 (초)
-        self.songs_url = "https://v-archive.net/db/songs.json"  # 온라인 곡 데이터 URL
+        # 곡 데이터/진행도 파일 위치 (기본: 스크립트 폴더)
+        data_dir = data_dir or os.path.dirname(os.path.abspath(__file__))
+        # 창은 저장된 마지막 모드/난이도만 읽어서 바로 그리고, 진행도와 곡 데이터는 백그라운드에서 불러옴
+        self.last_mode, self.last_level = engine.last_position(data_dir)  # 창을 처음 그릴 때만 사용
+        self.session = None  # 선택/진행도 로직 (불러오기가 끝나면 onSessionLoaded에서 설정)
         self.last_update_check = 0  # 마지막 업데이트 확인 시간
         self.update_check_interval = 3600  # 업데이트 확인 간격 (1시간)
-        self.last_settings = self.loadLastSettings()  # 마지막 설정 불러오기
-        self.current_candidates = []  # 현재 추천 후보곡 목록
+        self.update_worker = None  # 백그라운드 곡 데이터 업데이트 작업
+        self.candidate_model = None  # 현재 난이도의 전체 패턴 목록
+        self.dashboard_model = None  # 모든 모드/난이도의 진행도
+        self.search_model = None  # 곡 검색 결과
+        self.file_watcher = None  # songs.json/진행도 파일 변경 감시
+        self.startup_times = {}  # 'first_paint'/'interactive' -> STARTED부터 걸린 시간 (초)
         self.initUI()
+        self.loader = SessionLoader(data_dir, self)
+        self.loader.finished.connect(self.onSessionLoaded)
+        self.loader.start()
         
     def initUI(self):
         self.setWindowTitle('DJMAX RESPECT V 업다운 순회')
-        self.setGeometry(100, 100, 500, 320)  # 높이를 조금 줄임 (버튼 제거로 인해)
+        self.setGeometry(100, 100, 500, 560)  # 아래쪽에 후보 목록 표시
         
         # 중앙 위젯 설정
         central = QWidget()
@@ -42,14 +146,13 @@ class DifficultyWindow(QMainWindow):
         mode_group = QHBoxLayout()
         mode_group.setSpacing(5)  # 라디오 버튼 간 간격
         self.mode_buttons = {}
-        for mode in ['4B', '5B', '6B', '8B']:
+        for mode in engine.MODES:
             btn = QRadioButton(mode)
             self.mode_buttons[mode] = btn
             mode_group.addWidget(btn)
         
-        # 마지막 사용한 모드가 있으면 선택, 없으면 기본값 4B
-        last_mode = self.last_settings.get('last_mode', '4B')
-        self.mode_buttons[last_mode].setChecked(True)
+        # 마지막 사용한 모드 선택 (없으면 기본값 4B)
+        self.mode_buttons[self.last_mode].setChecked(True)
         
         layout.addLayout(mode_group)
         
@@ -61,13 +164,20 @@ class DifficultyWindow(QMainWindow):
         self.updateLevelCombo()
         
         # 현재 선택된 모드의 마지막 난이도 설정
-        current_mode = self.getSelectedMode()
-        last_level = self.last_settings.get(current_mode, 8.1)
+        last_level = self.last_level
         last_level_index = self.level_combo.findText(f"{last_level:.1f}")
         if last_level_index >= 0:
             self.level_combo.setCurrentIndex(last_level_index)
             
         level_layout.addWidget(self.level_combo)
+        
+        # 곡을 고르는 가중치 (engine.WEIGHTINGS)
+        level_layout.addWidget(QLabel('추첨:'))
+        self.weighting_combo = QComboBox()
+        for text, weighting in zip(['균등', '레이팅 높은 곡 우선', '많이 실패한 곡 우선'], engine.WEIGHTINGS):
+            self.weighting_combo.addItem(text, weighting)
+        self.weighting_combo.currentIndexChanged.connect(self.onWeightingChanged)
+        level_layout.addWidget(self.weighting_combo)
         layout.addLayout(level_layout)
         
         # 시작 버튼
@@ -99,6 +209,10 @@ class DifficultyWindow(QMainWindow):
         self.fail_btn.clicked.connect(self.onFail)
         btn_layout.addWidget(self.success_btn)
         btn_layout.addWidget(self.fail_btn)
+        # 끄면 후보가 남은 가장 가까운 난이도로 바로 이동, 켜면 후보가 없어도 한 칸씩 이동
+        self.strict_step_checkbox = QCheckBox('한 칸씩 이동')
+        self.strict_step_checkbox.stateChanged.connect(self.onStrictStepChanged)
+        btn_layout.addWidget(self.strict_step_checkbox)
         layout.addLayout(btn_layout)
         
         # 클리어 체크박스와 초기화 버튼을 같은 줄에 배치
@@ -125,78 +239,206 @@ class DifficultyWindow(QMainWindow):
         scroll.setWidget(scroll_content)
         layout.addWidget(scroll)
         
-        # 버튼 초기 상태
+        # 현재 난이도의 후보 목록 (정렬/검색/상태 필터)
+        candidate_page = QWidget()
+        candidate_layout = QVBoxLayout(candidate_page)
+        candidate_layout.setContentsMargins(0, 5, 0, 0)
+        filter_layout = QHBoxLayout()
+        filter_layout.setSpacing(5)
+        self.candidate_filter = QLineEdit()
+        self.candidate_filter.setPlaceholderText('곡 이름 필터')
+        filter_layout.addWidget(self.candidate_filter)
+        self.candidate_status = QComboBox()
+        for text, status in zip(['전체', '새 곡', '제시됨', '클리어'], candidates.STATUS_FILTERS):
+            self.candidate_status.addItem(text, status)
+        filter_layout.addWidget(self.candidate_status)
+        self.candidate_sort = QComboBox()
+        for text, sort_key in zip(['이름순', '레이팅순', '상태순'], candidates.SORT_KEYS):
+            self.candidate_sort.addItem(text, sort_key)
+        filter_layout.addWidget(self.candidate_sort)
+        candidate_layout.addLayout(filter_layout)
+        
+        self.candidate_view = QListView()
+        self.candidate_view.setUniformItemSizes(True)  # 행 높이를 한 번만 재서 수만 행도 바로 스크롤
+        self.candidate_view.setEditTriggers(QListView.NoEditTriggers)
+        candidate_layout.addWidget(self.candidate_view)
+        
+        # 모든 모드/난이도의 진행도 (칸을 더블클릭하면 그 모드/난이도를 선택)
+        self.dashboard_view = QTableView()
+        self.dashboard_view.setEditTriggers(QTableView.NoEditTriggers)
+        self.dashboard_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.dashboard_view.verticalHeader().setDefaultSectionSize(20)
+        self.dashboard_view.doubleClicked.connect(self.onDashboardDoubleClicked)
+        
+        # 곡 검색 (결과를 더블클릭하거나 Enter를 누르면 그 패턴을 현재 곡으로)
+        search_page = QWidget()
+        search_layout = QVBoxLayout(search_page)
+        search_layout.setContentsMargins(0, 5, 0, 0)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('곡 이름 검색 (한글/영문, 일부만 입력해도 됨)')
+        self.search_edit.textChanged.connect(self.onSearchChanged)
+        search_layout.addWidget(self.search_edit)
+        self.search_view = QListView()
+        self.search_view.setUniformItemSizes(True)
+        self.search_view.setEditTriggers(QListView.NoEditTriggers)
+        self.search_view.activated.connect(self.onSearchActivated)
+        search_layout.addWidget(self.search_view)
+        
+        self.tabs = QTabWidget()
+        self.tabs.addTab(candidate_page, '후보 목록')
+        self.tabs.addTab(self.dashboard_view, '전체 진행도')
+        self.tabs.addTab(search_page, '곡 검색')
+        self.tabs.currentChanged.connect(self.onTabChanged)
+        layout.addWidget(self.tabs, 1)
+        
+        # 버튼 초기 상태 (세션을 쓰는 위젯은 불러오기가 끝날 때까지 비활성)
         self.success_btn.setEnabled(False)
         self.fail_btn.setEnabled(False)
         self.clear_checkbox.setEnabled(False)
-        
-        # 현재 난이도 설정 (선택된 모드의 마지막 사용 난이도)
-        self.current_level = last_level
-        self.current_song = None
-        self.current_pattern = None
+        self.session_widgets = list(self.mode_buttons.values()) + [
+            self.start_btn, self.reset_progress_btn, self.reset_btn, self.strict_step_checkbox,
+            self.weighting_combo, self.tabs]
+        for widget in self.session_widgets:
+            widget.setEnabled(False)
+        self.statusBar().showMessage('진행도와 곡 데이터를 불러오는 중...')
         
         # 모든 UI 요소가 생성된 후에 모드 변경 이벤트 연결
         for mode, btn in self.mode_buttons.items():
             btn.toggled.connect(self.onModeChanged)
         
+    def onSessionLoaded(self, session, error):
+        """백그라운드에서 만든 세션을 붙이고 버튼을 활성화합니다."""
+        if session is None:
+            self.statusBar().showMessage('진행도/곡 데이터를 불러오지 못했습니다')
+            self.song_list.setText(f'오류 발생: {error}')
+            return
+        self.session = session
+        self.candidate_model = candidates.CandidateListModel(session)
+        self.dashboard_model = dashboard.LevelGridModel(session)
+        self.search_model = candidates.SearchResultModel(session)
+        self.candidate_view.setModel(self.candidate_model)
+        self.dashboard_view.setModel(self.dashboard_model)
+        self.search_view.setModel(self.search_model)
+        self.candidate_filter.textChanged.connect(self.candidate_model.set_text_filter)
+        self.candidate_status.currentIndexChanged.connect(
+            lambda i: self.candidate_model.set_status_filter(self.candidate_status.itemData(i)))
+        self.candidate_sort.currentIndexChanged.connect(
+            lambda i: self.candidate_model.set_sort(self.candidate_sort.itemData(i)))
+
+        # 저널까지 읽은 세션의 설정이 먼저 읽은 것과 다르면 세션을 따름
+        if (session.mode, session.level) != (self.last_mode, self.last_level):
+            btn = self.mode_buttons[session.mode]
+            btn.blockSignals(True)
+            btn.setChecked(True)
+            btn.blockSignals(False)
+            level_index = self.level_combo.findText(f"{session.level:.1f}")
+            if level_index >= 0:
+                self.level_combo.setCurrentIndex(level_index)
+            self.level_label.setText(f'현재 난이도: {session.level:.1f}')
+
+        # 밖에서 곡 데이터/진행도 파일을 바꾸면 바뀐 것만 다시 불러옴
+        progress = session.progress
+        self.file_watcher = filewatch.FileWatcher(
+            [session.songs_path, progress.snapshot_path, progress.journal_path], self)
+        self.file_watcher.changed.connect(self.onWatchedFileChanged)
+
+        for widget in self.session_widgets:
+            widget.setEnabled(True)
+        self.statusBar().clearMessage()
+        self.refreshCandidates()
+        self.markStartup('interactive')
+
+    def markStartup(self, stage):
+        """시작 단계('first_paint', 'interactive')까지 걸린 시간을 기록하고, 둘 다 지나면 출력합니다."""
+        if stage in self.startup_times:
+            return
+        elapsed = time.perf_counter() - STARTED
+        self.startup_times[stage] = elapsed
+        instrument.record(f'startup.{stage}', elapsed)
+        if len(self.startup_times) == 2:
+            print(f"시작 시간: 첫 화면 {self.startup_times['first_paint'] * 1000:.0f}ms, "
+                  f"조작 가능 {self.startup_times['interactive'] * 1000:.0f}ms")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if 'first_paint' not in self.startup_times:
+            self.markStartup('first_paint')
+
     def updateSongsData(self):
-        """온라인에서 곡 데이터를 업데이트합니다. (메시지 없음)"""
-        try:
-            # 온라인에서 데이터 다운로드
-            print("온라인에서 곡 데이터를 다운로드하는 중...")
-            with urllib.request.urlopen(self.songs_url, timeout=30) as response:
-                online_data = json.loads(response.read().decode('utf-8'))
-            
-            # 필요한 필드만 필터링
-            filtered_data = []
-            excluded_fields = ["title", "composer", "dlcCode", "dlc", "rating", "level"]
-            
-            for song in online_data:
-                filtered_song = {}
-                for key, value in song.items():
-                    if key not in excluded_fields:
-                        filtered_song[key] = value
-                filtered_data.append(filtered_song)
-            
-            # 로컬 파일에 저장
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            songs_path = os.path.join(script_dir, 'songs.json')
-            
-            with open(songs_path, 'w', encoding='utf-8') as f:
-                json.dump(filtered_data, f, ensure_ascii=False, indent=2)
-            
-            # 캐시 초기화 (새로운 데이터를 사용하도록)
-            self.songs_cache = None
-            self.songs_cache_time = 0
-            
-            print(f"곡 데이터 업데이트 완료: {len(filtered_data)}곡")
-            return True
-            
-        except urllib.error.URLError as e:
-            print(f"네트워크 오류: {e}")
-            return False
-        except json.JSONDecodeError as e:
-            print(f"JSON 파싱 오류: {e}")
+        """온라인 곡 데이터 업데이트를 백그라운드에서 시작합니다. (메시지 없음)
+
+        이미 업데이트 중이면 새로 시작하지 않고 False를 반환합니다.
+        """
+        if self.update_worker is not None and self.update_worker.isRunning():
             return False
+
+        self.update_worker = SongsUpdateWorker(self.session, self)
+        self.update_worker.status.connect(self.onUpdateStatus)
+        self.update_worker.finished.connect(self.onSongsUpdated)
+        self.update_worker.start()
+        return True
+
+    def onUpdateStatus(self, message):
+        self.statusBar().showMessage(message)
+
+    def onSongsUpdated(self, success, index, delta):
+        """백그라운드 업데이트가 끝나면 GUI 스레드에서 곡 데이터를 교체합니다."""
+        if not success:
+            print("온라인 업데이트 실패, 기존 로컬 데이터 사용")
+            return
+        if index is None:
+            # 변경 없음: 캐시를 그대로 유지
+            return
+
+        had_data = self.session.song_index is not None
+        self.session.set_index(index, delta)
+        self.refreshCandidates()
+
+        # 로컬 데이터가 없어서 곡을 못 보여주던 경우에만 바로 다시 표시
+        if not had_data and self.success_btn.isEnabled():
+            self.updateDisplay()
+
+    def onWatchedFileChanged(self, path):
+        """감시하는 파일이 바뀌면 그 데이터만 다시 불러와 화면에 반영합니다."""
+        try:
+            if path == os.path.abspath(self.session.songs_path):
+                # 업데이트 작업이 쓴 파일은 작업이 끝날 때 onSongsUpdated에서 적용
+                if self.update_worker is not None and self.update_worker.isRunning():
+                    return
+                had_data = self.session.song_index is not None
+                if self.session.reload_songs() is None:
+                    return
+                print("songs.json이 바뀌어 곡 데이터를 다시 불러왔습니다.")
+                self.refreshCandidates()
+                if not had_data and self.success_btn.isEnabled():
+                    self.updateDisplay()
+                return
+            # 진행도 파일은 직접 쓴 것이 아닐 때만 다시 불러옴
+            if not self.session.reload_progress():
+                return
+            print("진행도 파일이 바뀌어 다시 불러왔습니다.")
+            self.refreshCandidates()
+            if self.success_btn.isEnabled():
+                stats = self.session.stats()
+                self.progress_label.setText(f"진행도: {stats['played']}/{stats['remaining']}")
         except Exception as e:
-            print(f"업데이트 중 오류 발생: {e}")
-            return False
-            
+            print(f"변경된 파일 다시 불러오기 중 오류 발생: {e}")
+
     def checkForAutoUpdate(self):
         """자동 업데이트 확인 (1시간마다)"""
         current_time = time.time()
         if (current_time - self.last_update_check) > self.update_check_interval:
             self.last_update_check = current_time
             try:
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                songs_path = os.path.join(script_dir, 'songs.json')
+                # 색인을 만든 songs.json의 상태 (파일 감시로 바뀔 때마다 갱신되므로 다시 확인하지 않음)
+                stamp = self.session.songs_stamp
                 
                 # 로컬 파일이 없거나 24시간 이상 오래된 경우 자동 업데이트
-                if not os.path.exists(songs_path):
+                if stamp is None:
                     print("로컬 곡 데이터가 없어 자동 업데이트를 시도합니다.")
                     self.updateSongsData()
                 else:
-                    file_age = current_time - os.path.getmtime(songs_path)
+                    file_age = current_time - stamp[0] / 1e9
                     if file_age > 86400:  # 24시간 = 86400초
                         print("곡 데이터가 24시간 이상 오래되어 자동 업데이트를 시도합니다.")
                         self.updateSongsData()
@@ -206,129 +448,20 @@ class DifficultyWindow(QMainWindow):
     def onModeChanged(self):
         """모드가 변경될 때 해당 모드의 마지막 난이도로 콤보박스를 업데이트합니다."""
         if self.sender().isChecked():  # 선택된 라디오 버튼만 처리
-            current_mode = self.getSelectedMode()
-            last_level = self.last_settings.get(current_mode, 8.1)
+            last_level = self.session.set_mode(self.sender().text())
             
             # 콤보박스를 해당 모드의 마지막 난이도로 설정
             last_level_index = self.level_combo.findText(f"{last_level:.1f}")
             if last_level_index >= 0:
                 self.level_combo.setCurrentIndex(last_level_index)
             
-            # 현재 난이도와 라벨 업데이트
-            self.current_level = last_level
+            # 라벨 업데이트
             self.level_label.setText(f'현재 난이도: {last_level:.1f}')
-            
-            # 설정 저장
-            self.saveLastSettings()
-        
-    def loadClearedSongs(self):
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            cleared_path = os.path.join(script_dir, 'cleared_songs.json')
-            if os.path.exists(cleared_path):
-                with open(cleared_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return {}
-        except Exception:
-            return {}
-            
-    def loadShownSongs(self):
-        """표시된 곡 진행상황을 로드합니다."""
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            shown_path = os.path.join(script_dir, 'shown_songs.json')
-            if os.path.exists(shown_path):
-                with open(shown_path, 'r', encoding='utf-8') as f:
-                    shown_data = json.load(f)
-                    result = {}
-                    for level_key, songs in shown_data.items():
-                        result[level_key] = set(tuple(song) for song in songs)
-                    return result
-            return {}
-        except Exception as e:
-            print(f"표시된 곡 로드 중 오류 발생: {e}")
-            return {}
-    
-    def loadLastSettings(self):
-        """마지막 사용 설정을 불러옵니다."""
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            settings_path = os.path.join(script_dir, 'last_settings.json')
-            if os.path.exists(settings_path):
-                with open(settings_path, 'r', encoding='utf-8') as f:
-                    settings = json.load(f)
-                    # 기존 형식 호환성을 위한 마이그레이션
-                    if 'level' in settings and 'mode' in settings:
-                        # 기존 형식을 새 형식으로 변환
-                        old_mode = settings['mode']
-                        old_level = settings['level']
-                        new_settings = {
-                            'last_mode': old_mode,
-                            old_mode: old_level,
-                            '4B': 8.1, '5B': 8.1, '6B': 8.1, '8B': 8.1
-                        }
-                        new_settings[old_mode] = old_level
-                        return new_settings
-                    return settings
-            # 기본값: 모든 모드를 8.1로 설정
-            return {'last_mode': '4B', '4B': 8.1, '5B': 8.1, '6B': 8.1, '8B': 8.1}
-        except Exception as e:
-            print(f"마지막 설정 로드 중 오류 발생: {e}")
-            return {'last_mode': '4B', '4B': 8.1, '5B': 8.1, '6B': 8.1, '8B': 8.1}
-            
-    def saveLastSettings(self):
-        """현재 설정을 저장합니다."""
-        try:
-            current_mode = self.getSelectedMode()
-            # 현재 모드의 난이도를 업데이트
-            self.last_settings['last_mode'] = current_mode
-            self.last_settings[current_mode] = self.current_level
-            
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            settings_path = os.path.join(script_dir, 'last_settings.json')
-            with open(settings_path, 'w', encoding='utf-8') as f:
-                json.dump(self.last_settings, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"설정 저장 중 오류 발생: {e}")
-            
-    def saveClearedSongs(self):
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            cleared_path = os.path.join(script_dir, 'cleared_songs.json')
-            with open(cleared_path, 'w', encoding='utf-8') as f:
-                json.dump(self.cleared_songs, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"클리어한 곡 저장 중 오류 발생: {e}")
-            
-    def saveShownSongs(self):
-        """표시된 곡 진행상황을 저장합니다."""
-        try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            shown_path = os.path.join(script_dir, 'shown_songs.json')
-
-            # set 타입은 JSON으로 직렬화할 수 없으므로 리스트로 변환
-            shown_data = {}
-            for level_key, songs in self.shown_songs.items():
-                shown_data[level_key] = [list(song) for song in songs]
-
-            with open(shown_path, 'w', encoding='utf-8') as f:
-                json.dump(shown_data, f, ensure_ascii=False, indent=2)
-
-            print(f"진행도 저장 완료: {len(shown_data)}개 난이도")
-
-        except Exception as e:
-            print(f"표시된 곡 저장 중 오류 발생: {e}")
+            self.refreshCandidates()
             
     def onClearCheck(self, state):
-        if self.current_song and self.current_pattern:
-            mode = self.getSelectedMode()
-            song_key = f"{self.current_song}_{mode}_{self.current_pattern}"
-            if state == Qt.Checked:
-                self.cleared_songs[song_key] = True
-            else:
-                if song_key in self.cleared_songs:
-                    del self.cleared_songs[song_key]
-            self.saveClearedSongs()
+        self.session.mark_cleared(state == Qt.Checked)
+        self.refreshCandidates()
 
     def onResetClears(self):
         reply = QMessageBox.question(self, '클리어 초기화', 
@@ -337,51 +470,27 @@ class DifficultyWindow(QMainWindow):
                                    QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.cleared_songs = {}
-            self.saveClearedSongs()
-            if self.current_song and self.current_pattern:
-                mode = self.getSelectedMode()
-                song_key = f"{self.current_song}_{mode}_{self.current_pattern}"
+            self.session.reset_clears()
+            if self.session.current is not None:
                 self.clear_checkbox.setChecked(False)
+            self.refreshCandidates()
             QMessageBox.information(self, '초기화 완료', 
                                   '모든 클리어 기록이 초기화되었습니다.')
 
     def updateLevelCombo(self):
-        levels = [
-            1.1, 1.2, 1.3, 2.1, 2.2, 2.3, 3.1, 3.2, 3.3,
-            4.1, 4.2, 4.3, 5.1, 5.2, 5.3, 6.1, 6.2, 6.3,
-            7.1, 7.2, 7.3, 8.1, 8.2, 8.3, 9.1, 9.2, 9.3,
-            10.1, 10.2, 10.3, 11.1, 11.2, 11.3, 12.1, 12.2, 12.3,
-            13.1, 13.2, 13.3, 14.1, 14.2, 14.3, 15.1, 15.2, 15.3,
-            16.1, 16.2
-        ]
         self.level_combo.clear()
-        for level in levels:
+        for level in engine.LEVELS:
             self.level_combo.addItem(f"{level:.1f}")
             
     def onStart(self):
-        # 시작 버튼을 누를 때 곡 데이터 업데이트
-        self.start_btn.setEnabled(False)
-        self.start_btn.setText('데이터 업데이트 중...')
-        QApplication.processEvents()  # UI 업데이트
-        
-        # 곡 데이터 업데이트 시도
-        update_success = self.updateSongsData()
-        
-        self.start_btn.setEnabled(True)
-        self.start_btn.setText('시작')
-        
-        if not update_success:
-            # 업데이트 실패 시 기존 로컬 데이터 사용
-            print("온라인 업데이트 실패, 기존 로컬 데이터 사용")
-        
-        # 현재 난이도 설정
-        self.current_level = float(self.level_combo.currentText())
-        # 화면 업데이트 (저장된 진행도 유지)
-        self.updateDisplay()
-        self.success_btn.setEnabled(True)
-        self.fail_btn.setEnabled(True)
-        self.saveLastSettings()  # 시작할 때 현재 설정 저장
+        with instrument.stage('onStart'):
+            # 시작 버튼을 누를 때 곡 데이터 업데이트 (백그라운드, 끝나면 데이터만 교체)
+            self.updateSongsData()
+            
+            # 콤보박스의 난이도에서 시작 (저장된 진행도 유지)
+            self.updateDisplay(lambda: self.session.start(float(self.level_combo.currentText())))
+            self.success_btn.setEnabled(True)
+            self.fail_btn.setEnabled(True)
         
     def onResetProgress(self):
         """진행도를 초기화합니다."""
@@ -391,191 +500,145 @@ class DifficultyWindow(QMainWindow):
                                    QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            self.shown_songs = {}  # 모든 난이도의 진행도 초기화
-            self.saveShownSongs()  # 초기화된 진행도 저장
-            self.updateDisplay()
+            self.updateDisplay(self.session.reset_progress)
             QMessageBox.information(self, '초기화 완료', 
                                   '모든 진행도가 초기화되었습니다.')
         
-    def getSelectedMode(self):
-        return next(mode for mode, btn in self.mode_buttons.items() if btn.isChecked())
-        
-    def loadSongsData(self):
-        """캐시된 곡 데이터를 반환하거나, 필요한 경우 파일에서 새로 로드합니다."""
-        current_time = time.time()
-        
-        # 자동 업데이트 확인
+    def updateDisplay(self, action=None):
+        """세션 동작(기본: 현재 난이도에서 곡 고르기)을 실행하고 결과를 화면에 표시합니다."""
+        # 자동 업데이트 확인 (1시간마다, 백그라운드)
         self.checkForAutoUpdate()
         
-        # 캐시가 없거나 만료된 경우
-        if self.songs_cache is None or (current_time - self.songs_cache_time) > self.cache_timeout:
+        with instrument.stage('updateDisplay'):
             try:
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                songs_path = os.path.join(script_dir, 'songs.json')
-                
-                if not os.path.exists(songs_path):
-                    print("로컬 곡 데이터가 없습니다. 시작 버튼을 눌러주세요.")
-                    return None
-                
-                with open(songs_path, 'r', encoding='utf-8') as f:
-                    self.songs_cache = json.load(f)
-                    self.songs_cache_time = current_time
-                    print("곡 데이터를 새로 로드했습니다.")
+                pick = (action or self.session.pick)()
             except Exception as e:
-                print(f"곡 데이터 로드 중 오류 발생: {e}")
-                return None
-                
-        return self.songs_cache
-
-    def updateDisplay(self):
-        self.level_label.setText(f'현재 난이도: {self.current_level:.1f}')
-        
-        songs = self.loadSongsData()
-        if songs is None:
+                self.song_list.setText(f'오류 발생: {str(e)}')
+                return
+            
+            with instrument.stage('display.labels'):
+                self.showPick(pick)
+            
+        if pick.status == 'ok':
+            # 화면을 그린 뒤 다음 성공/실패 곡을 미리 골라 둠 (클릭 시 바로 표시)
+            QTimer.singleShot(0, self.prefetchNext)
+            
+    def prefetchNext(self):
+        try:
+            self.session.prefetch()
+        except Exception as e:
+            print(f"다음 곡 미리 고르기 중 오류 발생: {e}")
+            
+    def showPick(self, pick):
+        """engine.Pick 결과를 라벨/체크박스에 반영합니다."""
+        self.level_label.setText(f'현재 난이도: {self.session.level:.1f}')
+        self.refreshCandidates()
+        if pick.status == 'no_data':
             self.song_list.setText('곡 데이터를 로드할 수 없습니다')
             return
+        
+        # 진행도 라벨 업데이트
+        self.progress_label.setText(f'진행도: {pick.played}/{pick.remaining}')
+        
+        if pick.status == 'ok':
+            record = pick.record
+            # 클리어 체크박스 상태 업데이트
+            self.clear_checkbox.setChecked(self.session.is_cleared(record))
+            self.clear_checkbox.setEnabled(True)
+            # 화면에 선택된 곡 표시
+            self.song_list.setText(f"⭐ {record.name} - {record.label}")
+            return
+        
+        if pick.status == 'all_played':
+            self.song_list.setText('현재 난이도의 모든 곡을 플레이했습니다!')
+        elif pick.status == 'all_cleared':  # 곡이 있지만 모두 클리어한 경우
+            self.song_list.setText('현재 난이도의 모든 곡을 클리어했습니다!')
+        else:  # 해당 난이도에 곡이 없는 경우
+            self.song_list.setText('선택한 난이도의 곡이 없습니다')
+        self.clear_checkbox.setEnabled(False)
             
+    def refreshCandidates(self):
+        """후보 목록/전체 진행도/검색 결과를 세션에 맞추고 현재 곡이 보이도록 스크롤합니다."""
         try:
-            mode = self.getSelectedMode()
-            matching_songs = []
-            total_songs = 0
-            cleared_count = 0
-            level_key = f"{mode}_{self.current_level:.1f}"
-            
-            # 전체 곡 수와 클리어한 곡 수 계산
-            for song in songs:
-                if mode in song['patterns']:
-                    patterns = song['patterns'][mode]
-                    for diff_type, info in patterns.items():
-                        if isinstance(info, dict) and 'floor' in info:
-                            if abs(info['floor'] - self.current_level) < 0.01:
-                                total_songs += 1
-                                song_key = f"{song['name']}_{mode}_{diff_type}"
-                                if song_key in self.cleared_songs:
-                                    cleared_count += 1
-                                else:
-                                    # 클리어하지 않은 곡만 후보에 추가
-                                    matching_songs.append((song['name'], f"{diff_type}({info['floor']:.1f})", diff_type))
+            self.dashboard_model.refresh()
+            self.search_model.repaint()
+            self.candidate_model.refresh()
+            row = self.candidate_model.row_of(self.session.current) if self.session.current is not None else -1
+            if row >= 0:
+                self.candidate_view.scrollTo(self.candidate_model.index(row))
+        except Exception as e:
+            print(f"후보 목록 표시 중 오류 발생: {e}")
             
-            remaining_songs = total_songs - cleared_count  # 남은 곡 수 계산
+    def onTabChanged(self, tab):
+        # 시작 전에 전체 진행도를 열어도 볼 수 있도록 곡 데이터를 불러옴
+        if self.tabs.widget(tab) is self.dashboard_view and self.session.load_songs() is not None:
+            self.refreshCandidates()
             
-            # 진행도 표시 (shown_songs에 기록된 개수)
-            played_count = 0
-            if level_key in self.shown_songs:
-                # 실제 played_count 계산
-                real_played_count = len(self.shown_songs[level_key])
-                
-                # 표시용 played_count 계산 (remaining_songs를 초과하지 않도록)
-                played_count = min(real_played_count, remaining_songs)
+    def onSearchChanged(self, text):
+        try:
+            self.search_model.set_results(self.session.search(text))
+        except Exception as e:
+            print(f"곡 검색 중 오류 발생: {e}")
             
-            # 진행도 라벨 업데이트
-            self.progress_label.setText(f'진행도: {played_count}/{remaining_songs}')
+    def onSearchActivated(self, index):
+        """검색 결과에서 고른 패턴을 현재 곡으로 정하고 그 모드/난이도로 이동합니다."""
+        record = self.search_model.data(index, self.search_model.RecordRole)
+        if record is None:
+            return
+        self.updateDisplay(lambda: self.session.select(record))
+        # 세션의 모드/난이도를 바꾼 뒤라 라디오 버튼을 바꿔도 같은 난이도가 선택됨
+        self.mode_buttons[record.mode].setChecked(True)
+        level_index = self.level_combo.findText(f"{self.session.level:.1f}")
+        if level_index >= 0:
+            self.level_combo.setCurrentIndex(level_index)
+        self.success_btn.setEnabled(True)
+        self.fail_btn.setEnabled(True)
             
-            if matching_songs:
-                # level_key가 없으면 초기화
-                if level_key not in self.shown_songs:
-                    self.shown_songs[level_key] = set()
-                
-                # 아직 보지 않은 곡 필터링
-                unplayed_songs = [song for song in matching_songs if (song[0], song[2]) not in self.shown_songs[level_key]]
-                
-                # 모든 곡을 다 봤을 경우
-                if not unplayed_songs:
-                    self.song_list.setText('현재 난이도의 모든 곡을 플레이했습니다!')
-                    self.clear_checkbox.setEnabled(False)
-                    self.current_song = None
-                    self.current_pattern = None
-                    return
-                
-                # 랜덤하게 곡 선택
-                selected_song = random.choice(unplayed_songs)
-                
-                # 선택된 곡 정보 저장 (아직 shown_songs에는 추가하지 않음)
-                self.current_song = selected_song[0]
-                self.current_pattern = selected_song[2]
-                
-                # 클리어 체크박스 상태 업데이트
-                song_key = f"{self.current_song}_{mode}_{self.current_pattern}"
-                self.clear_checkbox.setChecked(song_key in self.cleared_songs)
-                self.clear_checkbox.setEnabled(True)
-                
-                # 화면에 선택된 곡 표시
-                self.song_list.setText(f"⭐ {selected_song[0]} - {selected_song[1]}")
-                
-            else:
-                if total_songs > 0:  # 곡이 있지만 모두 클리어한 경우
-                    self.song_list.setText('현재 난이도의 모든 곡을 클리어했습니다!')
-                else:  # 해당 난이도에 곡이 없는 경우
-                    self.song_list.setText('선택한 난이도의 곡이 없습니다')
-                self.clear_checkbox.setEnabled(False)
-                self.current_song = None
-                self.current_pattern = None
-                
-        except Exception as e:
-            self.song_list.setText(f'오류 발생: {str(e)}')
+    def onDashboardDoubleClicked(self, index):
+        """전체 진행도에서 고른 모드/난이도를 선택합니다. (시작을 누르면 그 난이도에서 시작)"""
+        mode, level = self.dashboard_model.position(index)
+        self.mode_buttons[mode].setChecked(True)
+        level_index = self.level_combo.findText(f"{level:.1f}")
+        if level_index >= 0:
+            self.level_combo.setCurrentIndex(level_index)
             
     def onSuccess(self):
-        # 현재 곡이 있으면 항상 진행도에 추가 (중복 체크 없음)
-        if self.current_song and self.current_pattern:
-            level_key = f"{self.getSelectedMode()}_{self.current_level:.1f}"
-            if level_key not in self.shown_songs:
-                self.shown_songs[level_key] = set()
-                
-            # 항상 shown_songs에 추가 (중복 가능)
-            self.shown_songs[level_key].add((self.current_song, self.current_pattern))
-            self.saveShownSongs()  # 진행도 저장
-        
-        # 난이도 상승
-        levels = [float(self.level_combo.itemText(i)) for i in range(self.level_combo.count())]
-        next_level = None
-        for level in levels:
-            if level > self.current_level:
-                next_level = level
-                break
-        if next_level is not None:
-            self.current_level = next_level
-        
-        # 설정 저장 (난이도 변경 후)
-        self.saveLastSettings()
-        self.updateDisplay()
+        # 현재 곡을 진행도에 기록하고 난이도 상승
+        self.updateDisplay(self.session.success)
         
     def onFail(self):
-        # 현재 곡이 있으면 항상 진행도에 추가 (중복 체크 없음)
-        if self.current_song and self.current_pattern:
-            level_key = f"{self.getSelectedMode()}_{self.current_level:.1f}"
-            if level_key not in self.shown_songs:
-                self.shown_songs[level_key] = set()
-                
-            # 항상 shown_songs에 추가 (중복 가능)
-            self.shown_songs[level_key].add((self.current_song, self.current_pattern))
-            self.saveShownSongs()  # 진행도 저장
-        
-        # 난이도 하락
-        levels = [float(self.level_combo.itemText(i)) for i in range(self.level_combo.count())]
-        prev_level = None
-        for level in reversed(levels):
-            if level < self.current_level:
-                prev_level = level
-                break
-        if prev_level is not None:
-            self.current_level = prev_level
-        
-        # 설정 저장 (난이도 변경 후)
-        self.saveLastSettings()
-        self.updateDisplay()
+        # 현재 곡을 진행도에 기록하고 난이도 하락
+        self.updateDisplay(self.session.fail)
+        
+    def onStrictStepChanged(self, state):
+        self.session.set_strict_step(state == Qt.Checked)
+        # 미리 골라 둔 다음 곡의 난이도가 바뀌므로 다시 고름
+        QTimer.singleShot(0, self.prefetchNext)
+    
+    def onWeightingChanged(self, index):
+        try:
+            self.session.set_weighting(self.weighting_combo.itemData(index))
+        except Exception as e:
+            print(f"가중치 변경 중 오류 발생: {e}")
+        # 미리 골라 둔 다음 곡도 새 가중치로 다시 고름
+        QTimer.singleShot(0, self.prefetchNext)
     
     def closeEvent(self, event):
         """프로그램 종료 시 현재 설정과 진행상황을 저장합니다."""
-        self.saveLastSettings()
-        self.saveShownSongs()  # 진행상황 저장
+        if self.session is not None:  # 불러오는 중에 닫으면 저장할 변경이 없음
+            self.session.close()
         event.accept()
 
 if __name__ == '__main__':
     try:
+        # UPDOWN_PROFILE/UPDOWN_STATS 환경 변수로 프로파일링/측정 결과 저장 (instrument.py 참고)
+        instrument.configure_from_env()
         app = QApplication(sys.argv)
         window = DifficultyWindow()
         window.show()
-        sys.exit(app.exec_())
+        exit_code = app.exec_()
+        instrument.finish_from_env()
+        sys.exit(exit_code)
     except Exception as e:
         print(f"프로그램 실행 중 오류 발생: {e}")
-        sys.exit(1)
+        sys.exit(1)
\ No newline at end of file
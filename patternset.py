@@ -0,0 +1,137 @@
+"""패턴 ID 인터닝과 비트셋. (PyQt5 없이 사용 가능)
+
+(곡 이름, 모드, 패턴)마다 바뀌지 않는 정수 ID를 붙이고, 진행도(표시/클리어)는
+ID를 비트 위치로 쓰는 비트셋으로 관리합니다. 문자열 키를 매번 만들지 않고
+포함 검사/개수/초기화를 비트 연산으로 처리합니다.
+"""
+import base64
+import threading
+import uuid
+import zlib
+
+
+def split_clear_key(clear_key):
+    """이전 형식의 "곡_모드_패턴" 키를 (곡 이름, 모드, 패턴)으로 나눕니다. 형식이 다르면 None.
+
+    모드와 패턴 이름에는 '_'가 없으므로 뒤에서 두 번 나누면 곡 이름에 '_'가 있어도 정확합니다.
+    """
+    parts = clear_key.rsplit('_', 2)
+    if len(parts) != 3:
+        return None
+    return tuple(parts)
+
+
+class PatternIds:
+    """(곡 이름, 모드, 패턴) -> 정수 ID 표. 한 번 붙은 ID는 바뀌지 않고 새 키는 뒤에 추가됩니다.
+
+    token은 표마다 고유한 값으로, 이 표의 ID로 만든 색인인지 확인하는 데 씁니다.
+    listeners의 함수들은 새 ID가 생길 때마다 키를 받아 호출됩니다. (진행도 저널 기록용,
+    서버처럼 여러 진행도 저장소가 한 표를 함께 쓰면 저장소마다 하나씩)
+    """
+
+    def __init__(self, token=None):
+        self.token = token or uuid.uuid4().hex
+        self.keys = []  # ID -> (곡 이름, 모드, 패턴)
+        self.ids = {}  # (곡 이름, 모드, 패턴) -> ID
+        self.listeners = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, key):
+        return self.ids.get(key)
+
+    def add(self, key):
+        """잠금 없이 새 키를 추가합니다. (불러오기/재생 중에만 사용)"""
+        pid = len(self.keys)
+        self.keys.append(key)
+        self.ids[key] = pid
+        return pid
+
+    def extend(self, keys):
+        """잠금 없이 여러 키를 한 번에 추가합니다. (불러오기 중에만 사용)"""
+        start = len(self.keys)
+        self.keys.extend(keys)
+        self.ids.update(zip(self.keys[start:], range(start, len(self.keys))))
+
+    def intern(self, name, mode, pattern):
+        """키의 ID를 반환하고, 처음 보는 키면 새 ID를 붙입니다. 여러 스레드에서 불러도 됩니다."""
+        key = (name, mode, pattern)
+        pid = self.ids.get(key)
+        if pid is not None:
+            return pid
+        with self._lock:
+            pid = self.ids.get(key)
+            if pid is None:
+                pid = self.add(key)
+                for listener in list(self.listeners):
+                    listener(key)
+        return pid
+
+
+class Bitset:
+    """bytearray 기반 정수 집합. 추가/삭제/포함 검사가 O(1)이고 개수는 따로 셉니다."""
+
+    __slots__ = ('bits', 'count')
+
+    def __init__(self, data=b''):
+        self.bits = bytearray(data)
+        self.count = bin(int.from_bytes(self.bits, 'little')).count('1')
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __contains__(self, i):
+        byte = i >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (i & 7)))
+
+    def __iter__(self):
+        for byte_index, byte in enumerate(self.bits):
+            if byte:
+                base = byte_index << 3
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        yield base + bit
+
+    def add(self, i):
+        """i를 추가합니다. 새로 추가했으면 True."""
+        byte = i >> 3
+        if byte >= len(self.bits):
+            # 자주 늘리지 않도록 두 배씩 키움
+            self.bits.extend(bytes(max(byte + 1, len(self.bits) * 2) - len(self.bits)))
+        mask = 1 << (i & 7)
+        if self.bits[byte] & mask:
+            return False
+        self.bits[byte] |= mask
+        self.count += 1
+        return True
+
+    def discard(self, i):
+        """i를 뺍니다. 있었으면 True."""
+        byte = i >> 3
+        mask = 1 << (i & 7)
+        if byte >= len(self.bits) or not self.bits[byte] & mask:
+            return False
+        self.bits[byte] &= ~mask
+        self.count -= 1
+        return True
+
+    def clear(self):
+        self.bits = bytearray()
+        self.count = 0
+
+    def to_bytes(self):
+        """뒤쪽의 빈 바이트를 뺀 비트열을 반환합니다."""
+        return bytes(self.bits).rstrip(b'\0')
+
+    def encode(self):
+        """저장용 문자열(zlib 압축 + base64)로 바꿉니다."""
+        return base64.b64encode(zlib.compress(self.to_bytes())).decode('ascii')
+
+    @classmethod
+    def decode(cls, text):
+        return cls(zlib.decompress(base64.b64decode(text)))
@@ -0,0 +1,499 @@
+"""진행도(표시한 곡/클리어한 곡/마지막 설정)를 추가 전용 저널로 저장합니다. (PyQt5 없이 사용 가능)
+
+클릭마다 전체 파일을 다시 쓰는 대신 이벤트 한 줄을 저널에 덧붙이고,
+일정 간격으로 모아서 fsync 합니다. 저널이 길어지면 스냅샷으로 압축합니다.
+곡은 (곡 이름, 모드, 패턴)마다 붙인 정수 ID로 기록하고, 표시/클리어 상태는 비트셋으로 들고 있습니다.
+"""
+import base64
+import json
+import os
+import threading
+import zlib
+
+import instrument
+from patternset import Bitset, PatternIds, split_clear_key
+
+SNAPSHOT_VERSION = 2  # 1: 문자열 키(곡_모드_패턴, [곡, 패턴]) 형식
+DEFAULT_SETTINGS = {'last_mode': '4B', '4B': 8.1, '5B': 8.1, '6B': 8.1, '8B': 8.1}
+
+
+def migrate_settings(settings):
+    """기존 형식({'mode', 'level'})의 설정을 모드별 형식으로 바꿉니다."""
+    if 'level' in settings and 'mode' in settings:
+        old_mode = settings['mode']
+        new_settings = dict(DEFAULT_SETTINGS)
+        new_settings['last_mode'] = old_mode
+        new_settings[old_mode] = settings['level']
+        return new_settings
+    return settings
+
+
+def load_legacy(data_dir):
+    """저널 도입 전의 cleared_songs.json/shown_songs.json/last_settings.json을 읽습니다."""
+    def read(name):
+        path = os.path.join(data_dir, name)
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"{name} 로드 중 오류 발생: {e}")
+        return None
+
+    cleared_songs = read('cleared_songs.json') or {}
+    shown_data = read('shown_songs.json') or {}
+    shown_songs = {level_key: set(tuple(song) for song in songs) for level_key, songs in shown_data.items()}
+    settings = read('last_settings.json')
+    last_settings = migrate_settings(settings) if settings else dict(DEFAULT_SETTINGS)
+    return shown_songs, cleared_songs, last_settings
+
+
+def encode_ids(keys):
+    """ID 표([(곡 이름, 모드, 패턴)])를 저장용 문자열로 바꿉니다.
+
+    키 사이는 \x1e, 필드 사이는 \x1f로 구분한 뒤 zlib + base64로 줄입니다. (JSON보다 읽기가 빠름)
+    """
+    text = '\x1e'.join('\x1f'.join(key) for key in keys)
+    return base64.b64encode(zlib.compress(text.encode('utf-8'))).decode('ascii')
+
+
+def decode_ids(text):
+    text = zlib.decompress(base64.b64decode(text)).decode('utf-8')
+    return [tuple(key.split('\x1f')) for key in text.split('\x1e')] if text else []
+
+
+def file_stamp(path):
+    """파일의 (mtime_ns, 크기). 없으면 None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def read_last_settings(data_dir):
+    """저장된 마지막 설정만 읽습니다. (창을 먼저 그릴 때, ProgressStore를 열지 않음)
+
+    ID 표와 비트셋은 풀지 않고, 저널에서도 난이도 이벤트가 들어 있는 줄만 파싱합니다.
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    snapshot_path = os.path.join(data_dir, 'progress_snapshot.json')
+    journal_path = os.path.join(data_dir, 'progress_journal.jsonl')
+    try:
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                settings.update(migrate_settings(json.load(f).get('last_settings', {})))
+        elif not os.path.exists(journal_path):
+            settings.update(load_legacy(data_dir)[2])
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '"mode"' not in line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get('op') == 'level':
+                    settings['last_mode'] = event['mode']
+                    settings[event['mode']] = event['level']
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"마지막 설정 로드 중 오류 발생: {e}")
+    return settings
+
+
+def read_ids(data_dir):
+    """저장된 ID 표(패턴 ID -> (곡 이름, 모드, 패턴))만 읽습니다. 파일은 쓰지 않습니다.
+
+    ProgressStore와 달리 이전 형식을 옮기거나 저널을 압축하지 않으므로, 실행 중인 창/서버가
+    같은 폴더를 쓰고 있어도 집계 CLI(history.py)에서 안전하게 부를 수 있습니다.
+    """
+    ids = PatternIds()
+    snapshot_path = os.path.join(data_dir, 'progress_snapshot.json')
+    journal_path = os.path.join(data_dir, 'progress_journal.jsonl')
+    try:
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            if snapshot.get('version', 1) >= 2:
+                ids.extend(decode_ids(snapshot['ids']))
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '"op": "id"' not in line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event.get('op') == 'id' and ids.get(tuple(event['key'])) is None:
+                    ids.add(tuple(event['key']))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"ID 표 로드 중 오류 발생: {e}")
+    return ids.keys
+
+
+class ProgressStore:
+    """진행도 상태와 저널 파일을 관리합니다.
+
+    상태 변경은 반드시 이 클래스의 메서드로 해야 저널에 기록됩니다.
+    shown/cleared/last_settings 객체는 초기화해도 같은 객체를 유지하므로
+    밖에서 참조를 들고 있어도 됩니다. 곡 데이터 색인도 ids로 패턴 ID를 받아야
+    진행도와 같은 ID를 씁니다.
+
+    ids에 다른 저장소의 ID 표를 주면 저장된 진행도를 그 표의 ID로 옮겨 함께 씁니다.
+    (서버에서 여러 프로필이 곡 색인 하나를 공유할 때)
+
+    read_only면 파일을 읽기만 하고 이전 형식 옮기기/압축/저널 기록을 하지 않습니다.
+    (실행 중인 창/서버와 같은 폴더를 읽는 집계 CLI용. 상태를 바꿔도 저장되지 않음)
+    """
+
+    def __init__(self, data_dir, flush_interval=1.0, compact_threshold=1000, ids=None, read_only=False):
+        self.snapshot_path = os.path.join(data_dir, 'progress_snapshot.json')
+        self.journal_path = os.path.join(data_dir, 'progress_journal.jsonl')
+        self.flush_interval = flush_interval  # 모아서 쓰는 간격 (초)
+        self.compact_threshold = compact_threshold  # 이 이상 이벤트가 쌓이면 스냅샷으로 압축
+        self.read_only = read_only
+
+        self._lock = threading.Lock()  # 상태와 대기 이벤트 보호
+        self.ids = PatternIds()  # (곡 이름, 모드, 패턴) -> 패턴 ID
+        self.shown = {}  # level_key -> 표시한 패턴 ID 비트셋
+        self.cleared = Bitset()  # 클리어한 패턴 ID 비트셋
+        self.last_settings = dict(DEFAULT_SETTINGS)
+
+        self._io_lock = threading.Lock()  # 저널/스냅샷 파일 쓰기 순서 보장
+        self._pending = []  # 아직 저널에 쓰지 않은 이벤트
+        self._ids_cache = (None, None)  # (ID 수, 인코딩한 ID 표)
+        self._journal_count = 0  # 마지막 압축 이후 저널 이벤트 수
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._stamps = None  # 마지막으로 읽거나 쓴 뒤의 (스냅샷, 저널) file_stamp (밖에서 바뀌었는지 확인용)
+
+        self._load(data_dir)
+        self._stamps = self._file_stamps()
+        self._flusher = None
+        if read_only:
+            return
+        if ids is not None and ids is not self.ids:
+            self._adopt_ids(ids)
+        # 불러온 뒤부터 새로 붙는 ID는 저널에 기록 (곡 데이터 로드/업데이트 스레드에서도 불림)
+        self.ids.listeners.append(self._on_new_id)
+
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    # ---- 불러오기 ----
+
+    def _load(self, data_dir):
+        self._migrated = False  # 이전 형식을 읽었으면 불러온 뒤 새 형식으로 다시 씀
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                if snapshot.get('version', 1) < 2:
+                    self._load_strings(snapshot.get('shown_songs', {}), snapshot.get('cleared_songs', {}))
+                    self._migrated = True
+                else:
+                    self.ids.token = snapshot['ids_token']
+                    self._read_snapshot(snapshot)
+                self.last_settings.update(migrate_settings(snapshot.get('last_settings', {})))
+            except Exception as e:
+                print(f"진행도 스냅샷 로드 중 오류 발생: {e}")
+        elif not os.path.exists(self.journal_path):
+            # 첫 실행: 기존 JSON 파일을 스냅샷으로 옮김
+            shown_songs, cleared_songs, last_settings = load_legacy(data_dir)
+            self._load_strings(shown_songs, cleared_songs)
+            self.last_settings.update(last_settings)
+            if self.read_only:
+                return
+            self._write_snapshot(self._serialize())
+            print("기존 진행도 파일을 저널 형식으로 옮겼습니다.")
+
+        self._journal_count = self._replay()
+        if self.read_only:
+            return
+        if self._migrated:
+            print("진행도를 패턴 ID 비트셋 형식으로 옮겼습니다.")
+        if self._migrated or self._journal_count >= self.compact_threshold:
+            self.compact()
+
+    def _read_snapshot(self, snapshot):
+        """ID 형식(버전 2) 스냅샷의 ID 표와 비트셋을 상태에 적용합니다. ID 표는 없는 뒤쪽만 추가합니다."""
+        keys = decode_ids(snapshot['ids'])
+        self.ids.extend(keys[len(self.ids):])
+        self.shown.update(
+            (level_key, Bitset.decode(bits)) for level_key, bits in snapshot.get('shown', {}).items())
+        cleared = Bitset.decode(snapshot['cleared'])
+        self.cleared.bits, self.cleared.count = cleared.bits, cleared.count
+
+    def _load_strings(self, shown_songs, cleared_songs):
+        """이전 형식({level_key: [(곡, 패턴)]}, {"곡_모드_패턴": True})의 진행도를 ID 비트셋으로 옮깁니다."""
+        for level_key, songs in shown_songs.items():
+            mode = level_key.split('_', 1)[0]
+            bitset = self.shown.setdefault(level_key, Bitset())
+            for name, pattern in songs:
+                bitset.add(self.ids.intern(name, mode, pattern))
+        for clear_key in cleared_songs:
+            key = split_clear_key(clear_key)
+            if key is None:
+                print(f"알 수 없는 클리어 기록을 건너뜁니다: {clear_key}")
+                continue
+            self.cleared.add(self.ids.intern(*key))
+
+    def _adopt_ids(self, ids):
+        """저장된 진행도를 공유 ID 표의 ID로 옮기고 그 표를 쓰도록 바꿉니다."""
+        remap = [ids.intern(*key) for key in self.ids.keys]
+        changed = ids.token != self.ids.token or len(ids) != len(self.ids) or remap != list(range(len(remap)))
+
+        def convert(bitset):
+            converted = Bitset()
+            for pid in bitset:
+                if pid < len(remap):
+                    converted.add(remap[pid])
+            return converted
+
+        if remap != list(range(len(remap))):
+            for level_key, bitset in self.shown.items():
+                self.shown[level_key] = convert(bitset)
+            cleared = convert(self.cleared)
+            self.cleared.bits, self.cleared.count = cleared.bits, cleared.count
+        self.ids = ids
+        if changed:
+            # 새 ID 표 기준으로 스냅샷을 다시 쓰고 저널을 비움
+            self.compact()
+
+    def _journal_events(self):
+        """저널의 이벤트를 순서대로 읽습니다."""
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # 쓰는 도중 종료되어 잘린 마지막 줄은 버림
+                        continue
+                    yield event
+        except FileNotFoundError:
+            pass
+
+    def _replay(self, events=None):
+        """저널(또는 미리 읽은 events)의 이벤트를 순서대로 상태에 적용하고 적용한 개수를 반환합니다."""
+        count = 0
+        for event in self._journal_events() if events is None else events:
+            self._apply(event)
+            count += 1
+        return count
+
+    def _apply(self, event):
+        op = event['op']
+        if op == 'id':
+            key = tuple(event['key'])
+            if self.ids.get(key) is None:
+                self.ids.add(key)
+        elif op == 'shown':
+            self.shown.setdefault(event['level'], Bitset()).add(self._event_id(event))
+        elif op == 'unshown':
+            self.shown.get(event['level'], Bitset()).discard(event['id'])
+        elif op == 'cleared':
+            self.cleared.add(self._event_id(event))
+        elif op == 'uncleared':
+            self.cleared.discard(self._event_id(event))
+        elif op == 'level':
+            self.last_settings['last_mode'] = event['mode']
+            self.last_settings[event['mode']] = event['level']
+        elif op == 'reset':
+            if event['what'] == 'shown':
+                self.shown.clear()
+            elif event['what'] == 'cleared':
+                self.cleared.clear()
+
+    def _file_stamps(self):
+        return file_stamp(self.snapshot_path), file_stamp(self.journal_path)
+
+    def changed_externally(self):
+        """마지막으로 읽거나 쓴 뒤에 다른 프로그램이 진행도 파일을 바꿨는지 확인합니다."""
+        with self._io_lock:
+            return self._file_stamps() != self._stamps
+
+    def reload(self):
+        """다른 프로그램이 바꾼 진행도 파일을 다시 불러옵니다. 불러왔으면 True.
+
+        아직 쓰지 않은 이벤트는 먼저 저널에 덧붙이므로 잃지 않습니다.
+        상태 객체(shown/cleared/last_settings/ids)는 그대로 두고 내용만 바꿉니다.
+        ID 표가 다른(다른 곳에서 새로 만든) 스냅샷은 지금 ID와 맞출 수 없어 불러오지 않습니다.
+        """
+        self.flush()
+        with self._io_lock:
+            try:
+                snapshot = None
+                if os.path.exists(self.snapshot_path):
+                    with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                        snapshot = json.load(f)
+                    if snapshot.get('version', 1) < 2 or snapshot['ids_token'] != self.ids.token:
+                        print("진행도 스냅샷의 ID 표가 달라 다시 불러오지 않습니다. (프로그램을 다시 시작하세요)")
+                        self._stamps = self._file_stamps()
+                        return False
+                events = list(self._journal_events())
+                # 이전 형식(문자열 키) 이벤트의 새 키는 _lock을 잡기 전에 붙임
+                # (새 ID 리스너 _on_new_id가 _lock을 잡으므로 재생 중에 붙이면 교착됨)
+                for event in events:
+                    if event.get('op') in ('shown', 'cleared', 'uncleared') and 'id' not in event:
+                        key = self._legacy_key(event)
+                        if key is not None:
+                            self.ids.intern(*key)
+                with self._lock:
+                    self.shown.clear()
+                    self.cleared.clear()
+                    self.last_settings.clear()
+                    self.last_settings.update(DEFAULT_SETTINGS)
+                    if snapshot is not None:
+                        self._read_snapshot(snapshot)
+                        self.last_settings.update(migrate_settings(snapshot.get('last_settings', {})))
+                    self._journal_count = self._replay(events)
+            except Exception as e:
+                print(f"진행도 다시 불러오기 중 오류 발생: {e}")
+                return False
+            self._stamps = self._file_stamps()
+        instrument.count('progress.reload')
+        return True
+
+    @staticmethod
+    def _legacy_key(event):
+        """이전 형식 이벤트의 (곡 이름, 모드, 패턴). 형식이 다르면 None."""
+        if 'song' in event:
+            return event['song'], event['level'].split('_', 1)[0], event['pattern']
+        return split_clear_key(event['key'])
+
+    def _event_id(self, event):
+        """이벤트의 패턴 ID. 이전 형식 저널의 문자열 키는 재생할 때 ID로 바꿉니다."""
+        if 'id' in event:
+            return event['id']
+        self._migrated = True
+        return self.ids.intern(*self._legacy_key(event))
+
+    # ---- 상태 변경 ----
+
+    def _record(self, event):
+        with self._lock:
+            self._apply(event)
+            self._pending.append(event)
+
+    def _on_new_id(self, key):
+        # 다른 저장소의 압축과 엇갈려 같은 키가 두 번 기록되어도 재생할 때 무시됨
+        with self._lock:
+            self._pending.append({'op': 'id', 'key': list(key)})
+
+    def add_shown(self, level_key, pid):
+        if pid in self.shown.get(level_key, ()):
+            return
+        self._record({'op': 'shown', 'level': level_key, 'id': pid})
+
+    def remove_shown(self, level_key, pid):
+        """표시 기록을 지웁니다. (곡 데이터에서 빠지거나 난이도가 바뀐 패턴 정리용)"""
+        if pid not in self.shown.get(level_key, ()):
+            return
+        self._record({'op': 'unshown', 'level': level_key, 'id': pid})
+
+    def set_cleared(self, pid, cleared):
+        if (pid in self.cleared) == cleared:
+            return
+        self._record({'op': 'cleared' if cleared else 'uncleared', 'id': pid})
+
+    def set_level(self, mode, level):
+        if self.last_settings.get('last_mode') == mode and self.last_settings.get(mode) == level:
+            return
+        self._record({'op': 'level', 'mode': mode, 'level': level})
+
+    def reset_shown(self):
+        self._record({'op': 'reset', 'what': 'shown'})
+
+    def reset_cleared(self):
+        self._record({'op': 'reset', 'what': 'cleared'})
+
+    # ---- 쓰기 ----
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"진행도 저장 중 오류 발생: {e}")
+
+    def flush(self):
+        """대기 중인 이벤트를 저널에 한 번에 쓰고 fsync 합니다. 필요하면 압축합니다.
+
+        이벤트를 꺼내기 전에 _io_lock을 잡고 쓸 때까지 놓지 않아서, 여러 스레드가 함께 불러도
+        꺼낸 순서대로 쓰입니다. (나중 이벤트가 먼저 쓰인 뒤 이전 스냅샷이 저널을 비우지 않도록)
+        """
+        if self.read_only:
+            return
+        with self._io_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._journal_count += len(pending)
+                snapshot = None
+                if self._journal_count >= self.compact_threshold:
+                    snapshot = self._serialize()
+                    self._journal_count = 0
+
+            if pending:
+                with instrument.stage('progress.flush'):
+                    lines = ''.join(json.dumps(event, ensure_ascii=False) + '\n' for event in pending).encode('utf-8')
+                    with open(self.journal_path, 'ab') as f:
+                        f.write(lines)
+                        f.flush()
+                        os.fsync(f.fileno())
+                instrument.count('bytes_written', len(lines))
+            if snapshot is not None:
+                # 스냅샷에는 여기까지의 모든 이벤트가 반영되어 있으므로 저널을 비움
+                with instrument.stage('progress.compact'):
+                    self._write_snapshot(snapshot)
+                    with open(self.journal_path, 'w', encoding='utf-8'):
+                        pass
+            self._stamps = self._file_stamps()
+
+    def compact(self):
+        """현재 상태를 스냅샷으로 쓰고 저널을 비웁니다."""
+        with self._lock:
+            self._journal_count = self.compact_threshold
+        self.flush()
+
+    def close(self):
+        """남은 이벤트를 모두 쓰고 백그라운드 쓰기를 멈춥니다."""
+        self._closed = True
+        if self._on_new_id in self.ids.listeners:
+            self.ids.listeners.remove(self._on_new_id)
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def _serialize(self):
+        return {
+            'version': SNAPSHOT_VERSION,
+            'ids_token': self.ids.token,
+            'ids': len(self.ids),  # 인코딩은 잠금 밖에서 (_write_snapshot)
+            'shown': {level_key: bitset.encode() for level_key, bitset in self.shown.items() if bitset},
+            'cleared': self.cleared.encode(),
+            'last_settings': dict(self.last_settings),
+        }
+
+    def _encoded_ids(self, count):
+        # ID 표는 뒤에 추가만 되므로 늘어났을 때만 다시 인코딩
+        if self._ids_cache[0] != count:
+            self._ids_cache = (count, encode_ids(self.ids.keys[:count]))
+        return self._ids_cache[1]
+
+    def _write_snapshot(self, snapshot):
+        snapshot = dict(snapshot, ids=self._encoded_ids(snapshot['ids']))
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+            instrument.count('bytes_written', f.tell())
+        os.replace(tmp_path, self.snapshot_path)
@@ -0,0 +1,143 @@
+"""난이도별 후보 곡 풀. 후보를 매번 다시 걸러내지 않고 뽑기/제외를 바로 처리합니다. (PyQt5 없이 사용 가능)
+
+UniformPool은 균등 추출(O(1)), WeightedPool은 가중치 추출(O(log n))을 합니다.
+둘 다 add/remove/draw/len/in을 지원합니다.
+"""
+
+MIN_WEIGHT = 1e-9  # 가중치가 0 이하여도 뽑힐 수는 있도록 하는 최소값
+
+
+class UniformPool:
+    """맨 뒤 원소와 자리를 바꿔 지우는 리스트. 추가/삭제/추출이 모두 O(1)."""
+
+    def __init__(self, items=()):
+        self.items = []
+        self.slots = {}  # item -> items에서의 위치
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.slots
+
+    def add(self, item, weight=None):
+        if item in self.slots:
+            return
+        self.slots[item] = len(self.items)
+        self.items.append(item)
+
+    def remove(self, item):
+        slot = self.slots.pop(item, None)
+        if slot is None:
+            return
+        last = self.items.pop()
+        if slot < len(self.items):
+            self.items[slot] = last
+            self.slots[last] = slot
+
+    def draw(self, rng):
+        """균등하게 하나를 고릅니다. (풀에서 빼지는 않음)"""
+        return rng.choice(self.items)
+
+
+class WeightedPool:
+    """펜윅 트리로 가중치 합을 관리하는 풀. 추가/삭제/가중치 변경/추출이 O(log n)."""
+
+    def __init__(self, items=(), weight=None):
+        weight = weight or (lambda item: 1.0)
+        self.items = []  # 자리 -> item (비었으면 None)
+        self.weights = []  # 자리 -> 가중치 (비었으면 0)
+        self.slots = {}  # item -> 자리
+        self.free = []  # 비어 있는 자리
+        for item in items:
+            if item not in self.slots:
+                self.slots[item] = len(self.items)
+                self.items.append(item)
+                self.weights.append(max(float(weight(item)), MIN_WEIGHT))
+        self._rebuild(max(len(self.items), 1))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, item):
+        return item in self.slots
+
+    def _rebuild(self, capacity):
+        """capacity 크기로 트리를 O(n)에 다시 만듭니다."""
+        self.capacity = capacity
+        self.tree = tree = [0.0] * (capacity + 1)
+        tree[1:len(self.weights) + 1] = self.weights
+        # 빈 자리의 노드도 부모로 올려야 그 아래 채워진 자리의 합이 위로 전달됨
+        for i in range(1, capacity + 1):
+            parent = i + (i & -i)
+            if parent <= capacity:
+                tree[parent] += tree[i]
+        self.total = sum(self.weights)
+
+    def _update(self, slot, delta):
+        i = slot + 1
+        while i <= self.capacity:
+            self.tree[i] += delta
+            i += i & -i
+        self.total += delta
+
+    def add(self, item, weight=1.0):
+        if item in self.slots:
+            self.set_weight(item, weight)
+            return
+        weight = max(float(weight), MIN_WEIGHT)
+        if self.free:
+            slot = self.free.pop()
+            self.items[slot] = item
+            self.weights[slot] = weight
+            self.slots[item] = slot
+            self._update(slot, weight)
+            return
+        slot = len(self.items)
+        self.items.append(item)
+        self.weights.append(weight)
+        self.slots[item] = slot
+        if slot >= self.capacity:
+            self._rebuild(self.capacity * 2)
+        else:
+            self._update(slot, weight)
+
+    def remove(self, item):
+        slot = self.slots.pop(item, None)
+        if slot is None:
+            return
+        self._update(slot, -self.weights[slot])
+        self.items[slot] = None
+        self.weights[slot] = 0.0
+        self.free.append(slot)
+        if not self.slots:
+            # 부동소수점 오차가 쌓이지 않도록 비면 초기화
+            self.items, self.weights, self.free = [], [], []
+            self._rebuild(1)
+
+    def set_weight(self, item, weight):
+        slot = self.slots[item]
+        weight = max(float(weight), MIN_WEIGHT)
+        self._update(slot, weight - self.weights[slot])
+        self.weights[slot] = weight
+
+    def draw(self, rng):
+        """가중치에 비례해 하나를 고릅니다. (풀에서 빼지는 않음)"""
+        if not self.slots:
+            raise IndexError('빈 풀에서 뽑을 수 없습니다')
+        target = rng.random() * self.total
+        pos = 0
+        step = 1 << (self.capacity.bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt <= self.capacity and self.tree[nxt] <= target:
+                pos = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        slot = min(pos, len(self.items) - 1)
+        if self.items[slot] is None:
+            # 오차로 빈 자리에 떨어진 경우 뒤에서부터 첫 원소 사용
+            slot = next(i for i in range(len(self.items) - 1, -1, -1) if self.items[i] is not None)
+        return self.items[slot]
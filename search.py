@@ -0,0 +1,101 @@
+"""곡 이름 검색 색인. (PyQt5 없이 사용 가능)
+
+곡 이름을 정규화(NFKC로 전각/반각 통일, 대소문자 무시, 공백/기호 제거)한 뒤
+3글자 조각(trigram) -> 곡 번호 색인을 만들어, 입력할 때마다 전체 이름을 훑지 않고 후보만 확인합니다.
+한글은 음절 단위로 다루므로 '비상', 'stay with'처럼 이름의 일부를 입력하면 됩니다.
+"""
+import bisect
+import unicodedata
+
+import instrument
+
+MAX_RESULTS = 50
+
+
+def normalize(text):
+    """검색용으로 정규화합니다. 'Ｓｔａｙ  With-Me' -> 'staywithme'"""
+    text = unicodedata.normalize('NFKC', text).casefold()
+    return ''.join(ch for ch in text if ch.isalnum())
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """PatternIndex의 곡 이름 검색 색인. 색인을 불러올 때마다 한 번 만들고, 만든 뒤에는 바뀌지 않습니다.
+
+    같은 이름의 곡(정규화 후 같은 이름)은 하나로 묶어 검색 결과에 그 곡들의 패턴을 모두 보여줍니다.
+    """
+
+    def __init__(self, index):
+        with instrument.stage('search.build'):
+            self.index = index
+            self.keys = []  # 이름 번호 -> 정규화한 이름
+            self.titles = []  # 이름 번호 -> 원래 곡 이름 (처음 나온 것)
+            self.rows = []  # 이름 번호 -> 패턴 행 번호 목록
+            self.grams = {}  # trigram -> 이름 번호 목록 (오름차순)
+            by_key = {}
+            song_names = []  # 곡 번호 -> 이름 번호
+            for name in index.names:
+                key = normalize(name)
+                number = by_key.get(key)
+                if number is None:
+                    number = by_key[key] = len(self.keys)
+                    self.keys.append(key)
+                    self.titles.append(name)
+                    self.rows.append([])
+                    for gram in trigrams(key):
+                        self.grams.setdefault(gram, []).append(number)
+                song_names.append(number)
+            for row, song in enumerate(index.name_ids):
+                self.rows[song_names[song]].append(row)
+            # 접두어 검색용 (정규화한 이름, 이름 번호) 정렬 목록
+            self.sorted_keys = sorted((key, number) for number, key in enumerate(self.keys))
+
+    def _candidates(self, query):
+        """query를 포함할 수 있는 이름 번호들. 3글자 미만이면 None(전체)."""
+        grams = trigrams(query)
+        if not grams:
+            return None
+        postings = sorted((self.grams.get(gram, ()) for gram in grams), key=len)
+        if not postings[0]:
+            return []
+        # 가장 짧은 목록에서 시작해 나머지 목록에 모두 있는 번호만 남김
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, text, limit=MAX_RESULTS):
+        """이름에 text가 들어 있는 곡을 [(곡 이름, [PatternRecord])]로 반환합니다.
+
+        순위: 이름 전체 일치 > 앞부분 일치 > 중간 일치, 같으면 짧은 이름, 이름 순.
+        """
+        query = normalize(text)
+        if not query:
+            return []
+        with instrument.stage('search.query'):
+            keys = self.keys
+            ranked = []
+            # 앞부분 일치는 정렬 목록에서 이분 탐색
+            start = bisect.bisect_left(self.sorted_keys, (query,))
+            prefix = set()
+            for key, number in self.sorted_keys[start:]:
+                if not key.startswith(query):
+                    break
+                prefix.add(number)
+                ranked.append((0 if key == query else 1, len(key), key, number))
+            candidates = self._candidates(query)
+            if candidates is None:
+                candidates = range(len(keys))  # 1~2글자는 전체 이름에서 찾음
+            for number in candidates:
+                if number not in prefix and query in keys[number]:
+                    ranked.append((2, len(keys[number]), keys[number], number))
+            ranked.sort()
+            return [
+                (self.titles[number], [self.index.record(row) for row in self.rows[number]])
+                for _, _, _, number in ranked[:limit]
+            ]
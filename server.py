@@ -0,0 +1,325 @@
+"""여러 플레이어가 곡 색인 하나를 함께 쓰는 로컬 추천 서버. (PyQt5 없이 사용 가능)
+
+    python server.py --port 8765 --data-dir .
+
+곡 데이터와 패턴 색인은 한 번만 읽어 모든 프로필이 읽기 전용으로 공유하고,
+프로필마다 진행도 저장소(profiles/<이름>/)와 쓰기 잠금을 따로 둡니다.
+
+    POST /profiles/<이름>/start     {"mode": "4B", "level": 8.1, "weighting": "failures"}  (모두 생략 가능)
+    POST /profiles/<이름>/success
+    POST /profiles/<이름>/fail
+    POST /profiles/<이름>/clear     {"cleared": true}
+    GET  /profiles/<이름>           현재 곡과 진행도 (없는 프로필이면 404, 새로 만들지 않음)
+    GET  /status                    곡 수, 열린 프로필 수
+    POST /reload                    온라인 곡 데이터를 다시 받아 모든 프로필에 적용
+"""
+import argparse
+import http.server
+import json
+import os
+import random
+import re
+import signal
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import engine
+import instrument
+import songdb
+from history import PlayHistory
+from progress import ProgressStore
+
+PROFILE_NAME = re.compile(r'^[\w-]{1,32}$')  # 폴더 이름으로 쓰므로 '.', '/' 등은 허용하지 않음
+MAX_BODY = 64 * 1024
+PROFILE_ACTIONS = ('start', 'success', 'fail', 'clear')  # POST /profiles/<이름>/<동작>
+
+
+class ProfileNotFound(LookupError):
+    """열려 있지도 않고 폴더도 없는 프로필. (HTTP 404)"""
+
+
+class Profile:
+    """프로필 하나의 세션과 쓰기 잠금."""
+
+    def __init__(self, session):
+        self.session = session
+        self.lock = threading.Lock()  # 같은 프로필의 변경 요청은 한 번에 하나씩 처리
+
+
+class UpDownService:
+    """공유 패턴 색인과 프로필별 세션을 관리합니다. HTTP와 상관없이 직접 써도 됩니다."""
+
+    def __init__(self, data_dir, songs_url=songdb.SONGS_URL):
+        self.data_dir = data_dir
+        self.songs_url = songs_url
+        self.songs_path = os.path.join(data_dir, 'songs.json')
+        self.meta_path = os.path.join(data_dir, 'songs_meta.json')
+        self.profiles_dir = os.path.join(data_dir, 'profiles')
+        # 데스크톱 앱과 ID 표가 다르므로 색인 스냅샷은 따로 둠
+        self.snapshot_path = os.path.join(self.profiles_dir, 'songs.cache')
+        os.makedirs(self.profiles_dir, exist_ok=True)
+
+        # 모든 프로필이 함께 쓰는 패턴 ID 표를 보관하는 저장소 (진행도는 쓰지 않음)
+        self.catalog = ProgressStore(self.profiles_dir)
+        self.index = None  # 공유 패턴 색인 (만든 뒤에는 바꾸지 않고 참조만 교체)
+        self.profiles = {}  # 이름 -> Profile
+        self._profiles_lock = threading.Lock()  # 프로필 생성/색인 교체만 보호
+        self._reload_lock = threading.Lock()
+
+        if not os.path.exists(self.songs_path):
+            print("로컬 곡 데이터가 없어 온라인에서 받습니다...")
+            songdb.update_index(self.songs_url, self.songs_path, self.meta_path, self.snapshot_path, self.catalog.ids)
+        with instrument.stage('server.load_index'):
+            self.index = songdb.load_index(self.songs_path, self.snapshot_path, self.catalog.ids)
+        print(f"곡 데이터 로드 완료: {self.index.song_count}곡")
+
+    def profile(self, name):
+        """프로필을 반환합니다. 처음이면 진행도를 불러와 만듭니다."""
+        profile = self.profiles.get(name)  # 이미 있으면 잠금 없이 반환
+        if profile is not None:
+            return profile
+        if not PROFILE_NAME.match(name):
+            raise ValueError(f"프로필 이름이 올바르지 않습니다: {name}")
+        with self._profiles_lock:
+            profile = self.profiles.get(name)
+            if profile is None:
+                profile_dir = os.path.join(self.profiles_dir, name)
+                os.makedirs(profile_dir, exist_ok=True)
+                progress = ProgressStore(profile_dir, ids=self.catalog.ids)
+                history = PlayHistory(os.path.join(profile_dir, 'history.bin'), engine.MODES)
+                session = engine.UpDownSession(self.data_dir, self.songs_url, rng=random.Random(),
+                                               progress=progress, history=history)
+                session.set_index(self.index)  # 곡 데이터는 서버가 한꺼번에 교체
+                profile = self.profiles[name] = Profile(session)
+        return profile
+
+    def reload(self):
+        """온라인 곡 데이터를 받아 새 색인을 모든 프로필에 적용합니다.
+
+        바뀌지 않았으면 None, 바뀌었으면 이전 색인과의 차이(IndexDelta)를 반환합니다.
+        차이는 한 번만 구해 모든 프로필이 바뀐 패턴만 반영하도록 넘깁니다.
+        """
+        with self._reload_lock:
+            index = songdb.update_index(self.songs_url, self.songs_path, self.meta_path, self.snapshot_path, self.catalog.ids)
+            if index is None:
+                return None
+            delta = songdb.diff_index(self.index, index)
+            with self._profiles_lock:
+                self.index = index
+                profiles = list(self.profiles.values())
+            for profile in profiles:
+                with profile.lock:
+                    profile.session.set_index(index, delta)
+            print(f"곡 데이터 업데이트 완료: {index.song_count}곡 ({delta.describe()})")
+            return delta
+
+    # ---- 프로필 동작 ----
+
+    def start(self, name, mode=None, level=None, weighting=None):
+        """weighting은 engine.WEIGHTINGS 중 하나 ('uniform', 'rating', 'failures')."""
+        if mode is not None and mode not in engine.MODES:
+            raise ValueError(f"알 수 없는 모드입니다: {mode}")
+        if level is not None:
+            level = float(level)
+            if level not in engine.LEVELS:
+                raise ValueError(f"알 수 없는 난이도입니다: {level}")
+        if weighting is not None and weighting not in engine.WEIGHTINGS:
+            raise ValueError(f"알 수 없는 가중치입니다: {weighting}")
+        profile = self.profile(name)
+        with profile.lock:
+            if mode is not None:
+                profile.session.set_mode(mode)
+            if weighting is not None:
+                profile.session.set_weighting(weighting)
+            return self._result(profile.session, profile.session.start(level))
+
+    def success(self, name):
+        profile = self.profile(name)
+        with profile.lock:
+            return self._result(profile.session, profile.session.success())
+
+    def fail(self, name):
+        profile = self.profile(name)
+        with profile.lock:
+            return self._result(profile.session, profile.session.fail())
+
+    def clear(self, name, cleared=True):
+        profile = self.profile(name)
+        with profile.lock:
+            profile.session.mark_cleared(bool(cleared))
+            return self._result(profile.session)
+
+    def state(self, name):
+        """현재 곡과 진행도. 읽기만 하므로 프로필 잠금을 잡지 않고, 없는 프로필은 만들지 않습니다.
+
+        열려 있지도 않고 폴더도 없는 프로필이면 ProfileNotFound를 냅니다.
+        """
+        if name not in self.profiles:
+            if not PROFILE_NAME.match(name):
+                raise ValueError(f"프로필 이름이 올바르지 않습니다: {name}")
+            if not os.path.isdir(os.path.join(self.profiles_dir, name)):
+                raise ProfileNotFound(f"없는 프로필입니다: {name}")
+        return self._result(self.profile(name).session)
+
+    def status(self):
+        return {'songs': self.index.song_count, 'patterns': len(self.catalog.ids), 'profiles': len(self.profiles)}
+
+    def _result(self, session, pick=None):
+        record = pick.record if pick is not None else session.current
+        stats = session.stats()
+        result = {
+            'status': pick.status if pick is not None else ('ok' if record is not None else 'none'),
+            'mode': session.mode,
+            'level': session.level,
+            'played': pick.played if pick is not None else stats['played'],
+            'remaining': pick.remaining if pick is not None else stats['remaining'],
+            'song': None,
+        }
+        if record is not None:
+            result['song'] = {
+                'name': record.name,
+                'pattern': record.pattern,
+                'floor': record.floor,
+                'label': record.label,
+                'cleared': session.is_cleared(record),
+            }
+        return result
+
+    def close(self):
+        """모든 프로필의 진행도를 저장합니다."""
+        with self._profiles_lock:
+            profiles = list(self.profiles.values())
+        for profile in profiles:
+            with profile.lock:
+                profile.session.close()
+        self.catalog.close()
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    server_version = 'UpDown/1.0'
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        service = self.server.service
+        parts = [urllib.parse.unquote(part) for part in self.path.split('?', 1)[0].split('/') if part]
+        try:
+            body = self._read_body() if method == 'POST' else {}
+            if method == 'GET' and parts == ['status']:
+                code, result = 200, service.status()
+            elif method == 'POST' and parts == ['reload']:
+                delta = service.reload()
+                code, result = 200, {'updated': delta is not None, 'delta': delta.summary() if delta is not None else None}
+            elif len(parts) == 2 and parts[0] == 'profiles' and method == 'GET':
+                code, result = 200, service.state(parts[1])
+            elif len(parts) == 3 and parts[0] == 'profiles' and method == 'POST':
+                name, action = parts[1], parts[2]
+                if action not in PROFILE_ACTIONS:
+                    # 측정 항목 이름에 쓰므로 알려진 동작만 잼
+                    code, result = 404, {'error': f"알 수 없는 동작입니다: {action}"}
+                else:
+                    with instrument.stage(f'server.{action}'):
+                        if action == 'start':
+                            code, result = 200, service.start(name, body.get('mode'), body.get('level'), body.get('weighting'))
+                        elif action == 'success':
+                            code, result = 200, service.success(name)
+                        elif action == 'fail':
+                            code, result = 200, service.fail(name)
+                        else:
+                            code, result = 200, service.clear(name, body.get('cleared', True))
+            else:
+                code, result = 404, {'error': '없는 주소입니다'}
+        except ValueError as e:
+            code, result = 400, {'error': str(e)}
+        except ProfileNotFound as e:
+            code, result = 404, {'error': str(e)}
+        except Exception as e:
+            print(f"요청 처리 중 오류 발생: {e}")
+            code, result = 500, {'error': str(e)}
+        self._send(code, result)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            raise ValueError("요청 본문이 너무 큽니다")
+        if not length:
+            return {}
+        body = json.loads(self.rfile.read(length).decode('utf-8'))
+        if not isinstance(body, dict):
+            raise ValueError("요청 본문은 JSON 객체여야 합니다")
+        return body
+
+    def _send(self, code, result):
+        data = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # 요청마다 출력하지 않음 (부하 테스트 때 출력이 병목이 됨)
+        pass
+
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """요청을 정해진 수의 작업 스레드에서 처리하는 HTTP 서버."""
+
+    request_queue_size = 256  # 기본값(5)이면 동시 접속이 몰릴 때 연결이 재시도되며 1초씩 밀림
+
+    def __init__(self, address, service, workers=32):
+        super().__init__(address, RequestHandler)
+        self.service = service
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='updown')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description='업다운 순회 로컬 추천 서버')
+    parser.add_argument('--host', default='127.0.0.1', help='바인드 주소 (기본: 이 컴퓨터에서만 접속)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--data-dir', default=os.path.dirname(os.path.abspath(__file__)), help='songs.json과 profiles/가 있는 폴더')
+    parser.add_argument('--workers', type=int, default=32, help='요청을 처리할 작업 스레드 수')
+    args = parser.parse_args()
+
+    instrument.configure_from_env()
+    service = UpDownService(args.data_dir)
+    server = PooledHTTPServer((args.host, args.port), service, args.workers)
+    print(f"서버 시작: http://{args.host}:{server.server_port}")
+    # 종료 신호를 받아도 진행도를 저장하고 끝내도록
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        instrument.finish_from_env()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""업다운 사다리를 NumPy로 한꺼번에 시뮬레이션합니다. (PyQt5 없이 사용, NumPy 필요)
+
+    python simulate.py --mode 4B --start 5.1 8.1 12.1 --sessions 1000000
+    python simulate.py --skill 10 --skill-std 2 --steps 300 --workers 4 --json sim.json
+    python simulate.py --strict-step          # '한 칸씩 이동'을 켠 앱
+
+songs.json의 실제 (모드, 난이도)별 패턴 수를 후보 풀로 쓰고, 세션마다 한 번 제시된 곡은
+다시 나오지 않는 규칙을 따릅니다. 이동은 앱의 기본값처럼 성공 시 위/실패 시 아래에서 풀이 남은
+가장 가까운 난이도로 건너뛰고(engine.UpDownSession.next_level, 그런 난이도가 없으면 한 칸),
+--strict-step이면 한 칸씩만 움직입니다(engine.step_level). 클리어 체크는 다루지 않습니다.
+성공 확률은 플레이어 실력(skill, 난이도 단위)에 대한 로지스틱 곡선입니다.
+
+    P(성공) = 1 / (1 + exp((난이도 - skill) / spread)),  skill ~ N(--skill, --skill-std)
+
+시작 난이도마다 수렴 난이도, 수렴까지 걸린 단계 수, 소모한 곡 수, 난이도별 풀 소진 비율을 출력합니다.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import engine
+import songdb
+
+DEFAULT_BATCH = 100000  # 한 번에 시뮬레이션하는 세션 수 (메모리: 세션 수 x 단계 수 바이트 정도)
+
+
+def pool_sizes(songs_path, mode):
+    """songs.json에서 모드의 난이도(engine.LEVELS 순서)별 패턴 수를 셉니다."""
+    with open(songs_path, 'r', encoding='utf-8') as f:
+        index = songdb.PatternIndex(json.load(f))
+    return np.array([index.total(mode, level) for level in engine.LEVELS], dtype=np.int32)
+
+
+def next_rungs(rung, success, available, strict_step):
+    """성공/실패 후 이동할 난이도 칸. available은 세션 x 난이도별로 풀이 남았는지."""
+    top = available.shape[1] - 1
+    step = np.clip(rung + np.where(success, 1, -1), 0, top)
+    if strict_step:
+        return step.astype(np.int16)
+    columns = np.arange(available.shape[1])
+    # 위: 지금 칸보다 높은 칸 중 풀이 남은 가장 낮은 칸
+    above = available & (columns > rung[:, None])
+    up = np.where(above.any(axis=1), above.argmax(axis=1), step)
+    # 아래: 지금 칸보다 낮은 칸 중 풀이 남은 가장 높은 칸
+    below = available & (columns < rung[:, None])
+    down = np.where(below.any(axis=1), top - below[:, ::-1].argmax(axis=1), step)
+    return np.where(success, up, down).astype(np.int16)
+
+
+def simulate_batch(sizes, start_rung, sessions, steps, skill, skill_std, spread, seed, strict_step=False):
+    """세션 sessions개를 steps번씩 진행하고 집계(히스토그램/합계)를 반환합니다.
+
+    여러 프로세스의 결과를 더할 수 있도록 세션별 값 대신 히스토그램으로 모읍니다.
+    """
+    rng = np.random.default_rng(seed)
+    levels = np.array(engine.LEVELS)
+    rows = np.arange(sessions)
+
+    skills = rng.normal(skill, skill_std, sessions) if skill_std > 0 else np.full(sessions, float(skill))
+    rung = np.full(sessions, start_rung, dtype=np.int16)
+    consumed = np.zeros((sessions, len(levels)), dtype=np.int16)  # 세션 x 난이도별 제시된 곡 수
+    path = np.empty((sessions, steps), dtype=np.int16)  # 단계별 난이도 (수렴 분석용)
+
+    for step in range(steps):
+        path[:, step] = rung
+        # 남은 곡이 있는 난이도에서만 곡을 소모 (없으면 앱처럼 곡 없이 이동만 함)
+        available = consumed[rows, rung] < sizes[rung]
+        consumed[rows[available], rung[available]] += 1
+        success = rng.random(sessions) < 1.0 / (1.0 + np.exp((levels[rung] - skills) / spread))
+        rung = next_rungs(rung, success, consumed < sizes, strict_step)
+
+    # 수렴 난이도: 뒤쪽 절반 단계의 평균 난이도 칸
+    converged = np.rint(path[:, steps // 2:].mean(axis=1)).astype(np.int64)
+    # 수렴 단계: 수렴 칸 +-1에 처음 도달한 단계 (이후로는 대부분 그 주변을 오감)
+    near = np.abs(path - converged[:, None]) <= 1
+    settle = np.where(near.any(axis=1), near.argmax(axis=1), steps)
+
+    total_consumed = consumed.sum(axis=1)
+    exhausted = (consumed >= sizes) & (sizes > 0)
+    return {
+        'sessions': sessions,
+        'converged_hist': np.bincount(converged, minlength=len(levels)),
+        'settle_hist': np.bincount(settle, minlength=steps + 1),
+        'consumed_hist': np.bincount(total_consumed, minlength=steps + 1),
+        'consumed_sum': consumed.sum(axis=0, dtype=np.int64),
+        'exhausted': exhausted.sum(axis=0),
+    }
+
+
+def merge(results):
+    merged = dict(results[0])
+    for result in results[1:]:
+        for key, value in result.items():
+            merged[key] = merged[key] + value
+    return merged
+
+
+def hist_percentile(hist, p):
+    """히스토그램(값 -> 개수)에서 백분위수 값을 구합니다."""
+    cumulative = np.cumsum(hist)
+    return int(np.searchsorted(cumulative, cumulative[-1] * p / 100))
+
+
+def hist_mean(hist):
+    return float((np.arange(len(hist)) * hist).sum() / hist.sum())
+
+
+def simulate(sizes, start_level, sessions, steps, skill, skill_std, spread, seed=0, workers=1, batch=DEFAULT_BATCH,
+             strict_step=False):
+    """start_level에서 시작하는 세션 sessions개의 집계를 반환합니다. workers > 1이면 프로세스 풀 사용."""
+    start_rung = engine.LEVELS.index(start_level)
+    batches = [min(batch, sessions - done) for done in range(0, sessions, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    args = [(sizes, start_rung, n, steps, skill, skill_std, spread, s, strict_step) for n, s in zip(batches, seeds)]
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate_batch, *zip(*args)))
+    else:
+        results = [simulate_batch(*a) for a in args]
+    return merge(results)
+
+
+def summarize(result, sizes, start_level):
+    levels = engine.LEVELS
+    sessions = result['sessions']
+    converged = result['converged_hist']
+    return {
+        'start': start_level,
+        'sessions': sessions,
+        'converged_level': {
+            'mean': float(np.dot(converged, levels) / sessions),
+            'p10': levels[hist_percentile(converged, 10)],
+            'p50': levels[hist_percentile(converged, 50)],
+            'p90': levels[hist_percentile(converged, 90)],
+        },
+        'settle_steps': {
+            'mean': hist_mean(result['settle_hist']),
+            'p50': hist_percentile(result['settle_hist'], 50),
+            'p90': hist_percentile(result['settle_hist'], 90),
+        },
+        'songs_consumed': {
+            'mean': hist_mean(result['consumed_hist']),
+            'p50': hist_percentile(result['consumed_hist'], 50),
+            'p90': hist_percentile(result['consumed_hist'], 90),
+        },
+        'levels': [
+            {
+                'level': level,
+                'pool': int(size),
+                'mean_consumed': float(result['consumed_sum'][i] / sessions),
+                'exhausted_ratio': float(result['exhausted'][i] / sessions),
+            }
+            for i, (level, size) in enumerate(zip(levels, sizes))
+        ],
+    }
+
+
+def print_summary(summary):
+    c, s, k = summary['converged_level'], summary['settle_steps'], summary['songs_consumed']
+    print(f"\n== 시작 {summary['start']:.1f} ({summary['sessions']:,} 세션) ==")
+    print(f"수렴 난이도   평균 {c['mean']:.2f}  p10 {c['p10']:.1f}  p50 {c['p50']:.1f}  p90 {c['p90']:.1f}")
+    print(f"수렴 단계     평균 {s['mean']:.1f}  p50 {s['p50']}  p90 {s['p90']}")
+    print(f"소모한 곡 수  평균 {k['mean']:.1f}  p50 {k['p50']}  p90 {k['p90']}")
+    print(f"{'난이도':>8}{'패턴 수':>8}{'평균 소모':>10}{'소진 비율':>10}")
+    for row in summary['levels']:
+        if row['mean_consumed'] >= 0.01 or row['exhausted_ratio'] > 0:
+            print(f"{row['level']:>8.1f}{row['pool']:>8}{row['mean_consumed']:>10.2f}{row['exhausted_ratio']:>10.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='업다운 사다리 일괄 시뮬레이션')
+    parser.add_argument('--songs', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'songs.json'))
+    parser.add_argument('--mode', default='4B', choices=engine.MODES)
+    parser.add_argument('--start', type=float, nargs='+', default=[engine.DEFAULT_LEVEL], help='시작 난이도 (여러 개면 각각 시뮬레이션)')
+    parser.add_argument('--sessions', type=int, default=100000, help='시작 난이도마다 시뮬레이션할 세션 수')
+    parser.add_argument('--steps', type=int, default=200, help='세션마다 성공/실패를 누르는 횟수')
+    parser.add_argument('--skill', type=float, default=engine.DEFAULT_LEVEL, help='성공 확률이 50%%인 난이도의 평균')
+    parser.add_argument('--skill-std', type=float, default=1.0, help='세션마다 다른 실력의 표준편차')
+    parser.add_argument('--spread', type=float, default=0.5, help='성공 확률 곡선의 완만한 정도 (난이도 단위)')
+    parser.add_argument('--workers', type=int, default=1, help='프로세스 수')
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH, help='한 번에 처리할 세션 수')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--strict-step', action='store_true', help="풀이 빈 난이도도 건너뛰지 않고 한 칸씩 이동 (앱의 '한 칸씩 이동')")
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일')
+    args = parser.parse_args()
+
+    for start in args.start:
+        if start not in engine.LEVELS:
+            parser.error(f"알 수 없는 시작 난이도입니다: {start}")
+    if args.steps > np.iinfo(np.int16).max:
+        parser.error("--steps가 너무 큽니다")
+
+    sizes = pool_sizes(args.songs, args.mode)
+    report = {'mode': args.mode, 'steps': args.steps, 'skill': args.skill, 'skill_std': args.skill_std,
+              'spread': args.spread, 'strict_step': args.strict_step, 'results': []}
+    for start in args.start:
+        result = simulate(sizes, start, args.sessions, args.steps, args.skill, args.skill_std, args.spread,
+                          seed=args.seed, workers=args.workers, batch=args.batch, strict_step=args.strict_step)
+        summary = summarize(result, sizes, start)
+        print_summary(summary)
+        report['results'].append(summary)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,591 @@
+"""곡 데이터(songs.json) 다운로드/저장을 담당합니다. (PyQt5 없이 사용 가능)"""
+import codecs
+import hashlib
+import json
+import os
+import pickle
+import struct
+import zlib
+from array import array
+from collections import namedtuple
+
+import instrument
+import search
+from patternset import PatternIds
+
+SONGS_URL = "https://v-archive.net/db/songs.json"  # 온라인 곡 데이터 URL
+EXCLUDED_FIELDS = ("title", "composer", "dlcCode", "dlc", "rating", "level")
+
+CHUNK_SIZE = 64 * 1024  # 스트리밍 다운로드 한 번에 읽는 크기
+SPOOL_SIZE = 1024 * 1024  # 받은 응답을 메모리에 두는 최대 크기 (넘으면 임시 파일로)
+
+SNAPSHOT_MAGIC = b'UDSNAP'
+SNAPSHOT_VERSION = 6  # 색인 구조가 바뀌면 올려서 기존 스냅샷을 무효화
+
+
+def load_meta(meta_path):
+    """마지막 다운로드의 ETag/Last-Modified/내용 해시를 불러옵니다."""
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_meta(meta_path, meta):
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def filter_song(song):
+    """곡 하나에서 필요한 필드만 남긴 dict를 반환합니다."""
+    return {key: value for key, value in song.items() if key not in EXCLUDED_FIELDS}
+
+
+def iter_json_array(chunks):
+    """JSON 배열을 문자열 조각 단위로 받아 원소를 하나씩 돌려줍니다.
+
+    배열 전체를 메모리에 올리지 않고, 닫는 ']'까지 오지 않으면 ValueError를 냅니다.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    state = 'start'  # start -> value -> comma -> ... -> done
+    for chunk in chunks:
+        buf = buf[pos:] + chunk
+        pos = 0
+        while state != 'done':
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos >= len(buf):
+                break
+            char = buf[pos]
+            if state == 'start':
+                if char != '[':
+                    raise ValueError("곡 데이터가 JSON 배열이 아닙니다")
+                pos += 1
+                state = 'first'
+            elif state in ('first', 'comma') and char == ']':
+                pos += 1
+                state = 'done'
+            elif state == 'comma':
+                if char != ',':
+                    raise ValueError(f"곡 데이터 JSON 형식 오류: {char!r}")
+                pos += 1
+                state = 'value'
+            else:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    break  # 원소가 아직 다 오지 않음
+                pos = end
+                state = 'comma'
+                yield value
+    if state != 'done':
+        raise ValueError("곡 데이터가 중간에 끊겼습니다")
+
+
+def download_songs(url, songs_path, meta_path, ids=None):
+    """온라인 곡 데이터를 받아 필요한 필드만 남기고 songs_path에 원자적으로 저장합니다.
+
+    받은 그대로(gzip이면 압축된 채) 임시 버퍼에 두면서 내용 해시만 계산하고,
+    서버가 304를 주거나 해시가 저장된 것과 같으면 파싱/색인/파일 쓰기 없이 None을 반환합니다.
+    바뀐 경우에만 버퍼를 곡 단위로 다시 읽어 필터링하면서 임시 파일과 새 PatternIndex에 넘깁니다.
+    다운로드가 끊기면 기존 songs.json은 그대로 두고, 저장된 ETag/Last-Modified로 조건부 요청을 보냅니다.
+    """
+    import tempfile
+    import urllib.error
+    import urllib.request  # http/email/ssl 모듈이 무거워서 실제로 받을 때만 불러옴
+
+    meta = load_meta(meta_path)
+    has_local = os.path.exists(songs_path)
+
+    headers = {'Accept-Encoding': 'gzip'}
+    if has_local:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        response = urllib.request.urlopen(request, timeout=30)
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and has_local:
+            instrument.count('download.not_modified')
+            return None
+        raise
+
+    tmp_path = songs_path + '.tmp'
+    try:
+        with tempfile.SpooledTemporaryFile(SPOOL_SIZE) as raw:
+            with instrument.stage('download.stream'), response:
+                gzipped = response.headers.get('Content-Encoding', '').lower() == 'gzip'
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                # 해시는 압축을 푼 내용으로 계산 (gzip 여부와 상관없이 같은 내용이면 같은 해시)
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+                digest = hashlib.sha256()
+                while True:
+                    block = response.read(CHUNK_SIZE)
+                    if not block:
+                        break
+                    instrument.count('bytes_downloaded', len(block))
+                    raw.write(block)
+                    for data in inflate(decompressor, block):
+                        digest.update(data)
+                if decompressor is not None and not decompressor.eof:
+                    raise ValueError("gzip 응답이 중간에 끊겼습니다")
+
+            new_meta = {'etag': etag, 'last_modified': last_modified, 'sha256': digest.hexdigest()}
+            if has_local and new_meta['sha256'] == meta.get('sha256'):
+                instrument.count('download.unchanged')
+                # 내용은 같고 검증자만 바뀐 경우 메타데이터만 갱신
+                if new_meta != meta:
+                    save_meta(meta_path, new_meta)
+                return None
+
+            raw.seek(0)
+            with instrument.stage('download.parse'):
+                index, written = write_songs(raw, gzipped, tmp_path)
+
+        # 끝까지 받은 경우에만 교체 (쓰는 도중 읽어도 깨진 파일을 보지 않도록)
+        os.replace(tmp_path, songs_path)
+        instrument.count('bytes_written', written)
+        save_meta(meta_path, new_meta)
+        if ids is not None:
+            # 새 키는 교체한 뒤에야 공유 ID 표(진행도 저널에 남음)에 넣음
+            index.rekey(ids)
+        return index
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def inflate(decompressor, block):
+    """받은 조각을 CHUNK_SIZE 이하로 나눠 압축을 풀어 돌려줍니다. decompressor가 None이면 그대로.
+
+    압축률이 높은 응답도 조각 하나를 한꺼번에 풀지 않으므로 메모리를 적게 씁니다.
+    """
+    if decompressor is None:
+        yield block
+        return
+    while True:
+        data = decompressor.decompress(block, CHUNK_SIZE)
+        if data:
+            yield data
+        block = decompressor.unconsumed_tail
+        if not block and len(data) < CHUNK_SIZE:
+            break
+
+
+def write_songs(raw, gzipped, tmp_path):
+    """받아 둔 곡 데이터(raw 파일 객체)를 곡 단위로 파싱/필터링해 tmp_path에 쓰고 (색인, 쓴 바이트 수)를 반환합니다.
+
+    전체 목록을 메모리에 올리지 않으며, 색인은 이 색인만의 ID 표를 씁니다.
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def text_chunks():
+        while True:
+            block = raw.read(CHUNK_SIZE)
+            if not block:
+                break
+            for data in inflate(decompressor, block):
+                yield text_decoder.decode(data)
+        yield text_decoder.decode(b'', final=True)
+
+    index = PatternIndex()
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        # 곡 하나당 한 줄로 기록
+        separator = '[\n'
+        for song in iter_json_array(text_chunks()):
+            song = filter_song(song)
+            f.write(separator + json.dumps(song, ensure_ascii=False))
+            separator = ',\n'
+            index.add_song(song)
+        f.write('\n]\n' if separator != '[\n' else '[]\n')
+        f.flush()
+        os.fsync(f.fileno())
+        written = f.tell()
+    return index, written
+
+
+def floor_key(level):
+    """난이도(8.1 등)를 정수 키(81)로 바꿉니다. 실수 오차 비교 없이 같은 난이도를 찾기 위함."""
+    return int(round(level * 10))
+
+
+class PatternRecord:
+    """색인의 패턴 하나. 색인은 열(array)로 들고 있다가 필요한 행만 이 객체로 만듭니다.
+
+    pid는 (곡 이름, 모드, 패턴)의 정수 ID (진행도 비트셋의 위치), floor_key는 난이도 x 10 정수입니다.
+    값이 같으면 같은 패턴으로 보므로 다른 색인에서 만든 객체끼리도 비교할 수 있습니다.
+    """
+
+    __slots__ = ('name', 'mode', 'pattern', 'floor_key', 'rating', 'pid')
+
+    def __init__(self, name, mode, pattern, floor_key, rating, pid):
+        self.name = name
+        self.mode = mode
+        self.pattern = pattern
+        self.floor_key = floor_key
+        self.rating = rating
+        self.pid = pid
+
+    @property
+    def floor(self):
+        return self.floor_key / 10
+
+    @property
+    def label(self):
+        return f"{self.pattern}({self.floor:.1f})"
+
+    def __eq__(self, other):
+        if not isinstance(other, PatternRecord):
+            return NotImplemented
+        return (self.pid, self.floor_key, self.rating) == (other.pid, other.floor_key, other.rating)
+
+    def __hash__(self):
+        return hash((self.pid, self.floor_key))
+
+    def __repr__(self):
+        return f"PatternRecord({self.name!r}, {self.mode}, {self.label}, rating={self.rating}, pid={self.pid})"
+
+
+class PatternIndex:
+    """(모드, 난이도)별 패턴 색인. 곡 데이터를 새로 불러올 때마다 한 번만 만듭니다.
+
+    패턴은 행 번호로 구분하고 곡 이름 번호/모드 코드/패턴 코드/난이도(x 10 정수)/레이팅/패턴 ID를
+    array 열에 저장합니다. 곡 이름, 모드, 패턴 이름은 표에 한 번씩만 둡니다.
+    PatternRecord는 patterns()/records_of()로 읽을 때 그 행만 만들어 재사용합니다.
+
+    패턴 ID는 ids(진행도의 PatternIds)에서 받습니다. 없으면 이 색인만의 ID 표를 씁니다.
+    다 만든 뒤에는 바뀌지 않으므로 여러 세션(스레드)이 잠금 없이 함께 읽어도 됩니다.
+    (행 객체 캐시는 동시에 채워도 같은 값의 객체가 하나 더 생길 뿐입니다)
+    """
+
+    def __init__(self, songs=(), ids=None):
+        self.ids = ids if ids is not None else PatternIds()
+        self.ids_token = self.ids.token  # 스냅샷을 다시 쓸 때 같은 ID 표인지 확인용
+        self.ids_count = 0  # 색인을 만든 시점의 ID 수
+        self.song_count = 0
+        self.pid_count = 0  # 서로 다른 패턴 ID 수
+        self.names = []  # 곡 번호 -> 곡 이름
+        self.mode_names = []  # 모드 코드 -> '4B'
+        self.pattern_names = []  # 패턴 코드 -> 'SC'
+        # 행 번호 -> 값
+        self.name_ids = array('I')
+        self.mode_codes = array('B')
+        self.pattern_codes = array('B')
+        self.floors = array('H')  # 난이도 x 10 (floor_key)
+        self.ratings = array('H')  # 0이면 레이팅 없음
+        self.pids = array('I')
+        self.next_row = array('i')  # 같은 패턴 ID의 다음 행 (없으면 -1)
+        self.first_row = array('i')  # 패턴 ID -> 첫 행 (없으면 -1)
+        self.levels = {}  # (mode, floor_key) -> array('I') 행 번호
+        self._reset_caches()
+        for song in songs:
+            self.add_song(song)
+
+    def _reset_caches(self):
+        self._records = {}  # 행 번호 -> PatternRecord
+        self._level_records = {}  # (mode, floor_key) -> [PatternRecord]
+        self._search = None  # 곡 이름 검색 색인 (처음 검색할 때 만듦)
+
+    def __getstate__(self):
+        # ID 표는 진행도에 저장되므로, 행 객체/검색 색인은 다시 만들 수 있으므로 스냅샷에 넣지 않음
+        state = self.__dict__.copy()
+        del state['ids'], state['_records'], state['_level_records'], state['_search']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.ids = None
+        self._reset_caches()
+
+    def __len__(self):
+        return len(self.pids)
+
+    def _code(self, table, value):
+        try:
+            return table.index(value)
+        except ValueError:
+            table.append(value)
+            return len(table) - 1
+
+    def add_song(self, song):
+        """곡 하나의 패턴들을 색인에 추가합니다."""
+        name_id = len(self.names)
+        name = song['name']
+        self.names.append(name)
+        self.song_count += 1
+        for mode, patterns in song['patterns'].items():
+            for diff_type, info in patterns.items():
+                if isinstance(info, dict) and 'floor' in info:
+                    self._add_row(name_id, mode, diff_type, floor_key(info['floor']), info.get('rating') or 0,
+                                  self.ids.intern(name, mode, diff_type))
+        self.ids_count = len(self.ids)
+
+    def rekey(self, ids):
+        """패턴 ID를 ids의 ID로 바꿉니다. 처음 보는 키는 이때 ids에 추가됩니다."""
+        mapping = [ids.intern(*key) for key in self.ids.keys]
+        self.pids = array('I', [mapping[pid] for pid in self.pids])
+        first_row = array('i', [-1]) * (max(mapping) + 1 if mapping else 0)
+        for pid, row in enumerate(self.first_row):
+            if row >= 0:
+                first_row[mapping[pid]] = row
+        self.first_row = first_row
+        self.ids = ids
+        self.ids_token = ids.token
+        self.ids_count = len(ids)
+        self._reset_caches()
+
+    def _add_row(self, name_id, mode, pattern, floor, rating, pid):
+        row = len(self.pids)
+        self.name_ids.append(name_id)
+        self.mode_codes.append(self._code(self.mode_names, mode))
+        self.pattern_codes.append(self._code(self.pattern_names, pattern))
+        self.floors.append(floor)
+        self.ratings.append(rating)
+        self.pids.append(pid)
+        self.levels.setdefault((mode, floor), array('I')).append(row)
+
+        if pid >= len(self.first_row):
+            self.first_row.extend([-1] * (max(pid + 1, len(self.first_row) * 2) - len(self.first_row)))
+        # 같은 이름의 곡이 여러 개면 같은 패턴 ID의 행을 이어 둠
+        self.next_row.append(-1)
+        last = self.first_row[pid]
+        if last < 0:
+            self.first_row[pid] = row
+            self.pid_count += 1
+        else:
+            while self.next_row[last] >= 0:
+                last = self.next_row[last]
+            self.next_row[last] = row
+
+    # ---- 읽기 ----
+
+    def record(self, row):
+        """행의 PatternRecord. 한 번 만든 객체를 재사용합니다."""
+        record = self._records.get(row)
+        if record is None:
+            rating = self.ratings[row]
+            record = self._records[row] = PatternRecord(
+                self.names[self.name_ids[row]], self.mode_names[self.mode_codes[row]],
+                self.pattern_names[self.pattern_codes[row]], self.floors[row], rating or None, self.pids[row])
+        return record
+
+    def rows_of(self, pid):
+        """패턴 ID의 행 번호 목록. 색인에 없으면 빈 목록."""
+        rows = []
+        row = self.first_row[pid] if pid < len(self.first_row) else -1
+        while row >= 0:
+            rows.append(row)
+            row = self.next_row[row]
+        return rows
+
+    def has_pid(self, pid):
+        return pid < len(self.first_row) and self.first_row[pid] >= 0
+
+    def records_of(self, pid):
+        """패턴 ID가 같은 모든 패턴. (같은 이름의 곡이 있으면 여러 개)"""
+        return [self.record(row) for row in self.rows_of(pid)]
+
+    def pid_list(self):
+        """색인에 있는 패턴 ID들. (행 순서)"""
+        first_row = self.first_row
+        return [pid for row, pid in enumerate(self.pids) if first_row[pid] == row]
+
+    def cells(self):
+        """행마다 (패턴 ID, 모드, floor_key). 행 객체를 만들지 않고 전체를 훑을 때 사용."""
+        modes = self.mode_names
+        return zip(self.pids, [modes[code] for code in self.mode_codes], self.floors)
+
+    def signature(self, pid):
+        """패턴 ID의 (난이도, 레이팅) 목록. 두 색인에서 같은 패턴이 바뀌었는지 비교하는 데 사용."""
+        return sorted((self.floors[row], self.ratings[row]) for row in self.rows_of(pid))
+
+    def patterns(self, mode, level):
+        """해당 모드/난이도의 패턴 목록을 반환합니다."""
+        key = (mode, floor_key(level))
+        records = self._level_records.get(key)
+        if records is None:
+            records = self._level_records.setdefault(key, [self.record(row) for row in self.levels.get(key, ())])
+        return records
+
+    def total(self, mode, level):
+        return len(self.levels.get((mode, floor_key(level)), ()))
+
+    def search_index(self):
+        """곡 이름 검색 색인(search.SearchIndex). 처음 부를 때 한 번 만듭니다."""
+        if self._search is None:
+            self._search = search.SearchIndex(self)
+        return self._search
+
+
+class IndexDelta(namedtuple('IndexDelta', ['base', 'added', 'removed', 'changed'])):
+    """곡 데이터 갱신 전후 색인의 차이. (패턴 ID = 곡 이름/모드/패턴 기준)
+
+    base는 비교한 이전 색인, added/removed는 PatternRecord 목록,
+    changed는 난이도나 레이팅이 바뀐 패턴의 (이전 records, 새 records) 목록입니다.
+    """
+
+    __slots__ = ()
+
+    def refloored(self):
+        """changed 중 난이도가 바뀐 것."""
+        return [(old, new) for old, new in self.changed
+                if sorted(r.floor_key for r in old) != sorted(r.floor_key for r in new)]
+
+    def size(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+
+    def removed_groups(self):
+        """이전 색인에서 빠지거나 바뀐 패턴들을 패턴 ID별 목록으로."""
+        return [[record] for record in self.removed] + [old for old, _ in self.changed]
+
+    def added_groups(self):
+        """새 색인에 생기거나 바뀐 패턴들을 패턴 ID별 목록으로."""
+        return [[record] for record in self.added] + [new for _, new in self.changed]
+
+    def summary(self):
+        refloored = len(self.refloored())
+        return {
+            'added': len(self.added),
+            'removed': len(self.removed),
+            'refloored': refloored,
+            'changed': len(self.changed) - refloored,  # 레이팅 등 난이도 외의 변경
+        }
+
+    def describe(self):
+        """상태 표시줄/로그용 한 줄 요약."""
+        s = self.summary()
+        text = f"추가 {s['added']}, 삭제 {s['removed']}, 난이도 변경 {s['refloored']}"
+        if s['changed']:
+            text += f", 기타 변경 {s['changed']}"
+        return text
+
+
+def diff_index(old, new):
+    """두 색인의 차이를 패턴 ID 기준으로 구합니다. 같은 ID 표로 만든 색인이어야 합니다.
+
+    열끼리 비교하고, 바뀐 패턴만 PatternRecord로 만듭니다.
+    """
+    added, removed, changed = [], [], []
+    with instrument.stage('songs.diff'):
+        for pid in new.pid_list():
+            if not old.has_pid(pid):
+                added.extend(new.records_of(pid))
+            elif old.signature(pid) != new.signature(pid):
+                changed.append((old.records_of(pid), new.records_of(pid)))
+        for pid in old.pid_list():
+            if not new.has_pid(pid):
+                removed.extend(old.records_of(pid))
+    return IndexDelta(old, added, removed, changed)
+
+
+def update_index(url, songs_path, meta_path, snapshot_path, ids=None):
+    """온라인 곡 데이터를 받아 저장하고 새 색인과 스냅샷을 만듭니다. 바뀌지 않았으면 None을 반환합니다."""
+    index = download_songs(url, songs_path, meta_path, ids)
+    if index is None:
+        return None
+    write_snapshot(snapshot_path, songs_path, index)
+    return index
+
+
+def source_stamp(songs_path):
+    """songs.json의 (mtime_ns, size)를 반환합니다. 파일이 없으면 None."""
+    try:
+        st = os.stat(songs_path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_snapshot(snapshot_path, songs_path, index):
+    """색인을 바이너리 스냅샷으로 저장합니다. 원본 파일의 mtime/size/해시를 함께 기록합니다."""
+    mtime_ns, size = source_stamp(songs_path)
+    header = json.dumps({
+        'mtime_ns': mtime_ns,
+        'size': size,
+        'sha256': file_sha256(songs_path),
+    }).encode('utf-8')
+    payload = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+
+    tmp_path = snapshot_path + '.tmp'
+    with instrument.stage('snapshot.write'):
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack('<HI', SNAPSHOT_VERSION, len(header)))
+            f.write(header)
+            f.write(payload)
+        os.replace(tmp_path, snapshot_path)
+    instrument.count('bytes_written', len(SNAPSHOT_MAGIC) + struct.calcsize('<HI') + len(header) + len(payload))
+
+
+def read_snapshot(snapshot_path, songs_path, ids=None):
+    """원본과 일치하는 스냅샷이 있으면 색인을 반환하고, 없거나 낡았으면 None을 반환합니다.
+
+    ids를 주면 그 ID 표로 만든 스냅샷만 사용합니다. (진행도를 지웠거나 다른 폴더의 것이면 다시 만듦)
+    """
+    try:
+        with open(snapshot_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    prefix_len = len(SNAPSHOT_MAGIC) + struct.calcsize('<HI')
+    if len(data) < prefix_len or not data.startswith(SNAPSHOT_MAGIC):
+        return None
+    version, header_len = struct.unpack_from('<HI', data, len(SNAPSHOT_MAGIC))
+    if version != SNAPSHOT_VERSION:
+        return None
+
+    try:
+        header = json.loads(data[prefix_len:prefix_len + header_len].decode('utf-8'))
+        stamp = source_stamp(songs_path)
+        if stamp is None:
+            return None
+        if stamp != (header['mtime_ns'], header['size']):
+            # 내용은 그대로인데 mtime만 바뀐 경우(복사 등)는 해시로 확인
+            if stamp[1] != header['size'] or file_sha256(songs_path) != header['sha256']:
+                return None
+        index = pickle.loads(data[prefix_len + header_len:])
+        if ids is not None:
+            # ID 표는 뒤에 추가만 되므로, 같은 표이고 그때의 ID가 모두 남아 있으면 그대로 쓸 수 있음
+            if index.ids_token != ids.token or index.ids_count > len(ids):
+                return None
+            index.ids = ids
+        return index
+    except Exception:
+        return None
+
+
+def load_index(songs_path, snapshot_path, ids=None):
+    """스냅샷에서 색인을 읽고, 쓸 수 없으면 songs.json을 파싱해 만든 뒤 스냅샷을 저장합니다."""
+    with instrument.stage('load_songs.snapshot'):
+        index = read_snapshot(snapshot_path, songs_path, ids)
+    if index is not None:
+        instrument.count('snapshot.hit')
+        return index
+    instrument.count('snapshot.miss')
+
+    with instrument.stage('load_songs.json_parse'), open(songs_path, 'r', encoding='utf-8') as f:
+        songs = json.load(f)
+    with instrument.stage('load_songs.index_build'):
+        index = PatternIndex(songs, ids)
+    try:
+        write_snapshot(snapshot_path, songs_path, index)
+    except OSError as e:
+        print(f"곡 데이터 스냅샷 저장 중 오류 발생: {e}")
+    return index
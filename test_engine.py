@@ -0,0 +1,218 @@
+"""engine.UpDownSession의 곡 데이터 교체(차이만 반영/전체 다시 셈)와 난이도 이동을 손으로 만든 곡 목록으로 검사합니다.
+
+    python -m unittest test_engine
+"""
+import copy
+import random
+import shutil
+import tempfile
+import unittest
+
+import engine
+import songdb
+from levelgrid import LevelGrid
+
+
+def song(name, patterns):
+    """patterns: {(모드, 패턴): (난이도, 레이팅)}"""
+    result = {'name': name, 'patterns': {}}
+    for (mode, pattern), (floor, rating) in patterns.items():
+        result['patterns'].setdefault(mode, {})[pattern] = {'floor': floor, 'rating': rating}
+    return result
+
+
+def make_songs(count):
+    """곡 count개. NM은 앞 절반 8.1/뒤 절반 8.2, SC는 모두 9.1."""
+    return [song(f'곡 {i}', {('4B', 'NM'): (8.1 if i < count // 2 else 8.2, 100 + i), ('4B', 'SC'): (9.1, 150)})
+            for i in range(count)]
+
+
+def set_pattern(songs, name, mode, pattern, floor, rating=None):
+    for s in songs:
+        if s['name'] == name:
+            info = s['patterns'][mode][pattern]
+            info['floor'] = floor
+            if rating is not None:
+                info['rating'] = rating
+            return
+    raise KeyError(name)
+
+
+class SetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='updown-test-')
+        # 저장소를 닫는 정리(addCleanup)가 끝난 뒤에 지우도록 먼저 등록
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+        self.session = engine.UpDownSession(self.data_dir, rng=random.Random(0))
+        self.addCleanup(self.session.close)
+
+    def index(self, songs):
+        return songdb.PatternIndex(songs, self.session.progress.ids)
+
+    def pid(self, name, mode='4B', pattern='NM'):
+        return self.session.progress.ids.get((name, mode, pattern))
+
+    def build_samplers(self):
+        for level in (8.1, 8.2, 8.3, 9.1):
+            self.session._sampler('4B', level)
+
+    def assert_matches_fresh(self):
+        """집계표, 만들어 둔 후보 풀, stats()가 지금 색인과 진행도로 처음부터 만든 것과 같은지."""
+        session = self.session
+        fresh = LevelGrid(engine.MODES, engine.LEVELS, engine.level_key)
+        fresh.rebuild(session.song_index, session.progress)
+        self.assertEqual(list(session.grid.total), list(fresh.total))
+        self.assertEqual(list(session.grid.cleared), list(fresh.cleared))
+        self.assertEqual(list(session.grid.shown), list(fresh.shown))
+        self.assertEqual(session.grid.playable, fresh.playable)
+
+        for (mode, floor), sampler in session.samplers.items():
+            level = floor / 10
+            shown = session.progress.shown.get(engine.level_key(mode, level), ())
+            expected = {record for record in session.song_index.patterns(mode, level)
+                        if record.pid not in session.progress.cleared and record.pid not in shown}
+            self.assertEqual({item for item in sampler.items if item is not None}, expected, (mode, level))
+            self.assertEqual(len(sampler), len(expected))
+
+        for level in (8.1, 8.2, 8.3, 9.1):
+            session.level = level
+            counts = fresh.counts('4B', level)
+            stats = session.stats()
+            self.assertEqual((stats['total'], stats['cleared'], stats['played']),
+                             (counts['total'], counts['cleared'], counts['shown']), level)
+
+    def test_apply_delta(self):
+        session = self.session
+        old_songs = make_songs(20)
+        session.set_index(self.index(old_songs))
+        progress = session.progress
+        progress.add_shown('4B_8.1', self.pid('곡 0'))
+        progress.add_shown('4B_8.1', self.pid('곡 1'))
+        progress.add_shown('4B_9.1', self.pid('곡 3', pattern='SC'))
+        progress.set_cleared(self.pid('곡 2'), True)
+        session.grid.rebuild(session.song_index, progress)
+        self.build_samplers()
+
+        new_songs = copy.deepcopy(old_songs)
+        new_songs = [s for s in new_songs if s['name'] != '곡 3']  # 삭제
+        new_songs.append(song('곡 20', {('4B', 'NM'): (8.1, 120)}))  # 추가
+        set_pattern(new_songs, '곡 0', '4B', 'NM', 8.3)  # 제시된 패턴의 난이도 변경
+        set_pattern(new_songs, '곡 2', '4B', 'NM', 8.2)  # 클리어한 패턴의 난이도 변경
+        set_pattern(new_songs, '곡 5', '4B', 'NM', 8.1, rating=199)  # 레이팅만 변경
+        delta = session.set_index(self.index(new_songs))
+
+        self.assertEqual(delta.summary(), {'added': 1, 'removed': 2, 'refloored': 2, 'changed': 1})
+        self.assertTrue(delta.size() * 2 <= session.song_index.pid_count)
+        self.assertTrue(session.samplers, "차이만 반영했으면 후보 풀을 버리지 않음")
+        # 제시됨 표시는 새 난이도로 옮기고, 삭제된 패턴의 표시는 지움
+        self.assertNotIn(self.pid('곡 0'), progress.shown['4B_8.1'])
+        self.assertIn(self.pid('곡 0'), progress.shown['4B_8.3'])
+        self.assertIn(self.pid('곡 1'), progress.shown['4B_8.1'])
+        self.assertNotIn(self.pid('곡 3', pattern='SC'), progress.shown['4B_9.1'])
+        self.assertIn(self.pid('곡 2'), progress.cleared)
+        self.assert_matches_fresh()
+
+        # 새 패턴과 레이팅이 바뀐 패턴은 새 레코드로 후보 풀에 들어감
+        sampler = session.samplers[('4B', 81)]
+        self.assertIn(self.pid('곡 20'), {record.pid for record in sampler.items})
+        self.assertIn(199, {record.rating for record in sampler.items if record.pid == self.pid('곡 5')})
+
+    def refloor(self, count):
+        """패턴 10개(곡 5개 x NM/SC) 중 count개(NM부터)의 난이도를 바꾼 새 색인을 적용하고 delta를 반환합니다."""
+        session = self.session
+        old_songs = make_songs(5)  # 패턴 ID 10개
+        session.set_index(self.index(old_songs))
+        session.progress.add_shown('4B_8.1', self.pid('곡 0'))
+        session.grid.rebuild(session.song_index, session.progress)
+        self.build_samplers()
+
+        new_songs = copy.deepcopy(old_songs)
+        for i in range(min(count, 5)):
+            set_pattern(new_songs, f'곡 {i}', '4B', 'NM', 8.3)
+        for i in range(count - 5):
+            set_pattern(new_songs, f'곡 {i}', '4B', 'SC', 9.2)
+        return session.set_index(self.index(new_songs))
+
+    def test_threshold_delta(self):
+        delta = self.refloor(5)
+        self.assertEqual(delta.size() * 2, self.session.song_index.pid_count)
+        self.assertTrue(self.session.samplers)
+        self.assertIn(self.pid('곡 0'), self.session.progress.shown['4B_8.3'])
+        self.assert_matches_fresh()
+
+    def test_threshold_rebuild(self):
+        delta = self.refloor(6)
+        self.assertGreater(delta.size() * 2, self.session.song_index.pid_count)
+        self.assertEqual(self.session.samplers, {}, "대부분 바뀌면 후보 풀을 버리고 다시 만듦")
+        # 전체를 다시 셀 때도 제시됨 표시는 옮김
+        self.assertIn(self.pid('곡 0'), self.session.progress.shown['4B_8.3'])
+        self.assert_matches_fresh()
+
+    def test_other_ids_table(self):
+        session = self.session
+        session.set_index(self.index(make_songs(4)))
+        self.build_samplers()
+        # 다른 ID 표로 만든 색인은 비교할 수 없으므로 전체를 다시 셈
+        other = songdb.PatternIndex(make_songs(4))
+        self.assertIsNone(session.set_index(other))
+        self.assertEqual(session.samplers, {})
+
+
+class NextLevelTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='updown-test-')
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+        self.session = engine.UpDownSession(self.data_dir, rng=random.Random(0))
+        self.addCleanup(self.session.close)
+        self.session.set_mode('4B')
+
+    def load(self, floors):
+        songs = [song(f'곡 {floor}', {('4B', 'NM'): (floor, None)}) for floor in floors]
+        self.session.set_index(songdb.PatternIndex(songs, self.session.progress.ids))
+
+    def next_level(self, level, direction):
+        self.session.level = level
+        return self.session.next_level(direction)
+
+    def test_skips_to_nearest_playable(self):
+        self.load([2.1, 8.1, 8.3, 12.1])
+        self.assertEqual(self.next_level(8.1, 1), 8.3)
+        self.assertEqual(self.next_level(8.3, 1), 12.1)
+        self.assertEqual(self.next_level(8.3, -1), 8.1)
+        self.assertEqual(self.next_level(8.1, -1), 2.1)
+
+    def test_falls_back_to_one_step(self):
+        self.load([2.1, 8.1, 8.3, 12.1])
+        # 그 방향에 후보가 남은 난이도가 없으면 한 칸
+        self.assertEqual(self.next_level(12.1, 1), 12.2)
+        self.assertEqual(self.next_level(2.1, -1), 1.3)
+        # 사다리 끝이면 그대로
+        self.assertEqual(self.next_level(engine.LEVELS[-1], 1), engine.LEVELS[-1])
+        self.assertEqual(self.next_level(engine.LEVELS[0], -1), engine.LEVELS[0])
+
+    def test_strict_step(self):
+        self.load([2.1, 8.1, 8.3, 12.1])
+        self.session.set_strict_step(True)
+        self.assertEqual(self.next_level(8.1, 1), 8.2)
+        self.assertEqual(self.next_level(8.1, -1), 7.3)
+        self.session.set_strict_step(False)
+        self.assertEqual(self.next_level(8.1, 1), 8.3)
+
+    def test_without_songs(self):
+        self.assertIsNone(self.session.song_index)
+        self.assertEqual(self.next_level(8.1, 1), 8.2)
+        self.assertEqual(self.next_level(8.1, -1), 7.3)
+
+    def test_success_moves_past_exhausted_level(self):
+        self.load([8.1, 8.2, 8.3])
+        pick = self.session.start(8.2)
+        self.assertEqual(pick.status, 'ok')
+        # 8.2의 유일한 곡을 제시했으므로 실패하면 8.1, 8.1에서 성공하면 8.2를 건너뛰고 8.3
+        self.session.fail()
+        self.assertEqual(self.session.level, 8.1)
+        self.session.success()
+        self.assertEqual(self.session.level, 8.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
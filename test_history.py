@@ -0,0 +1,62 @@
+"""history.failure_counts의 NumPy 경로와 struct 경로를 검사합니다.
+
+    python -m unittest test_history
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import history
+
+MODES = ('4B', '5B', '6B', '8B')
+
+
+class FailureCountsTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='updown-test-')
+        self.path = os.path.join(self.data_dir, 'history.bin')
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def write_plays(self):
+        plays = history.PlayHistory(self.path, MODES)
+        plays.record(3, '4B', 8.1, False, when=1.0)
+        plays.record(3, '4B', 8.1, True, when=2.0)
+        plays.record(3, '4B', 8.1, False, when=3.0)
+        plays.record(70000, '8B', 14.2, False, when=4.0)
+        plays.record(5, '5B', 1.1, True, when=5.0)
+        plays.close()
+        # 쓰는 도중 종료되어 남은 레코드 조각은 세지 않음
+        with open(self.path, 'ab') as f:
+            f.write(b'\0' * (history.RECORD.size // 2))
+        return {3: 2, 70000: 1}
+
+    def struct_counts(self):
+        with mock.patch('history.load_numpy', return_value=None):
+            return history.failure_counts(self.path)
+
+    def test_struct(self):
+        expected = self.write_plays()
+        self.assertEqual(self.struct_counts(), expected)
+
+    @unittest.skipIf(history.load_numpy() is None, "NumPy가 없습니다")
+    def test_numpy_matches_struct(self):
+        expected = self.write_plays()
+        counts = history.failure_counts(self.path)
+        self.assertEqual(counts, expected)
+        self.assertEqual(counts, self.struct_counts())
+        self.assertTrue(all(type(pid) is int and type(n) is int for pid, n in counts.items()))
+
+    def test_missing_or_other_file(self):
+        self.assertEqual(history.failure_counts(self.path), {})
+        self.assertEqual(self.struct_counts(), {})
+        with open(self.path, 'wb') as f:
+            f.write(b'not a history file')
+        self.assertEqual(history.failure_counts(self.path), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""levelgrid.LevelGrid의 칸 집계와 nearest()(후보가 남은 가장 가까운 난이도)를 검사합니다.
+
+    python -m unittest test_levelgrid
+"""
+import unittest
+from types import SimpleNamespace
+
+import engine
+import songdb
+from levelgrid import LevelGrid
+from patternset import Bitset
+
+
+def make_index(floors):
+    """4B NM 패턴이 floors의 난이도마다 하나씩 있는 색인."""
+    return songdb.PatternIndex([{'name': f'곡 {floor}', 'patterns': {'4B': {'NM': {'floor': floor}}}} for floor in floors])
+
+
+class NearestTest(unittest.TestCase):
+    def setUp(self):
+        self.index = make_index([2.1, 8.1, 8.3, 12.1])
+        self.progress = SimpleNamespace(cleared=Bitset(), shown={})
+        self.grid = LevelGrid(engine.MODES, engine.LEVELS, engine.level_key)
+        self.grid.rebuild(self.index, self.progress)
+
+    def records(self, floor):
+        return self.index.patterns('4B', floor)
+
+    def mark_shown(self, floor):
+        records = self.records(floor)
+        self.grid.remove(records, self.progress)
+        self.progress.shown.setdefault(engine.level_key('4B', floor), Bitset()).add(records[0].pid)
+        self.grid.add(records, self.progress)
+
+    def test_up(self):
+        nearest = self.grid.nearest
+        self.assertEqual(nearest('4B', 1.1, 1), 2.1)
+        self.assertEqual(nearest('4B', 8.1, 1), 8.3)
+        self.assertEqual(nearest('4B', 8.2, 1), 8.3)  # 지금 난이도에 패턴이 없어도 됨
+        self.assertEqual(nearest('4B', 8.3, 1), 12.1)
+
+    def test_down(self):
+        nearest = self.grid.nearest
+        self.assertEqual(nearest('4B', 16.2, -1), 12.1)
+        self.assertEqual(nearest('4B', 12.1, -1), 8.3)
+        self.assertEqual(nearest('4B', 8.2, -1), 8.1)
+        self.assertEqual(nearest('4B', 8.1, -1), 2.1)
+
+    def test_ends(self):
+        nearest = self.grid.nearest
+        self.assertIsNone(nearest('4B', 12.1, 1))
+        self.assertIsNone(nearest('4B', 16.2, 1))
+        self.assertIsNone(nearest('4B', 2.1, -1))
+        self.assertIsNone(nearest('4B', 1.1, -1))
+        self.assertIsNone(nearest('5B', 8.1, 1))  # 패턴이 없는 모드
+        self.assertIsNone(nearest('9B', 8.1, 1))  # 표에 없는 모드
+
+    def test_exhausted_levels_are_skipped(self):
+        self.mark_shown(8.3)
+        self.assertEqual(self.grid.nearest('4B', 8.1, 1), 12.1)
+        self.assertEqual(self.grid.nearest('4B', 12.1, -1), 8.1)
+        self.assertEqual(self.grid.counts('4B', 8.3)['remaining'], 0)
+
+        # 클리어해도 남은 후보가 없으므로 건너뜀
+        records = self.records(12.1)
+        self.grid.remove(records, self.progress)
+        self.progress.cleared.add(records[0].pid)
+        self.grid.add(records, self.progress)
+        self.assertIsNone(self.grid.nearest('4B', 8.1, 1))
+
+        # 진행도를 지우고 다시 세면 돌아옴
+        self.progress.shown.clear()
+        self.grid.rebuild(self.index, self.progress)
+        self.assertEqual(self.grid.nearest('4B', 8.1, 1), 8.3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+"""progress.ProgressStore의 저널 재생/압축과 이전 형식 옮기기를 임시 폴더에서 검사합니다.
+
+    python -m unittest test_progress
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from progress import DEFAULT_SETTINGS, ProgressStore
+
+
+class ProgressStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='updown-test-')
+        # 저장소를 닫는 정리(addCleanup)가 끝난 뒤에 지우도록 먼저 등록
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+        self.journal_path = os.path.join(self.data_dir, 'progress_journal.jsonl')
+        self.snapshot_path = os.path.join(self.data_dir, 'progress_snapshot.json')
+
+    def open_store(self, **kwargs):
+        kwargs.setdefault('flush_interval', 60)  # 백그라운드 쓰기가 검사 중간에 끼어들지 않도록
+        store = ProgressStore(self.data_dir, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def read_journal(self):
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def state(self, store):
+        """비교용 상태: ({level_key: {키}}, {키}, 설정). ID 대신 키로 바꿔 ID 표가 달라도 비교할 수 있게 함"""
+        keys = store.ids.keys
+        shown = {level_key: {keys[pid] for pid in bitset} for level_key, bitset in store.shown.items() if bitset}
+        return shown, {keys[pid] for pid in store.cleared}, dict(store.last_settings)
+
+    def fill(self, store):
+        a = store.ids.intern('곡_A', '4B', 'SC')
+        b = store.ids.intern('곡 B', '4B', 'NM')
+        c = store.ids.intern('곡 C', '6B', 'HD')
+        store.add_shown('4B_8.1', a)
+        store.add_shown('4B_8.1', b)
+        store.add_shown('6B_9.2', c)
+        store.remove_shown('4B_8.1', b)
+        store.set_cleared(a, True)
+        store.set_cleared(c, True)
+        store.set_cleared(c, False)
+        store.set_level('6B', 9.2)
+
+    def test_first_run_without_files(self):
+        store = self.open_store()
+        self.assertEqual(self.state(store), ({}, set(), DEFAULT_SETTINGS))
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['version'], 2)
+
+    def test_replay(self):
+        store = self.open_store()
+        self.fill(store)
+        expected = self.state(store)
+        store.close()
+
+        ops = [event['op'] for event in self.read_journal()]
+        self.assertEqual(ops.count('id'), 3)
+        self.assertIn('unshown', ops)
+        self.assertIn('uncleared', ops)
+        reopened = self.open_store()
+        self.assertEqual(self.state(reopened), expected)
+        self.assertEqual(expected, (
+            {'4B_8.1': {('곡_A', '4B', 'SC')}, '6B_9.2': {('곡 C', '6B', 'HD')}},
+            {('곡_A', '4B', 'SC')},
+            dict(DEFAULT_SETTINGS, last_mode='6B', **{'6B': 9.2})))
+
+    def test_replay_reset(self):
+        store = self.open_store()
+        self.fill(store)
+        store.reset_shown()
+        d = store.ids.intern('곡 D', '5B', 'MX')
+        store.add_shown('5B_11.1', d)
+        store.reset_cleared()
+        store.close()
+
+        shown, cleared, _ = self.state(self.open_store())
+        self.assertEqual(shown, {'5B_11.1': {('곡 D', '5B', 'MX')}})
+        self.assertEqual(cleared, set())
+
+    def test_torn_last_line(self):
+        store = self.open_store()
+        self.fill(store)
+        expected = self.state(store)
+        store.close()
+
+        # 쓰는 도중 종료되어 마지막 줄이 잘린 저널
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write('{"op": "cleared", "i')
+        self.assertEqual(self.state(self.open_store()), expected)
+
+    def test_compaction(self):
+        store = self.open_store(compact_threshold=5)
+        self.fill(store)
+        expected = self.state(store)
+        store.flush()
+
+        # 이벤트가 threshold를 넘었으므로 스냅샷에 반영하고 저널을 비움
+        self.assertEqual(self.read_journal(), [])
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['ids_token'], store.ids.token)
+        e = store.ids.intern('곡 E', '8B', 'SC')
+        store.add_shown('8B_14.2', e)
+        store.close()
+        self.assertEqual(len(self.read_journal()), 2)
+
+        expected[0]['8B_14.2'] = {('곡 E', '8B', 'SC')}
+        reopened = self.open_store()
+        self.assertEqual(self.state(reopened), expected)
+        self.assertEqual(reopened.ids.token, store.ids.token)
+        self.assertEqual(reopened.ids.keys, store.ids.keys)
+
+    def test_reload_legacy_key(self):
+        # 멈추면 close()도 멈추므로 open_store 대신 직접 열고, 끝났을 때만 닫음
+        store = ProgressStore(self.data_dir, flush_interval=60)
+        self.fill(store)
+        store.flush()
+        # 다른 프로그램이 아직 ID가 없는 키의 이전 형식 이벤트를 덧붙임
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'op': 'cleared', 'key': 'NewSong_4B_SC'}) + '\n')
+
+        # 재생 중에 새 ID를 붙이면서 _lock을 다시 잡아 멈추지 않아야 함
+        reloaded = []
+        thread = threading.Thread(target=lambda: reloaded.append(store.reload()), daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive(), "reload가 멈췄습니다")
+        self.addCleanup(store.close)
+        self.assertEqual(reloaded, [True])
+        self.assertIn(('NewSong', '4B', 'SC'), self.state(store)[1])
+
+        # 새 ID는 저널에 기록되어 다시 열어도 같음
+        expected = self.state(store)
+        store.close()
+        self.assertEqual(self.state(self.open_store()), expected)
+
+    def write_json(self, name, data):
+        with open(os.path.join(self.data_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def test_migrate_legacy_files(self):
+        # 저널 도입 전의 파일들 (설정은 모드별 형식 이전의 {'mode', 'level'})
+        self.write_json('shown_songs.json', {'4B_8.1': [['곡_A', 'SC'], ['곡 B', 'NM']], '6B_9.2': [['곡 C', 'HD']]})
+        self.write_json('cleared_songs.json', {'곡_A_4B_SC': True, '이상한키': True})
+        self.write_json('last_settings.json', {'mode': '5B', 'level': 11.1})
+        legacy = {name: os.stat(os.path.join(self.data_dir, name)).st_mtime_ns
+                  for name in ('shown_songs.json', 'cleared_songs.json', 'last_settings.json')}
+
+        store = self.open_store()
+        expected = (
+            {'4B_8.1': {('곡_A', '4B', 'SC'), ('곡 B', '4B', 'NM')}, '6B_9.2': {('곡 C', '6B', 'HD')}},
+            {('곡_A', '4B', 'SC')},
+            dict(DEFAULT_SETTINGS, last_mode='5B', **{'5B': 11.1}))
+        self.assertEqual(self.state(store), expected)
+        self.assertTrue(os.path.exists(self.snapshot_path))
+        store.close()
+
+        # 이후로는 스냅샷을 읽고, 기존 파일은 건드리지 않음
+        os.remove(os.path.join(self.data_dir, 'shown_songs.json'))
+        self.assertEqual(self.state(self.open_store()), expected)
+        for name, mtime in legacy.items():
+            if os.path.exists(os.path.join(self.data_dir, name)):
+                self.assertEqual(os.stat(os.path.join(self.data_dir, name)).st_mtime_ns, mtime)
+
+    def test_read_only(self):
+        self.write_json('shown_songs.json', {'4B_8.1': [['곡_A', 'SC']]})
+        self.write_json('cleared_songs.json', {'곡 B_4B_NM': True})
+        # 이전 형식 파일만 있어도 옮기지 않고 읽기만 함
+        reader = self.open_store(read_only=True)
+        expected = ({'4B_8.1': {('곡_A', '4B', 'SC')}}, {('곡 B', '4B', 'NM')}, DEFAULT_SETTINGS)
+        self.assertEqual(self.state(reader), expected)
+        reader.ids.intern('곡 C', '6B', 'HD')
+        reader.close()
+        self.assertFalse(os.path.exists(self.snapshot_path))
+        self.assertFalse(os.path.exists(self.journal_path))
+
+        # 저널이 압축 기준을 넘어도 압축하지 않음
+        store = self.open_store()
+        self.fill(store)
+        store.close()
+        files = {path: os.stat(path).st_mtime_ns for path in (self.snapshot_path, self.journal_path)}
+        reader = self.open_store(read_only=True, compact_threshold=3)
+        self.assertEqual(self.state(reader), self.state(store))
+        reader.close()
+        self.assertEqual({path: os.stat(path).st_mtime_ns for path in files}, files)
+
+    def test_migrate_string_keys(self):
+        # 패턴 ID 도입 전(버전 1)의 문자열 키 스냅샷과 저널
+        self.write_json('progress_snapshot.json', {
+            'version': 1,
+            'shown_songs': {'4B_8.1': [['곡_A', 'SC']]},
+            'cleared_songs': {'곡_A_4B_SC': True, '곡 C_6B_HD': True},
+            'last_settings': {'last_mode': '4B', '4B': 8.1, '5B': 8.1, '6B': 8.1, '8B': 8.1},
+        })
+        events = [
+            {'op': 'shown', 'level': '6B_9.2', 'song': '곡 C', 'pattern': 'HD'},
+            {'op': 'shown', 'level': '4B_8.1', 'song': '곡 B', 'pattern': 'NM'},
+            {'op': 'uncleared', 'key': '곡 C_6B_HD'},
+            {'op': 'cleared', 'key': '곡 B_4B_NM'},
+            {'op': 'level', 'mode': '6B', 'level': 9.2},
+        ]
+        with open(self.journal_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(event, ensure_ascii=False) + '\n' for event in events)
+
+        store = self.open_store()
+        expected = (
+            {'4B_8.1': {('곡_A', '4B', 'SC'), ('곡 B', '4B', 'NM')}, '6B_9.2': {('곡 C', '6B', 'HD')}},
+            {('곡_A', '4B', 'SC'), ('곡 B', '4B', 'NM')},
+            dict(DEFAULT_SETTINGS, last_mode='6B', **{'6B': 9.2}))
+        self.assertEqual(self.state(store), expected)
+        store.close()
+
+        # ID 형식 스냅샷으로 다시 쓰고 문자열 키 저널은 비움
+        with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['version'], 2)
+        self.assertEqual(self.read_journal(), [])
+        self.assertEqual(self.state(self.open_store()), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
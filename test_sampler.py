@@ -0,0 +1,129 @@
+"""sampler.WeightedPool의 펜윅 트리 추가/삭제/추출/재구성을 검사합니다.
+
+    python -m unittest test_sampler
+"""
+import random
+import unittest
+
+from sampler import MIN_WEIGHT, UniformPool, WeightedPool
+
+
+class FixedRng:
+    """random()이 정해 둔 값을 돌려주는 rng. (추출 위치를 직접 정해 확인하기 위함)"""
+
+    def __init__(self, value=0.0):
+        self.value = value
+
+    def random(self):
+        return self.value
+
+
+def expected_draw(pool, value):
+    """자리 순서대로 가중치를 더해 value * total이 떨어지는 원소. (draw()와 같은 규칙의 선형 탐색)"""
+    target = value * pool.total
+    cumulative = 0.0
+    for item, weight in zip(pool.items, pool.weights):
+        cumulative += weight
+        if item is not None and cumulative > target:
+            return item
+    return next(item for item in reversed(pool.items) if item is not None)
+
+
+class WeightedPoolTest(unittest.TestCase):
+    def assert_consistent(self, pool):
+        """트리의 누적 합과 total이 자리별 가중치와 맞는지, 여러 위치의 추출이 선형 탐색과 같은지."""
+        live = [w for item, w in zip(pool.items, pool.weights) if item is not None]
+        self.assertAlmostEqual(pool.total, sum(live))
+        rng = FixedRng()
+        for step in range(200):
+            rng.value = (step + 0.5) / 200
+            self.assertEqual(pool.draw(rng), expected_draw(pool, rng.value))
+
+    def test_distribution(self):
+        weights = {'a': 1.0, 'b': 2.0, 'c': 3.0, 'd': 4.0}
+        pool = WeightedPool(weights, weight=weights.get)
+        rng = random.Random(0)
+        draws = 40000
+        counts = dict.fromkeys(weights, 0)
+        for _ in range(draws):
+            counts[pool.draw(rng)] += 1
+        for item, weight in weights.items():
+            self.assertAlmostEqual(counts[item] / draws, weight / 10, delta=0.01)
+        self.assert_consistent(pool)
+
+    def test_remove_then_draw(self):
+        pool = WeightedPool(range(50), weight=lambda item: item + 1)
+        removed = set(range(0, 50, 3))
+        for item in removed:
+            pool.remove(item)
+        self.assertEqual(len(pool), 50 - len(removed))
+        rng = random.Random(1)
+        for _ in range(5000):
+            self.assertNotIn(pool.draw(rng), removed)
+        self.assert_consistent(pool)
+
+        # 빈 자리는 다시 씀
+        pool.add('new', 10.0)
+        self.assertEqual(len(pool.items), 50)
+        self.assertIn('new', pool)
+        self.assert_consistent(pool)
+
+    def test_remove_all(self):
+        pool = WeightedPool(['a', 'b'])
+        pool.remove('a')
+        pool.remove('b')
+        pool.remove('b')  # 없는 원소는 무시
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(pool.total, 0)
+        with self.assertRaises(IndexError):
+            pool.draw(random.Random(0))
+        pool.add('c', 2.0)
+        self.assertEqual(pool.draw(random.Random(0)), 'c')
+
+    def test_growth(self):
+        pool = WeightedPool()
+        self.assertEqual(pool.capacity, 1)
+        for i in range(100):
+            pool.add(i, i % 7 + 1)
+            if i in (0, 1, 2, 3, 4, 15, 16, 17, 63, 64, 65, 99):
+                self.assert_consistent(pool)
+        self.assertGreaterEqual(pool.capacity, 100)
+        self.assertEqual(len(pool), 100)
+
+    def test_set_weight(self):
+        pool = WeightedPool(['a', 'b', 'c'])
+        pool.set_weight('b', 8.0)
+        pool.add('c', 0.5)  # 이미 있으면 가중치만 바꿈
+        self.assertEqual(len(pool), 3)
+        self.assertEqual(pool.weights, [1.0, 8.0, 0.5])
+        self.assert_consistent(pool)
+
+    def test_zero_weight(self):
+        pool = WeightedPool(['zero', 'one'], weight=lambda item: 0 if item == 'zero' else 1)
+        self.assertEqual(pool.weights[0], MIN_WEIGHT)
+        rng = random.Random(2)
+        self.assertEqual({pool.draw(rng) for _ in range(2000)}, {'one'})
+
+        # 모두 0이어도 뽑을 수는 있음
+        pool = WeightedPool(['x', 'y'], weight=lambda item: 0)
+        pool.add('z', -3)
+        self.assertEqual({pool.draw(rng) for _ in range(2000)}, {'x', 'y', 'z'})
+        self.assert_consistent(pool)
+
+
+class UniformPoolTest(unittest.TestCase):
+    def test_add_remove_draw(self):
+        pool = UniformPool(range(10))
+        pool.add(3)
+        for item in (0, 9, 4):
+            pool.remove(item)
+        pool.remove(42)
+        self.assertEqual(sorted(pool.items), [1, 2, 3, 5, 6, 7, 8])
+        self.assertEqual({item: pool.items[slot] for item, slot in pool.slots.items()},
+                         {item: item for item in pool.items})
+        rng = random.Random(3)
+        self.assertEqual({pool.draw(rng) for _ in range(500)}, set(pool.items))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+"""songdb.download_songs를 로컬 HTTP 서버(http.server)로 검사합니다.
+
+    python -m unittest test_songdb
+"""
+import gzip
+import http.server
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import songdb
+from patternset import PatternIds
+
+SONGS = [
+    {
+        'title': 1,
+        'name': '곡 하나',
+        'composer': '작곡가',
+        'dlcCode': 'R',
+        'dlc': 'RESPECT',
+        'patterns': {
+            '4B': {'NM': {'level': 5, 'floor': 5.1, 'rating': 120}, 'SC': {'level': 12, 'floor': 12.3, 'rating': 180}},
+            '6B': {'HD': {'level': 9, 'floor': 9.2}},
+        },
+    },
+    {
+        'title': 2,
+        'name': '곡 둘',
+        'composer': '작곡가',
+        'dlcCode': 'P1',
+        'dlc': 'PORTABLE 1',
+        'patterns': {'5B': {'MX': {'level': 11, 'floor': 11.1, 'rating': 150}}},
+    },
+]
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    """server.fixtures[경로] = (ETag, 본문, gzip 여부, 잘라서 보낼 길이 또는 None)"""
+
+    def do_GET(self):
+        etag, body, gzipped, cut = self.server.fixtures[self.path]
+        self.server.requests.append(dict(self.headers))
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        if gzipped:
+            body = gzip.compress(body)
+        if cut is not None:
+            body = body[:cut]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if etag:
+            self.send_header('ETag', etag)
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        # 잘린 본문 길이를 그대로 보내 연결이 정상 종료된 것처럼 보이게 함
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloadSongsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        cls.server.fixtures = {}
+        cls.server.requests = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp(prefix='updown-test-')
+        self.songs_path = os.path.join(self.data_dir, 'songs.json')
+        self.meta_path = os.path.join(self.data_dir, 'songs_meta.json')
+        self.server.fixtures.clear()
+        self.server.requests.clear()
+        self.ids = PatternIds()
+        self.new_ids = []  # 공유 ID 표에 새로 붙은 키 (진행도 저널에 기록될 것)
+        self.ids.listeners.append(self.new_ids.append)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def serve(self, path, songs=SONGS, etag=None, gzipped=True, cut=None):
+        body = json.dumps(songs, ensure_ascii=False).encode('utf-8')
+        self.server.fixtures[path] = (etag, body, gzipped, cut)
+        return f'http://127.0.0.1:{self.server.server_port}{path}'
+
+    def download(self, url):
+        return songdb.download_songs(url, self.songs_path, self.meta_path, self.ids)
+
+    def read_songs(self):
+        with open(self.songs_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def assert_no_tmp(self):
+        self.assertEqual(sorted(os.listdir(self.data_dir)), sorted(
+            name for name in ('songs.json', 'songs_meta.json') if os.path.exists(os.path.join(self.data_dir, name))))
+
+    def test_first_download(self):
+        index = self.download(self.serve('/songs.json', etag='"v1"'))
+        self.assertIsNotNone(index)
+        self.assertEqual(index.ids_token, self.ids.token)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(len(self.new_ids), 4)
+        with open(self.songs_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        self.assertEqual(saved, [songdb.filter_song(song) for song in SONGS])
+        self.assertEqual(songdb.load_meta(self.meta_path)['etag'], '"v1"')
+        # 색인의 ID와 공유 ID 표의 키가 맞는지
+        for row in range(len(index)):
+            record = index.record(row)
+            self.assertEqual(self.ids.keys[record.pid], (record.name, record.mode, record.pattern))
+        self.assert_no_tmp()
+
+    def test_not_modified(self):
+        url = self.serve('/songs.json', etag='"v1"')
+        self.download(url)
+        before = (self.read_songs(), os.stat(self.songs_path).st_mtime_ns)
+        ids_before = len(self.ids)
+
+        self.assertIsNone(self.download(url))
+        self.assertEqual(self.server.requests[-1].get('If-None-Match'), '"v1"')
+        self.assertEqual((self.read_songs(), os.stat(self.songs_path).st_mtime_ns), before)
+        self.assertEqual(len(self.ids), ids_before)
+        self.assert_no_tmp()
+
+    def test_unchanged_hash(self):
+        self.download(self.serve('/songs.json', etag='"v1"'))
+        before = (self.read_songs(), os.stat(self.songs_path).st_mtime_ns)
+        ids_before = len(self.ids)
+
+        # 검증자(ETag)만 바뀌고 내용은 같음: 파싱/색인/파일 쓰기 없이 끝나야 함
+        with mock.patch('songdb.write_songs') as write_songs:
+            self.assertIsNone(self.download(self.serve('/songs.json', etag='"v2"')))
+        write_songs.assert_not_called()
+        self.assertEqual((self.read_songs(), os.stat(self.songs_path).st_mtime_ns), before)
+        self.assertEqual(songdb.load_meta(self.meta_path)['etag'], '"v2"')
+        self.assertEqual(len(self.ids), ids_before)
+        self.assert_no_tmp()
+
+    def test_unchanged_hash_does_not_intern(self):
+        self.download(self.serve('/songs.json', etag='"v1"'))
+        # 같은 내용을 받는 동안 새 키가 생기지 않아야 함 (다른 ID 표로 처음 받은 것처럼)
+        self.ids = PatternIds()
+        self.new_ids = []
+        self.ids.listeners.append(self.new_ids.append)
+        self.assertIsNone(self.download(self.serve('/songs.json', etag='"v2"')))
+        self.assertEqual(self.new_ids, [])
+
+    def test_truncated_gzip(self):
+        self.download(self.serve('/songs.json', etag='"v1"'))
+        before = self.read_songs()
+        self.new_ids.clear()
+
+        changed = SONGS + [{'name': '곡 셋', 'patterns': {'8B': {'SC': {'level': 14, 'floor': 14.2}}}}]
+        full = len(gzip.compress(json.dumps(changed, ensure_ascii=False).encode('utf-8')))
+        url = self.serve('/cut.json', songs=changed, etag='"v2"', cut=full // 2)
+        with self.assertRaises(ValueError):
+            self.download(url)
+        self.assertEqual(self.read_songs(), before)
+        self.assertEqual(songdb.load_meta(self.meta_path)['etag'], '"v1"')
+        self.assertEqual(self.new_ids, [])
+        self.assert_no_tmp()
+
+    def test_truncated_json(self):
+        self.download(self.serve('/songs.json', etag='"v1"'))
+        before = self.read_songs()
+        self.new_ids.clear()
+
+        changed = SONGS + [{'name': '곡 셋', 'patterns': {'8B': {'SC': {'level': 14, 'floor': 14.2}}}}]
+        full = len(json.dumps(changed, ensure_ascii=False).encode('utf-8'))
+        url = self.serve('/cut.json', songs=changed, gzipped=False, cut=full - 40)
+        with self.assertRaises(ValueError):
+            self.download(url)
+        self.assertEqual(self.read_songs(), before)
+        self.assertEqual(self.new_ids, [])
+        self.assert_no_tmp()
+
+
+if __name__ == '__main__':
+    unittest.main()